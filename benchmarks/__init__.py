@@ -0,0 +1 @@
+"""Performance benchmarks for pycs, run modules directly: python -m benchmarks.<name>"""
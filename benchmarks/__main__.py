@@ -0,0 +1,55 @@
+"""
+Run benchmark suite or compare results against a stored baseline.
+
+Usage:
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .schemas import SHAPES
+from .suite import DEFAULT_SIZES, compare, run
+
+
+def _log(line: str) -> None:
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and store results as JSON")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Number of leaves")
+    run_parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    run_parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results against baseline")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio considered regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        results = run(tuple(args.sizes), tuple(args.shapes), log=_log)
+        args.output.write_text(json.dumps(results, indent=2))
+        _log(f"Results saved to {args.output}")
+    else:
+        baseline = json.loads(args.baseline.read_text())
+        current = json.loads(args.current.read_text())
+        lines, regressed = compare(baseline, current, args.threshold)
+        for line in lines:
+            _log(line)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare cost of nested attribute reads before and after compiling config with freeze_schema(compiled=True).
+
+Usage: python -m benchmarks.attribute_reads
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from types import SimpleNamespace
+
+from pycs import CN
+
+
+def _make_cfg(width: int) -> CN:
+    schema = CN()
+    schema.MODEL = CN()
+    schema.MODEL.BACKBONE = CN()
+    for idx in range(width):
+        setattr(schema.MODEL, f"LEAF_{idx}", idx)
+        setattr(schema.MODEL.BACKBONE, f"LEAF_{idx}", float(idx))
+    schema.MODEL.LR = 0.1
+    schema.MODEL.BACKBONE.DEPTH = 50
+    return schema.init_cfg()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=100, help="Number of extra leaves in each node")
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    cfg = _make_cfg(args.width)
+    compiled = cfg.clone()
+    compiled.freeze_schema(compiled=True)
+    reference = SimpleNamespace(MODEL=SimpleNamespace(LR=0.1, BACKBONE=SimpleNamespace(DEPTH=50)))
+
+    cases = {
+        "CfgNode": cfg,
+        "compiled CfgNode": compiled,
+        "SimpleNamespace": reference,
+    }
+    sys.stdout.write(f"{'':>18} {'cfg.MODEL.LR':>16} {'cfg.MODEL.BACKBONE.DEPTH':>26}\n")
+    for name, obj in cases.items():
+        times = []
+        for stmt in ("cfg.MODEL.LR", "cfg.MODEL.BACKBONE.DEPTH"):
+            seconds = min(timeit.repeat(stmt, globals={"cfg": obj}, number=args.number, repeat=5))
+            times.append(seconds / args.number * 1e9)
+        sys.stdout.write(f"{name:>18} {f'{times[0]:.0f}ns':>16} {f'{times[1]:.0f}ns':>26}\n")
+
+
+if __name__ == "__main__":
+    main()
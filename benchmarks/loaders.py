@@ -0,0 +1,97 @@
+"""
+Compare parsers of data files on large generated override files.
+
+Usage: python -m benchmarks.loaders --nodes 500 --leaves 250
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+from pycs import loaders
+
+
+def _make_overrides(nodes: int, leaves: int) -> dict[str, Any]:
+    values = (lambda idx: idx, lambda idx: idx / 7, lambda idx: f"value_{idx}", lambda idx: idx % 2 == 0)
+    return {
+        f"NODE_{node_idx}": {
+            f"LEAF_{leaf_idx}": values[leaf_idx % len(values)](node_idx * leaves + leaf_idx)
+            for leaf_idx in range(leaves)
+        }
+        for node_idx in range(nodes)
+    }
+
+
+def _to_toml(data: dict[str, dict[str, Any]]) -> str:
+    """Only supports a single level of tables with scalar values, enough for generated overrides"""
+    lines = []
+    for table, values in data.items():
+        lines.append(f"[{table}]")
+        lines.extend(f"{key} = {json.dumps(value)}" for key, value in values.items())
+    return "\n".join(lines) + "\n"
+
+
+def _write_files(directory: Path, data: dict[str, Any]) -> dict[str, Path]:
+    paths = {
+        "json": directory / "overrides.json",
+        "yaml": directory / "overrides.yaml",
+        "toml": directory / "overrides.toml",
+    }
+    paths["json"].write_text(json.dumps(data))
+    paths["yaml"].write_text(yaml.dump(data, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper)))
+    paths["toml"].write_text(_to_toml(data))
+    try:
+        import msgpack
+    except ImportError:
+        sys.stdout.write("msgpack is not installed, skipping it\n")
+    else:
+        paths["msgpack"] = directory / "overrides.msgpack"
+        paths["msgpack"].write_bytes(msgpack.packb(data))
+    return paths
+
+
+def _best(func: Callable[[], Any], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _load_pure_yaml(path: Path) -> Any:
+    with path.open("rb") as fobj:
+        return yaml.load(fobj, Loader=yaml.SafeLoader)  # noqa: S506 Loader is safe
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--leaves", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = _make_overrides(args.nodes, args.leaves)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = _write_files(Path(tmp_dir), data)
+        cases = [("yaml (pure Python)", paths["yaml"], _load_pure_yaml)]
+        cases.extend((name, path, loaders.get_loader(path.suffix)) for name, path in paths.items())
+        if loaders.yaml_loader() is yaml.SafeLoader:
+            sys.stdout.write("PyYAML is built without libyaml, both yaml timings use the pure Python parser\n")
+        for name, path, loader in cases:
+            assert loader(path) == data  # noqa: S101 Formats should be interchangeable
+            seconds = _best(lambda path=path, loader=loader: loader(path), args.repeat)
+            size = path.stat().st_size / 2**20
+            sys.stdout.write(f"{name:<20} {size:6.1f}MiB {seconds * 1e3:9.1f}ms\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measure cost of a single leaf assignment on a loaded config at different stack depths for each provenance mode.
+
+Usage: python -m benchmarks.provenance
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+from typing import Callable
+
+from pycs import CN
+from pycs.node import PROVENANCE_MODES
+
+
+def _make_cfg(mode: str) -> CN:
+    schema = CN()
+    schema.MODEL = CN()
+    schema.MODEL.LR = 0.1
+    cfg = schema.init_cfg()
+    cfg._module = []  # noqa: SLF001 Pretend the config was loaded, so changes are tracked
+    cfg.set_provenance(mode)
+    return cfg
+
+
+def _at_depth(depth: int, func: Callable[[], float]) -> float:
+    if depth <= 0:
+        return func()
+    return _at_depth(depth - 1, func)
+
+
+def bench_assignment(mode: str, depth: int, number: int) -> float:
+    """Return mean time in microseconds of one assignment"""
+    cfg = _make_cfg(mode)
+
+    def assign() -> None:
+        cfg.MODEL.LR = 0.2
+
+    seconds = _at_depth(depth, lambda: min(timeit.repeat(assign, number=number, repeat=5)))
+    return seconds / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10, 100, 500])
+    parser.add_argument("--number", type=int, default=1000)
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), max(args.depths) * 2 + 100))
+
+    sys.stdout.write(f"{'mode':>6} " + " ".join(f"{f'depth={depth}':>12}" for depth in args.depths) + "\n")
+    for mode in PROVENANCE_MODES:
+        times = [bench_assignment(mode, depth, args.number) for depth in args.depths]
+        sys.stdout.write(f"{mode:>6} " + " ".join(f"{f'{time:.2f}us':>12}" for time in times) + "\n")
+
+
+if __name__ == "__main__":
+    main()
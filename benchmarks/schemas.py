@@ -0,0 +1,176 @@
+"""Synthetic schemas of different shapes used by the benchmark suite"""
+
+from __future__ import annotations
+
+import json
+import math
+import sys
+from typing import TYPE_CHECKING, Callable
+
+from pycs import CL, CN
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+SHAPES: dict[str, Callable[[int], CN]] = {}
+
+
+def shape(func: Callable[[int], CN]) -> Callable[[int], CN]:
+    SHAPES[func.__name__] = func
+    return func
+
+
+def _add_leaves(node: CN, count: int, start: int = 0) -> None:
+    for idx in range(start, start + count):
+        kind = idx % 4
+        if kind == 0:
+            value = idx
+        elif kind == 1:
+            value = float(idx)
+        elif kind == 2:
+            value = f"value_{idx}"
+        else:
+            value = idx % 2 == 0
+        setattr(node, f"LEAF_{idx}", value)
+
+
+@shape
+def wide(leaves: int) -> CN:
+    """Single node with all leaves"""
+    schema = CN()
+    _add_leaves(schema, leaves)
+    return schema
+
+
+@shape
+def tree(leaves: int) -> CN:
+    """Nodes with 10 children and 10 leaves each"""
+    schema = CN()
+    nodes = [schema]
+    remaining = leaves
+    idx = 0
+    while remaining > 0:
+        node = nodes[idx]
+        count = min(10, remaining)
+        _add_leaves(node, count)
+        remaining -= count
+        for child_idx in range(10):
+            if len(nodes) * 10 >= leaves:
+                break
+            child = CN()
+            setattr(node, f"NODE_{child_idx}", child)
+            nodes.append(child)
+        idx += 1
+    return schema
+
+
+@shape
+def deep(leaves: int) -> CN:
+    """Chain of nested nodes, up to 100 levels deep"""
+    depth = min(leaves, 100)
+    per_node = math.ceil(leaves / depth)
+    schema = CN()
+    node = schema
+    remaining = leaves
+    while remaining > 0:
+        count = min(per_node, remaining)
+        _add_leaves(node, count)
+        remaining -= count
+        if remaining > 0:
+            node.NESTED = CN()
+            node = node.NESTED
+    return schema
+
+
+@shape
+def leaf_spec(leaves: int) -> CN:  # noqa: ARG001 Leaves are added by fill_leaf_spec()
+    """Nodes defined with leaf spec, which are filled in after schema is frozen"""
+    schema = CN()
+    schema.INTS = CN(CL(None, int))
+    schema.STRS = CN(str)
+    return schema
+
+
+def fill_leaf_spec(cfg: CN, leaves: int) -> None:
+    for idx in range(leaves // 2):
+        setattr(cfg.INTS, f"LEAF_{idx}", idx)
+    for idx in range(leaves - leaves // 2):
+        setattr(cfg.STRS, f"LEAF_{idx}", f"value_{idx}")
+
+
+@shape
+def inherited(leaves: int) -> CN:
+    """Schema created through chain of 10 inherit() calls, each adding part of the leaves"""
+    schema = CN()
+    step = math.ceil(leaves / 10)
+    for start in range(0, leaves, step):
+        schema = schema.inherit()
+        _add_leaves(schema, min(step, leaves - start), start)
+    return schema
+
+
+def build(shape_name: str, leaves: int) -> CN:
+    schema = SHAPES[shape_name](leaves)
+    if shape_name == "leaf_spec":
+        # Fill leaves in a clone, so schema can be used to initialise configs
+        filled = schema.clone()
+        fill_leaf_spec(filled, leaves)
+        return filled
+    return schema
+
+
+def leaf_paths(cfg: CN, prefix: str = "") -> list[str]:
+    paths = []
+    for key, attr in cfg.attrs:
+        if isinstance(attr, CN):
+            paths.extend(leaf_paths(attr, f"{prefix}{key}."))
+        else:
+            paths.append(prefix + key)
+    return paths
+
+
+def overrides(cfg: CN, fraction: float = 0.01) -> dict:
+    """Nested dict changing a fraction of the leaves, keeping types"""
+    paths = leaf_paths(cfg)
+    step = max(1, int(1 / fraction))
+    result: dict = {}
+    for path in paths[::step]:
+        value = cfg.get_path(path)
+        if isinstance(value, bool):
+            value = not value
+        elif isinstance(value, (int, float)):
+            value = value + 1
+        else:
+            value = f"{value}_new"
+        *node_keys, key = path.split(".")
+        here = result
+        for node_key in node_keys:
+            here = here.setdefault(node_key, {})
+        here[key] = value
+    return result
+
+
+def write_package(root: Path, shape_name: str, leaves: int) -> tuple[Path, Path]:
+    """
+    Create package with schema and config using it, so it can be loaded with CN.load
+
+    :return: path to config file and path to JSON data file with overrides
+    """
+    package_name = f"bench_{shape_name}_{leaves}"
+    package = root / package_name
+    package.mkdir(parents=True, exist_ok=True)
+    (package / "__init__.py").write_text("")
+    (package / "schema.py").write_text(
+        f"from benchmarks.schemas import build\n\nschema = build({shape_name!r}, {leaves})\n",
+    )
+    schema = build(shape_name, leaves)
+    updates = overrides(schema)
+    lines = ["from .schema import schema\n", "\n", "cfg = schema.init_cfg()\n"]
+    lines.extend(f"cfg.{path} = {schema.get_path(path)!r}\n" for path in leaf_paths(schema)[:: max(1, leaves // 10)])
+    cfg_path = package / "cfg.py"
+    cfg_path.write_text("".join(lines))
+    data_path = package / "overrides.json"
+    data_path.write_text(json.dumps(updates))
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    return cfg_path, data_path
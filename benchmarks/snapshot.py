@@ -0,0 +1,58 @@
+"""
+Compare memory usage and read speed of a frozen config and its snapshot.
+
+Usage: python -m benchmarks.snapshot
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+from pycs import CN
+
+
+def _make_cfg(nodes: int, leaves: int) -> CN:
+    schema = CN()
+    for node_idx in range(nodes):
+        node = CN()
+        for leaf_idx in range(leaves):
+            setattr(node, f"LEAF_{leaf_idx}", leaf_idx)
+        setattr(schema, f"NODE_{node_idx}", node)
+    cfg = schema.init_cfg()
+    cfg.freeze()
+    return cfg
+
+
+def _allocated(func: Callable[[], Any]) -> tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=100)
+    parser.add_argument("--leaves", type=int, default=100)
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    cfg, cfg_size = _allocated(lambda: _make_cfg(args.nodes, args.leaves))
+    snapshot, snapshot_size = _allocated(cfg.snapshot)
+    sys.stdout.write(f"config:   {cfg_size / 1024:.0f}KiB\n")
+    sys.stdout.write(f"snapshot: {snapshot_size / 1024:.0f}KiB\n")
+
+    for name, obj in (("config", cfg), ("snapshot", snapshot)):
+        seconds = min(timeit.repeat("cfg.NODE_0.LEAF_0", globals={"cfg": obj}, number=args.number, repeat=5))
+        sys.stdout.write(f"{name} read: {seconds / args.number * 1e9:.0f}ns\n")
+
+
+if __name__ == "__main__":
+    main()
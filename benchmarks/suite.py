@@ -0,0 +1,155 @@
+"""Benchmark suite covering the whole lifecycle of a config"""
+
+from __future__ import annotations
+
+import io
+import pickle
+import platform
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from typing import Any, Callable
+
+import pycs
+from pycs import CN
+
+from .schemas import SHAPES, build, leaf_paths, overrides, write_package
+
+# ruff: noqa: S301, S403
+
+DEFAULT_SIZES = (10, 1000, 10_000)
+
+
+def _measure(stmt: Callable[[], Any], setup: Callable[[], Any] | None = None, min_time=0.05, repeat=3) -> float:
+    """Best time of a single call in seconds"""
+    if setup is not None:
+        # Setup has to be done before every call, e.g. for operations which are cached after first call
+        times = []
+        for _ in range(repeat):
+            setup()
+            start = time.perf_counter()
+            stmt()
+            times.append(time.perf_counter() - start)
+        return min(times)
+    timer = timeit.Timer(stmt)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _read_stmt(cfg: CN) -> Callable[[], Any]:
+    path = leaf_paths(cfg)[-1]
+    attrs = path.split(".")
+
+    def read() -> Any:
+        value = cfg
+        for attr in attrs:
+            value = getattr(value, attr)
+        return value
+
+    return read
+
+
+def _init_and_update_stmt(schema: CN) -> Callable[[], Any]:
+    """Typical use of copy-on-write clones: initialise config and change a single value"""
+    *node_attrs, key = leaf_paths(schema)[-1].split(".")
+    value = schema.get_path(".".join([*node_attrs, key]))
+
+    def init_and_update() -> None:
+        node = schema.init_cfg(cow=True)
+        for attr in node_attrs:
+            node = getattr(node, attr)
+        setattr(node, key, value)
+
+    return init_and_update
+
+
+def bench_case(shape_name: str, leaves: int, tmp_dir: Path) -> dict[str, float]:
+    cfg_path, data_path = write_package(tmp_dir, shape_name, leaves)
+    schema = build(shape_name, leaves)
+    cfg = schema.init_cfg()
+    loaded = CN.load(cfg_path)
+    other = cfg.clone()
+    updates = overrides(cfg)
+    save_path = tmp_dir / f"saved_{shape_name}_{leaves}.py"
+
+    state: dict[str, CN] = {}
+
+    def frozen_clone() -> None:
+        state["frozen"] = cfg.clone()
+        state["frozen"].freeze()
+
+    results = {
+        "load": _measure(lambda: CN.load(cfg_path)),
+        "load_from_data_file": _measure(lambda: schema.load_from_data_file(data_path)),
+        "init_cfg": _measure(schema.init_cfg),
+        "clone": _measure(cfg.clone),
+        "clone_cow": _measure(lambda: cfg.clone(cow=True)),
+        "init_cfg_cow_update": _measure(_init_and_update_stmt(schema)),
+        "read": _measure(_read_stmt(cfg)),
+        "update": _measure(lambda: cfg.update(updates)),
+        "apply": _measure(lambda: cfg.apply(updates, propagate=False)),
+        "to_dict": _measure(cfg.to_dict),
+        "hash": _measure(lambda: hash(state["frozen"]), setup=frozen_clone),
+        "eq": _measure(lambda: cfg == other),
+        "pickle": _measure(lambda: pickle.loads(pickle.dumps(cfg))),
+        "save": _measure(lambda: loaded.save(save_path)),
+        "str": _measure(lambda: str(cfg)),
+        "dump_json": _measure(lambda: cfg.dump(io.StringIO(), format="json")),
+    }
+    return {f"{shape_name}/{leaves}/{name}": value for name, value in results.items()}
+
+
+def run(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    shapes: tuple[str, ...] = tuple(SHAPES),
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    results: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for shape_name in shapes:
+            for leaves in sizes:
+                case_results = bench_case(shape_name, leaves, Path(tmp_dir))
+                results.update(case_results)
+                if log is not None:
+                    for key, value in case_results.items():
+                        log(f"{key}: {format_time(value)}")
+    return {
+        "meta": {
+            "pycs": pycs.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> tuple[list[str], bool]:
+    """
+    :param threshold: ratio of current to baseline time above which benchmark is considered to have regressed
+    :return: report lines and whether any benchmark regressed
+    """
+    lines = [f"{'benchmark':<40} {'baseline':>10} {'current':>10} {'ratio':>7}"]
+    regressed = False
+    for key, current_time in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        base_time = baseline["results"][key]
+        ratio = current_time / base_time if base_time else float("inf")
+        mark = ""
+        if ratio > threshold:
+            regressed = True
+            mark = " REGRESSED"
+        elif ratio < 1 / threshold:
+            mark = " improved"
+        lines.append(f"{key:<40} {format_time(base_time):>10} {format_time(current_time):>10} {ratio:>6.2f}x{mark}")
+    return lines, regressed
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
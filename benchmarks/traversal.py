@@ -0,0 +1,72 @@
+"""
+Measure time and peak memory allocated by operations which traverse the whole config.
+
+Usage: python -m benchmarks.traversal --depth 1000 --width 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+import warnings
+from typing import Callable
+
+from pycs import CN
+
+OPERATIONS = ("to_dict", "clone", "freeze_schema", "unfreeze_schema", "transform", "validate", "run_hooks", "freeze")
+
+
+def _make_deep(depth: int) -> CN:
+    cfg = CN()
+    node = cfg
+    for idx in range(depth):
+        child = CN()
+        child.LEAF = idx
+        node.NEXT = child
+        node = child
+    return cfg
+
+
+def _make_wide(width: int, leaves_per_node: int = 100) -> CN:
+    cfg = CN()
+    for node_idx in range(width // leaves_per_node):
+        node = CN()
+        for leaf_idx in range(leaves_per_node):
+            setattr(node, f"LEAF_{leaf_idx}", leaf_idx)
+        setattr(cfg, f"NODE_{node_idx}", node)
+    return cfg
+
+
+def _measure(func: Callable[[], object]) -> tuple[float, int]:
+    """Time and peak allocation are measured in separate calls, as tracing slows down allocations"""
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depth", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=100_000, help="Number of leaves")
+    args = parser.parse_args()
+
+    # Deep configs need a higher limit with recursive traversal, it is not needed with iterative one
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), args.depth * 10))
+    warnings.simplefilter("ignore")  # Schema is not frozen for transform()
+    for name, cfg in (("deep", _make_deep(args.depth)), ("wide", _make_wide(args.width))):
+        for operation in OPERATIONS:
+            seconds, peak = _measure(getattr(cfg, operation))
+            sys.stdout.write(f"{name} {operation:<16} {seconds * 1e3:9.1f}ms {peak / 1024:10.0f}KiB\n")
+
+
+if __name__ == "__main__":
+    main()
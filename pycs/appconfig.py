@@ -0,0 +1,145 @@
+"""Keep AWS AppConfig configuration session between loads, see LoadFromAWSAppConfig"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any, Callable
+
+import yaml
+
+if TYPE_CHECKING:
+    import boto3
+
+DEFAULT_POLL_INTERVAL = 15
+# Tokens expire if they are not used for 24 hours, new session is started a bit earlier
+_TOKEN_LIFETIME = 23 * 60 * 60
+
+
+class AppConfigPoller:
+    """
+    Client and configuration session of a single AppConfig profile, reused for every poll
+
+    Polls are made at most once per interval requested by AppConfig, empty response means that configuration
+    hasn't changed since the previous poll. With start(), polls are made in a background thread and get()
+    only returns the latest configuration.
+
+    :param client: appconfigdata client, or an object with the same methods, created from session by default
+    :param clock: Source of monotonic time in seconds, for tests
+    """
+
+    def __init__(
+        self,
+        app: str,
+        env: str,
+        profile: str,
+        *,
+        client: Any = None,
+        session: boto3.Session | None = None,
+        poll_interval: int = DEFAULT_POLL_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.app = app
+        self.env = env
+        self.profile = profile
+        self.poll_interval = poll_interval
+        if client is None:
+            try:
+                import boto3
+            except ModuleNotFoundError as e:
+                raise ImportError("Please install with aws extra: pip install pycs[aws]") from e
+            client = (session or boto3).client("appconfigdata")
+        self._client = client
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._token: str | None = None
+        self._token_time = 0.0
+        # Interval requested by AppConfig in the last response
+        self._interval: float = poll_interval
+        self._next_poll: float | None = None
+        self._updates: dict[str, Any] | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        # Last error of background poll, previous configuration is kept until poll succeeds
+        self.error: Exception | None = None
+
+    def get(self) -> dict[str, Any] | None:
+        """Latest configuration, polls first if it is due and there is no background thread"""
+        if self._thread is None and (self._next_poll is None or self._clock() >= self._next_poll):
+            self.poll()
+        # Configs shouldn't share mutable values with the poller
+        return deepcopy(self._updates)
+
+    def poll(self) -> bool:
+        """Fetch configuration if it has changed, returns whether it has changed"""
+        with self._lock:
+            now = self._clock()
+            if self._token is None or now - self._token_time > _TOKEN_LIFETIME:
+                self._token = self._client.start_configuration_session(
+                    ApplicationIdentifier=self.app,
+                    ConfigurationProfileIdentifier=self.profile,
+                    EnvironmentIdentifier=self.env,
+                    RequiredMinimumPollIntervalInSeconds=self.poll_interval,
+                )["InitialConfigurationToken"]
+            try:
+                response = self._client.get_latest_configuration(ConfigurationToken=self._token)
+            except Exception:
+                # Token can be expired or rejected, so the next poll starts a new session
+                self._token = None
+                raise
+            self._token = response["NextPollConfigurationToken"]
+            self._token_time = now
+            self._interval = response.get("NextPollIntervalInSeconds", self._interval)
+            self._next_poll = now + self._interval
+            content: bytes = response["Configuration"].read()
+            if not content:
+                return False
+            # Single assignment, so readers get either old or new configuration
+            self._updates = _parse_content(response["ContentType"], content)
+            return True
+
+    def start(self) -> None:
+        """Poll in a daemon thread until stop() is called, first poll is made before returning"""
+        if self._thread is not None:
+            return
+        self.poll()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"AppConfigPoller({self.app})", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> AppConfigPoller:
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(max(self._next_poll - self._clock(), 0)):
+            self._background_poll()
+
+    def _background_poll(self) -> None:
+        try:
+            self.poll()
+        except Exception as exc:  # noqa: BLE001 Keep polling, error is available to the owner
+            self.error = exc
+            self._next_poll = self._clock() + self._interval
+        else:
+            self.error = None
+
+
+def _parse_content(content_type: str, content: bytes) -> dict[str, Any]:
+    if content_type == "application/x-yaml":
+        return yaml.safe_load(content)
+    if content_type == "application/json":
+        return json.loads(content.decode("utf-8"))
+    raise ValueError(f"Got config in invalid type: {content_type}")
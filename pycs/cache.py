@@ -0,0 +1,203 @@
+"""Persistent cache of loaded configs, to skip executing config modules and transforms on repeated loads"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import pickle  # noqa: S403 Cache directory and entries are only accessible by their owner
+import stat
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+from .digest import new_hash, update_with_value
+from .utils import cfg_source_files, file_digest, loaded_module_files
+
+if TYPE_CHECKING:
+    from types import ModuleType
+
+    from .node import CN
+
+DEFAULT_MAX_SIZE = 256 * 2**20
+
+
+class ResolvedConfigCache:
+    """
+    Store configs loaded with CN.load() on disk, after transforms have been applied
+
+    Entry is only used if content of every file it was loaded from (config modules, schema, transforms
+    and files reported by TransformBase.cache_files()), environment variables reported by
+    TransformBase.cache_env_prefixes(), pycs and python versions are the same.
+    Configs with transforms marked with non_cacheable() are never stored.
+    Validators and hooks are run on every load.
+
+    Entries are written atomically, so cache can be shared by concurrent processes,
+    least recently used entries are removed when total size exceeds max_size bytes.
+    Entries are unpickled, so directory is made accessible only by its owner
+    and entries which other users could have written are ignored.
+    """
+
+    def __init__(self, directory: Path | str, max_size: int = DEFAULT_MAX_SIZE):
+        self.directory = Path(directory).expanduser()
+        self.max_size = max_size
+        self._manifests = self.directory / "manifests"
+        self._entries = self.directory / "entries"
+
+    def get(self, cfg_path: Path | str) -> CN | None:
+        """Config stored for cfg_path, if nothing it depends on has changed"""
+        cfg_path = Path(cfg_path).absolute()
+        if not self.directory.exists():
+            return None
+        self._secure()
+        manifest = self._read_manifest(cfg_path)
+        if manifest is None:
+            return None
+        entry = self._entries / f"{_entry_key(cfg_path, manifest)}.pkl"
+        try:
+            with entry.open("rb") as f:
+                _check_private(f, entry)
+                cfg = pickle.load(f)  # noqa: S301 See import
+        except FileNotFoundError:
+            return None
+        except Exception:  # noqa: BLE001 Corrupted or incompatible entry is the same as a missing one
+            entry.unlink(missing_ok=True)
+            return None
+        with contextlib.suppress(FileNotFoundError):  # Evicted by another process
+            os.utime(entry)
+        return cfg
+
+    def put(self, cfg_path: Path | str, cfg: CN, module: ModuleType) -> bool:
+        """
+        Store config loaded from module at cfg_path, must be called after transforms
+
+        :return: Whether config was stored
+        """
+        cfg_path = Path(cfg_path).absolute()
+        manifest = _build_manifest(cfg, module)
+        if manifest is None:
+            return False
+        try:
+            data = pickle.dumps(cfg, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:  # noqa: BLE001 Pickling can fail with many different errors
+            warnings.warn(f"Can't cache config {cfg_path}: {exc}", stacklevel=3)
+            return False
+        self._secure()
+        _write_atomic(self._entries / f"{_entry_key(cfg_path, manifest)}.pkl", data)
+        _write_atomic(self._manifest_path(cfg_path), json.dumps(manifest).encode())
+        self._evict()
+        return True
+
+    def clear(self) -> None:
+        for directory in (self._manifests, self._entries):
+            if directory.exists():
+                for path in directory.iterdir():
+                    path.unlink(missing_ok=True)
+
+    def _secure(self) -> None:
+        for directory in (self.directory, self._manifests, self._entries):
+            _secure_directory(directory)
+
+    def _manifest_path(self, cfg_path: Path) -> Path:
+        hash_ = new_hash()
+        update_with_value(hash_, str(cfg_path))
+        return self._manifests / f"{hash_.hexdigest()}.json"
+
+    def _read_manifest(self, cfg_path: Path) -> dict[str, list[str]] | None:
+        try:
+            manifest = json.loads(self._manifest_path(cfg_path).read_bytes())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(manifest, dict) or set(manifest) != {"files", "env_prefixes"}:
+            return None
+        return manifest
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self._entries.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def _build_manifest(cfg: CN, module: ModuleType) -> dict[str, list[str]] | None:
+    """Files and environment variables config depends on, None if it can't be cached"""
+    files = set(loaded_module_files(module))
+    files.update(path for path, _ in cfg_source_files(module))
+    env_prefixes = set()
+    module_names = set()
+    if cfg._static_module:  # noqa: SLF001 Our class
+        module_names.add(cfg._static_module[0].split(" ")[1])  # noqa: SLF001 Our class
+    nodes = [cfg]
+    while nodes:
+        node = nodes.pop()
+        for transform in node._transforms:  # noqa: SLF001 Our class
+            if not getattr(transform, "cacheable", True):
+                return None
+            module_names.add(getattr(transform, "__module__", None))
+            if hasattr(transform, "cache_files"):
+                files.update(str(Path(path).absolute()) for path in transform.cache_files())
+                env_prefixes.update(transform.cache_env_prefixes())
+        nodes.extend(attr for _, attr in node.attrs if hasattr(attr, "_transforms"))
+    for name in module_names:
+        module_file = getattr(sys.modules.get(name), "__file__", None)
+        if module_file is not None:
+            files.add(str(Path(module_file).absolute()))
+    return {"files": sorted(files), "env_prefixes": sorted(env_prefixes)}
+
+
+def _entry_key(cfg_path: Path, manifest: dict[str, list[str]]) -> str:
+    from . import __version__
+
+    hash_ = new_hash()
+    state: list[Any] = [__version__, sys.version, str(cfg_path)]
+    state.extend((path, file_digest(path)) for path in manifest["files"])
+    state.extend(
+        sorted((key, value) for key, value in os.environ.items() if key.startswith(prefix))
+        for prefix in manifest["env_prefixes"]
+    )
+    update_with_value(hash_, state)
+    return hash_.hexdigest()
+
+
+def _secure_directory(directory: Path) -> None:
+    """Create directory which is only accessible by the current user, existing one must be owned by them"""
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not hasattr(os, "getuid"):  # Windows
+        return
+    status = directory.stat()
+    if status.st_uid != os.getuid():
+        raise PermissionError(f"Cache directory {directory} is owned by another user")
+    if stat.S_IMODE(status.st_mode) & 0o077:
+        directory.chmod(0o700)
+
+
+def _check_private(fobj: IO[bytes], path: Path) -> None:
+    """Raise PermissionError if open file could have been written by another user"""
+    if not hasattr(os, "getuid"):  # Windows
+        return
+    status = os.fstat(fobj.fileno())
+    if status.st_uid != os.getuid() or stat.S_IMODE(status.st_mode) & 0o077:
+        raise PermissionError(f"Cache entry {path} can be accessed by other users")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Readers either see previous content or new content, never a partially written file"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        Path(tmp_path).replace(path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
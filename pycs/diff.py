@@ -0,0 +1,91 @@
+"""Differences between configs, see CfgNode.diff() and CfgNode.patch()"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .leaf import CfgLeaf
+from .node import CfgNode, _plain_value, _same_content
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+class ConfigDiff(NamedTuple):
+    """
+    Differences between two configs, keys are dotted paths relative to the root
+
+    :param changed: Old and new values of leaves which are present in both configs
+    :param added: Leaf values or nodes which are only present in the new config
+    :param removed: Leaf values or node dicts which are only present in the old config
+    """
+
+    changed: dict[str, tuple[Any, Any]]
+    added: dict[str, Any]
+    removed: dict[str, Any]
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.added or self.removed)
+
+
+def diff_nodes(old: CfgNode, new: CfgNode) -> ConfigDiff:
+    result = ConfigDiff({}, {}, {})
+    stack = [("", old, new)]
+    while stack:
+        prefix, old_node, new_node = stack.pop()
+        if _same_content(old_node, new_node):
+            continue
+        old_data, new_data = old_node.data, new_node.data
+        nested = []
+        for key, old_attr in old_data.items():
+            path = prefix + key
+            new_attr = new_data.get(key)
+            if new_attr is None:
+                result.removed[path] = _plain_value(old_attr)
+            elif isinstance(old_attr, CfgLeaf) and isinstance(new_attr, CfgLeaf):
+                if old_attr.value != new_attr.value:
+                    result.changed[path] = (old_attr.value, new_attr.value)
+            elif isinstance(old_attr, CfgNode) and isinstance(new_attr, CfgNode):
+                nested.append((f"{path}.", old_attr, new_attr))
+            else:  # Leaf was replaced with a node or the other way around
+                result.removed[path] = _plain_value(old_attr)
+                result.added[path] = _added_value(new_attr)
+        for key, new_attr in new_data.items():
+            if key not in old_data:
+                result.added[prefix + key] = _added_value(new_attr)
+        stack.extend(reversed(nested))  # Keep order of keys in the result
+    return result
+
+
+def patch_node(cfg: CfgNode, diff: ConfigDiff, *, propagate: bool) -> None:
+    with cfg.batch(propagate=propagate):
+        for path in diff.removed:
+            node, key = _parent_and_key(cfg, path)
+            del node[key]
+        for path, value in diff.added.items():
+            node, key = _parent_and_key(cfg, path)
+            node[key] = value.clone() if isinstance(value, CfgNode) else value
+        for path, (_, value) in diff.changed.items():
+            node, key = _parent_and_key(cfg, path)
+            node[key] = value
+
+
+def _added_value(attr: CfgNode | CfgLeaf) -> Any:
+    # Nodes are kept, so patch() can add them with their schema
+    return attr.clone() if isinstance(attr, CfgNode) else attr.value
+
+
+def _parent_and_key(cfg: CfgNode, path: str) -> tuple[CfgNode, str]:
+    *node_keys, key = path.split(".")
+    return _node_at(cfg, node_keys), key
+
+
+def _node_at(cfg: CfgNode, keys: Iterable[str]) -> CfgNode:
+    # Don't use path index, as it would create all children of copy-on-write clones
+    node = cfg
+    for key in keys:
+        child = node.data.get(key)
+        if not isinstance(child, CfgNode):
+            raise KeyError(f"{key!r} is not a config node in {node.full_key}")
+        node = child
+    return node
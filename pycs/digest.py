@@ -0,0 +1,127 @@
+"""Canonical encoding of config values, used to compute digests which are stable between processes"""
+
+from __future__ import annotations
+
+import enum
+import hashlib
+import math
+import struct
+from functools import partial
+from pathlib import PurePath
+from types import MethodType
+from typing import Any, Callable
+
+from .interfaces import CfgSavable
+from .utils import full_type_name
+
+DIGEST_SIZE = 16
+
+
+def new_hash() -> hashlib.blake2b:
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def update_with_value(hash_: hashlib.blake2b, value: Any) -> None:
+    """
+    Add canonical encoding of value to hash, every encoding starts with a tag and is prefix-free
+
+    >>> def digest(value):
+    ...     hash_ = new_hash()
+    ...     update_with_value(hash_, value)
+    ...     return hash_.hexdigest()
+    >>> digest({"b": 1, "a": [1.0, None]}) == digest({"a": [1.0, None], "b": 1})
+    True
+    >>> digest(1) == digest(1.0)
+    False
+    """
+    if value is None:
+        hash_.update(b"n")
+    elif isinstance(value, bool):
+        hash_.update(b"T" if value else b"F")
+    elif isinstance(value, enum.Enum):
+        hash_.update(b"e")
+        _update_with_str(hash_, _qualified_name(type(value)))
+        _update_with_str(hash_, value.name)
+    elif type(value) is int:
+        _update_with_str(hash_, str(value), tag=b"i")
+    elif type(value) is float:
+        _update_with_str(hash_, "nan" if math.isnan(value) else repr(value), tag=b"f")
+    elif type(value) is str:
+        _update_with_str(hash_, value)
+    elif type(value) is bytes:
+        hash_.update(b"b" + struct.pack("<Q", len(value)) + value)
+    elif isinstance(value, (int, float, str, bytes)):
+        # Subclasses of builtin scalars are identified by their type, builtin value and attributes
+        hash_.update(b"x")
+        _update_with_str(hash_, _qualified_name(type(value)))
+        update_with_value(hash_, _base_value(value))
+        update_with_value(hash_, getattr(value, "__dict__", None))
+    elif isinstance(value, PurePath):
+        _update_with_str(hash_, str(value), tag=b"p")
+    elif isinstance(value, type):
+        _update_with_str(hash_, _qualified_name(value), tag=b"t")
+    elif isinstance(value, partial):
+        hash_.update(b"P")
+        update_with_value(hash_, value.func)
+        update_with_value(hash_, value.args)
+        update_with_value(hash_, value.keywords)
+    elif isinstance(value, (list, tuple)):
+        hash_.update((b"l" if isinstance(value, list) else b"u") + struct.pack("<Q", len(value)))
+        for item in value:
+            update_with_value(hash_, item)
+    elif isinstance(value, (set, frozenset)):
+        _update_with_items(hash_, b"S", [_value_digest(item) for item in value])
+    elif isinstance(value, dict):
+        _update_with_items(hash_, b"d", [_value_digest(key) + _value_digest(item) for key, item in value.items()])
+    elif isinstance(value, MethodType):
+        hash_.update(b"m")
+        update_with_value(hash_, value.__func__)
+        update_with_value(hash_, value.__self__)
+    elif callable(value) and hasattr(value, "__qualname__") and hasattr(value, "__module__"):
+        _update_with_str(hash_, _qualified_name(value), tag=b"c")
+    elif isinstance(value, CfgSavable):
+        hash_.update(b"s")
+        update_with_value(hash_, value.save_strs())
+    elif hasattr(value, "__dict__"):
+        # Plain objects are identified by their type and attributes
+        hash_.update(b"o")
+        _update_with_str(hash_, _qualified_name(type(value)))
+        update_with_value(hash_, vars(value))
+    else:
+        raise TypeError(f"Can't compute stable digest for {value!r} of type {full_type_name(type(value))}")
+
+
+def _qualified_name(value: Callable | type) -> str:
+    """Name which identifies a single function or class, lambdas and local definitions can share their names"""
+    if "<" in value.__qualname__:
+        raise TypeError(f"Can't compute stable digest for {value!r}, it can't be found by its name")
+    return f"{value.__module__}.{value.__qualname__}"
+
+
+def _base_value(value: int | float | str | bytes) -> int | float | str | bytes:
+    """Value as an instance of the builtin type, without calling methods overridden by its subclass"""
+    if isinstance(value, int):
+        return int.__int__(value)
+    if isinstance(value, float):
+        return float.__float__(value)
+    if isinstance(value, str):
+        return str.__str__(value)
+    return bytes(memoryview(value))
+
+
+def _update_with_str(hash_: hashlib.blake2b, value: str, tag=b"s") -> None:
+    data = value.encode("utf-8")
+    hash_.update(tag + struct.pack("<Q", len(data)) + data)
+
+
+def _update_with_items(hash_: hashlib.blake2b, tag: bytes, items: list[bytes]) -> None:
+    # Unordered collections are encoded in order of digests of their items
+    hash_.update(tag + struct.pack("<Q", len(items)))
+    for item in sorted(items):
+        hash_.update(item)
+
+
+def _value_digest(value: Any) -> bytes:
+    hash_ = new_hash()
+    update_with_value(hash_, value)
+    return hash_.digest()
@@ -0,0 +1,125 @@
+"""Write configs as YAML or JSON directly from the tree, see CfgNode.dump()"""
+
+from __future__ import annotations
+
+import json
+from typing import IO, TYPE_CHECKING, Any, Iterator
+
+import yaml
+
+from .leaf import CfgLeaf
+from .node import _cow_origin
+
+if TYPE_CHECKING:
+    from .node import CfgNode
+
+DUMP_FORMATS = ("yaml", "json")
+# Kinds of tokens produced while walking the config
+_START, _END, _VALUE = range(3)
+_JSON_INDENT = "  "
+
+
+class ConfigDumper(yaml.Dumper):
+    """Represents values of unknown types as strings, without changing representers of yaml.Dumper"""
+
+
+def _represent_as_str(dumper: yaml.Dumper, data: Any) -> yaml.ScalarNode:
+    return dumper.represent_scalar("tag:yaml.org,2002:str", str(data))
+
+
+ConfigDumper.add_multi_representer(object, _represent_as_str)
+
+
+def dump(cfg: CfgNode, fobj: IO[str], fmt: str, *, sort_keys: bool) -> None:
+    if fmt not in DUMP_FORMATS:
+        raise ValueError(f"Unknown dump format {fmt!r}, must be one of {DUMP_FORMATS}")
+    tokens = _tokens(cfg, sort_keys=sort_keys)
+    if fmt == "yaml":
+        _write_yaml(fobj, tokens)
+    else:
+        _write_json(fobj, tokens)
+
+
+def _tokens(cfg: CfgNode, *, sort_keys: bool) -> Iterator[tuple[int, str | None, Any]]:
+    """Start and end of each node and values of leaves, yielded as kind of token, key and value"""
+    yield _START, None, None
+    stack = [_children(cfg, sort_keys=sort_keys)]
+    while stack:
+        for key, attr in stack[-1]:
+            if isinstance(attr, CfgLeaf):
+                yield _VALUE, key, attr.value
+            else:
+                yield _START, key, None
+                stack.append(_children(attr, sort_keys=sort_keys))
+                break
+        else:
+            stack.pop()
+            yield _END, None, None
+
+
+def _children(node: CfgNode, *, sort_keys: bool) -> Iterator[tuple[str, CfgNode | CfgLeaf]]:
+    # Only reading, so children of copy-on-write clones are not created
+    items = _cow_origin(node).data.items()
+    return iter(sorted(items) if sort_keys else items)
+
+
+def _write_yaml(fobj: IO[str], tokens: Iterator[tuple[int, str | None, Any]]) -> None:
+    dumper = ConfigDumper(fobj, default_flow_style=False)
+    try:
+        dumper.emit(yaml.StreamStartEvent())
+        dumper.emit(yaml.DocumentStartEvent(explicit=False))
+        for kind, key, value in tokens:
+            if kind == _END:
+                dumper.emit(yaml.MappingEndEvent())
+                continue
+            if key is not None:
+                _emit_data(dumper, key)
+            if kind == _START:
+                dumper.emit(yaml.MappingStartEvent(None, None, True, flow_style=False))  # noqa: FBT003 PyYAML API
+            else:
+                _emit_data(dumper, value)
+        dumper.emit(yaml.DocumentEndEvent(explicit=False))
+        dumper.emit(yaml.StreamEndEvent())
+    finally:
+        dumper.dispose()
+
+
+def _emit_data(dumper: ConfigDumper, data: Any) -> None:
+    """Same as Dumper.represent(), but emits value inside of the current document instead of a new one"""
+    node = dumper.represent_data(data)
+    dumper.anchor_node(node)
+    dumper.serialize_node(node, None, None)
+    # Anchors are only shared within a single value
+    dumper.represented_objects = {}
+    dumper.object_keeper = []
+    dumper.alias_key = None
+    dumper.serialized_nodes = {}
+    dumper.anchors = {}
+
+
+def _write_json(fobj: IO[str], tokens: Iterator[tuple[int, str | None, Any]]) -> None:
+    """Same layout as json.dump() with indent=2, values of unknown types are written as strings"""
+    # Encoder with indent is implemented in Python, so only use it for values which span multiple lines
+    encode_nested = json.JSONEncoder(indent=len(_JSON_INDENT), default=str).encode
+    encode = json.JSONEncoder(default=str).encode
+    depth = 0
+    first = True  # Whether current node has no written children yet
+    for kind, key, value in tokens:
+        if kind == _END:
+            depth -= 1
+            fobj.write("}" if first else f"\n{_JSON_INDENT * depth}}}")
+            first = False
+            continue
+        if key is not None:
+            fobj.write(f"{'' if first else ','}\n{_JSON_INDENT * depth}{encode(key)}: ")
+        if kind == _START:
+            fobj.write("{")
+            depth += 1
+            first = True
+        else:
+            if isinstance(value, (dict, list, tuple)) and value:
+                fobj.write(encode_nested(value).replace("\n", "\n" + _JSON_INDENT * depth))
+            else:
+                fobj.write(encode(value))
+            first = False
+    fobj.write("\n")
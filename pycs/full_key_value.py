@@ -5,14 +5,21 @@ class FullKeyValue:
     def __init__(self):
         self._parent: FullKeyParent = None
         self._key: str = None
+        self._full_key: str | None = None
 
     @property
     def full_key(self):
-        key = ""
-        if self.parent is not None and self.parent.full_key:
-            key += self.parent.full_key + "."
-        key += self.key or self._default_key
-        return key
+        if self._full_key is None:
+            key = ""
+            if self.parent is not None and self.parent.full_key:
+                key += self.parent.full_key + "."
+            key += self.key or self._default_key
+            self._full_key = key
+        return self._full_key
+
+    def _reset_full_key(self) -> None:
+        """Called when key or parent is changed, as cached full key is no longer valid"""
+        self._full_key = None
 
     @property
     def _default_key(self) -> str:
@@ -28,6 +35,7 @@ class FullKeyValue:
         if self._parent:
             raise AttributeError(f"Parent for {self} at {self.full_key} has already been set to {self._parent}")
         self._parent = value
+        self._reset_full_key()
 
     @property
     def key(self) -> str:
@@ -38,6 +46,7 @@ class FullKeyValue:
         if self._key:
             raise AttributeError(f"Key for {self} at {self.full_key} has already been set to {self._parent}")
         self._key = value
+        self._reset_full_key()
 
     def _child_full_key(self, child_key: str) -> str:
         return f"{self.full_key}.{child_key}"
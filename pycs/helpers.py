@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import argparse
 import sys
 from pathlib import Path
 
@@ -15,6 +14,8 @@ def get_output_dir(cfg: CN, *, mkdir=True, base_dir=Path("output")) -> Path:
 
 
 def _get_output_dir_cli() -> None:
+    import argparse
+
     parser = argparse.ArgumentParser("Get output dir for cfg", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument("cfg_path", type=Path)
     parser.add_argument("--mkdir", action="store_true", help="Will create the directory if it doesn't exist")
@@ -12,6 +12,9 @@ from .utils import full_type_name
 if TYPE_CHECKING:
     from .node import CfgNode
 
+# Values of these types are shared between clones, instead of copying
+_IMMUTABLE_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes))
+
 
 class CfgLeaf(FullKeyValue):
     def __init__(self, first: Any = None, second: Any = None, *, required=False, subclass=False, desc: str = None):
@@ -69,26 +72,36 @@ class CfgLeaf(FullKeyValue):
 
     @value.setter
     def value(self, new_value) -> None:
+        self.check_value(new_value)
+        self._set_value(new_value)
+
+    def check_value(self, new_value: Any) -> None:
+        """Raise error if value can't be assigned to this leaf"""
         if new_value is None:
             if self._required:
                 raise MissingRequiredError(f"Can't set required value to None for {self}")
         else:
             check_val = new_value.func if isinstance(new_value, partial) else new_value
-            expected_type = full_type_name(self._type)
             if self._subclass and (not isinstance(check_val, type) or not issubclass(check_val, self._type)):
                 raise TypeMismatchError(
-                    f"Subclass of type <{expected_type}> expected,"
+                    f"Subclass of type <{full_type_name(self._type)}> expected,"
                     f" but found {check_val!r} of type {type(check_val)} for {self}!",
                 )
             if not self._subclass and not isinstance(check_val, self._type):
                 raise TypeMismatchError(
-                    f"Instance of type <{expected_type}> expected,"
+                    f"Instance of type <{full_type_name(self._type)}> expected,"
                     f" but found {check_val!r} of type {type(check_val)} for {self}!",
                 )
+
+    def _set_value(self, new_value: Any) -> None:
+        """Set value which has already been checked"""
+        if self._parent is not None:
+            self._parent._before_change()  # noqa SLF001 Our class
+        old_value = self._value
         self._value = new_value
 
-        if self._parent:
-            self._parent._update_module(self.key, new_value)  # noqa SLF001 Our class
+        if self._parent is not None:
+            self._parent._leaf_updated(self.key, new_value, old_value)  # noqa SLF001 Our class
 
     @property
     def desc(self):
@@ -99,13 +112,13 @@ class CfgLeaf(FullKeyValue):
         self._desc = value
 
     def clone(self) -> CfgLeaf:
-        return CfgLeaf(
-            deepcopy(self._value),
-            self._type,
-            required=self._required,
-            subclass=self._subclass,
-            desc=self._desc,
-        )
+        # Value has already been checked, so skip __init__()
+        leaf = CfgLeaf.__new__(CfgLeaf)
+        leaf.__dict__.update(self.__dict__)
+        leaf._parent = leaf._key = leaf._full_key = None  # noqa: SLF001 Same class
+        value = self._value
+        leaf._value = value if type(value) in _IMMUTABLE_TYPES else deepcopy(value)  # noqa: SLF001 Same class
+        return leaf
 
     def check(self, leaf_spec: CfgLeaf) -> None:
         if leaf_spec.required and not self.required:
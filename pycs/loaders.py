@@ -0,0 +1,105 @@
+"""Parsers of data files with config changes, chosen by file suffix, see CfgNode.load_from_data_file()"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Mapping
+
+from .utils import import_module
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+DataLoader = Callable[["Path"], Mapping[str, Any]]
+
+_LOADERS: dict[str, DataLoader] = {}
+
+
+def register_loader(suffix: str, loader: DataLoader, *, replace: bool = False) -> None:
+    """
+    Use loader for data files with given suffix, e.g. ".ini"
+
+    :param loader: Function which takes path of the file and returns nested mapping of changes
+    :param replace: Allow replacing loader which is already registered for the suffix
+    """
+    if not suffix.startswith("."):
+        raise ValueError(f"Suffix should start with a dot, got {suffix!r}")
+    if suffix in _LOADERS and not replace:
+        raise ValueError(f"Loader for suffix {suffix!r} is already registered, use replace=True to replace it")
+    _LOADERS[suffix] = loader
+
+
+def get_loader(suffix: str, default: DataLoader | None = None) -> DataLoader:
+    """:param default: Loader used for unknown suffixes, by default they raise ValueError"""
+    if suffix in _LOADERS:
+        return _LOADERS[suffix]
+    if default is not None:
+        return default
+    raise ValueError(f"Can't load changes from filetype with suffix '{suffix}'")
+
+
+def has_loader(suffix: str) -> bool:
+    return suffix in _LOADERS
+
+
+def load_data_file(path: Path) -> Mapping[str, Any]:
+    return get_loader(path.suffix)(path)
+
+
+def load_python(path: Path) -> Mapping[str, Any]:
+    return import_module(path).cfg
+
+
+def load_json(path: Path) -> Mapping[str, Any]:
+    import json
+
+    # Parsing bytes skips decoding into an intermediate string object per read chunk
+    return json.loads(path.read_bytes())
+
+
+def load_yaml(path: Path) -> Mapping[str, Any]:
+    import yaml
+
+    with path.open("rb") as fobj:
+        return yaml.load(fobj, Loader=yaml_loader())  # noqa: S506 Loader is always safe
+
+
+def yaml_loader() -> type:
+    """libyaml parser is an order of magnitude faster than the pure Python one, but is an optional part of PyYAML"""
+    import yaml
+
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_toml(path: Path) -> Mapping[str, Any]:
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        try:
+            import tomli as tomllib
+        except ImportError as exc:
+            raise ImportError("Loading TOML on Python < 3.11 requires tomli: pip install pycs[toml]") from exc
+
+    with path.open("rb") as fobj:
+        return tomllib.load(fobj)
+
+
+def load_msgpack(path: Path) -> Mapping[str, Any]:
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise ImportError("Loading msgpack requires msgpack: pip install pycs[msgpack]") from exc
+
+    return msgpack.unpackb(path.read_bytes(), raw=False)
+
+
+for _suffix, _loader in (
+    (".py", load_python),
+    (".json", load_json),
+    (".yaml", load_yaml),
+    (".yml", load_yaml),
+    (".toml", load_toml),
+    (".msgpack", load_msgpack),
+    (".mpk", load_msgpack),
+):
+    register_loader(_suffix, _loader)
@@ -1,18 +1,31 @@
 from __future__ import annotations
 
-import inspect
-import json
-import logging
+import importlib
+import linecache
+import os
 import re
+import sys
 import warnings
+import weakref
 from collections import UserDict
 from copy import copy
+from functools import partial
 from itertools import chain
 from pathlib import Path, PosixPath
-from types import ModuleType
-from typing import Any, Callable, Iterable, Mapping, MutableMapping, cast
-
-import yaml
+from types import FrameType, ModuleType
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Sequence,
+    cast,
+)
 
 from pycs.errors import (
     ConfigError,
@@ -26,11 +39,73 @@ from pycs.errors import (
 )
 from pycs.full_key_value import FullKeyParent
 from pycs.interfaces import CfgSavable
-from pycs.utils import add_yaml_str_representer, convert_path_to_dotted, import_module, merge_cfg_module
+from pycs.snapshot import Snapshot, snapshot_node
+from pycs.utils import (
+    MergedSource,
+    cfg_source_files,
+    convert_path_to_dotted,
+    file_digest,
+    import_module,
+)
+
+from .leaf import _IMMUTABLE_TYPES, CfgLeaf
+
+if TYPE_CHECKING:
+    from .cache import ResolvedConfigCache
+    from .diff import ConfigDiff
+    from .parallel import LoadResult
+    from .shared import SharedConfig, SharedSnapshot
+
+PROVENANCE_MODES = ("off", "lazy", "full", "delta")
+WALK_ORDERS = ("pre", "post")
+_PROVENANCE_MODE = "full"
+_PYCS_DIR = str(Path(__file__).parent) + os.sep
+# Copy-on-write clones which haven't been accessed yet, so changes don't look for them while there are none
+_COW_PENDING: weakref.WeakValueDictionary[int, CfgNode] = weakref.WeakValueDictionary()
+
+
+def set_provenance(mode: str) -> None:
+    """
+    Set default provenance mode, which controls source comments recorded for changes made after loading:
+
+    - ``off``: only record the change itself
+    - ``lazy``: record filename and line number, source line is read on save
+    - ``full``: read source line at assignment time
+    - ``delta``: don't record changes, save only values which differ from the schema, see CfgNode.save()
+    """
+    global _PROVENANCE_MODE
+    _PROVENANCE_MODE = _check_provenance_mode(mode)
+
 
-from .leaf import CfgLeaf
+def _check_provenance_mode(mode: str) -> str:
+    if mode not in PROVENANCE_MODES:
+        raise ValueError(f"Unknown provenance mode {mode!r}, must be one of {PROVENANCE_MODES}")
+    return mode
 
-LOGGER = logging.getLogger(__name__)
+
+class _SourceRef(NamedTuple):
+    """Reference to the line which made a change, formatted on save"""
+
+    filename: str
+    lineno: int
+
+    def __str__(self) -> str:
+        return _format_source_comment(self.filename, self.lineno)
+
+
+def _format_source_comment(filename: str, lineno: int) -> str:
+    line = linecache.getline(filename, lineno)
+    if not line:
+        return f"# {filename}:{lineno} <Source not found>\n"
+    return f"# {filename}:{lineno} {line}"
+
+
+def _find_source_frame():
+    """Find first frame outside of pycs"""
+    frame = sys._getframe(1)  # noqa: SLF001 Much cheaper than inspect.stack()
+    while frame is not None and frame.f_code.co_filename.startswith(_PYCS_DIR):
+        frame = frame.f_back
+    return frame
 
 
 def _cfg_path_to_name(cfg_path: Path, root_name="configs"):
@@ -71,14 +146,42 @@ class CfgNode(UserDict, FullKeyParent):
         "_static_module",
         "_safe_save",
         "_hash_cache",
+        "_provenance",
+        "_compiled",
     )
-    RESERVED_KEYS = (*_BUILT_IN_ATTRS, "data")
+    # Derived from structure of the config, not copied or pickled
+    _CACHE_ATTRS = ("_full_key", "_path_index", "_digest_cache", "_dump_cache")
+    # Source and operations to apply to children of copy-on-write clone, which are created on first access,
+    # and clones which read through this node, so they can be detached before it is changed
+    _COW_ATTRS = ("_cow_source", "_cow_pending", "_cow_clones")
+    RESERVED_KEYS = (*_BUILT_IN_ATTRS, *_CACHE_ATTRS, *_COW_ATTRS, "_batch", "data")
+    _NOT_CLONED_ATTRS = ("_parent", "_key", "parent", "key", "_schema_frozen", "_frozen")
 
     def __init__(self, first: Any = None, *, schema_frozen=False, new_allowed=False, desc: str = None):
+        self._init(first, schema_frozen=schema_frozen, new_allowed=new_allowed, desc=desc)
+        self._static_module = _get_module_and_var(sys._getframe(1))  # noqa: SLF001 Used for static_init
+
+    @classmethod
+    def _create(cls, first: Any = None, **kwargs) -> CfgNode:
+        """Create node without detecting where it was defined, used when state is provided by the caller"""
+        node = cls.__new__(cls)
+        node._init(first, **kwargs)  # noqa: SLF001 Same class
+        return node
+
+    def _init(self, first: Any = None, *, schema_frozen=False, new_allowed=False, desc: str = None) -> None:
         super().__init__()
         # Have to repeat it here for correct interaction with __getattr__
         self._parent: CfgNode | None = None
         self._key: str | None = None
+        self._full_key: str | None = None
+        self._path_index: dict[str, CfgNode | CfgLeaf] | None = None
+        # False for frozen nodes with values which can be changed in place, so digest can't be cached
+        self._digest_cache: str | bool | None = None
+        self._dump_cache: dict[tuple[str, bool], str] | None = None
+        self._cow_source: CfgNode | None = None
+        self._cow_pending: list[Callable[[CfgNode], None]] = []
+        self._cow_clones: weakref.WeakValueDictionary[int, CfgNode] | None = None
+        self._batch: _Batch | None = None
 
         if isinstance(first, dict):
             base, leaf_spec = first, None
@@ -98,9 +201,11 @@ class CfgNode(UserDict, FullKeyParent):
         self._transforms = []
         self._hooks = []
 
-        self._module: list[str] | None = None
-        self._static_module = self._get_module_and_var()  # Used for static_init
+        self._module: list[str | _SourceRef | MergedSource] | None = None
+        self._static_module: list[str] | None = None
         self._safe_save = True
+        self._provenance: str | None = None
+        self._compiled = False
 
         self._hash_cache = None
 
@@ -126,6 +231,10 @@ class CfgNode(UserDict, FullKeyParent):
     def leaf_spec(self) -> CfgLeaf | None:
         return self._leaf_spec
 
+    @property
+    def compiled(self) -> bool:
+        return self._compiled
+
     @property
     def _default_key(self):
         return "cfg"
@@ -133,6 +242,7 @@ class CfgNode(UserDict, FullKeyParent):
     def __setitem__(self, key: str, value: Any) -> None:
         if self.frozen:
             raise FrozenError(f"Trying to change value of {key} in frozen config")
+        self._before_change()
         if key in self:
             self._set_existing(key, value)
         else:
@@ -143,13 +253,116 @@ class CfgNode(UserDict, FullKeyParent):
             raise KeyError(key)
         return super().__getitem__(key)
 
+    def get_path(self, path: str) -> Any:
+        """Get value by dotted path relative to this node, e.g. cfg.get_path("MODEL.BACKBONE.DEPTH")"""
+        attr = self._get_raw_path(path)
+        if isinstance(attr, CfgLeaf):
+            return attr.value
+        return attr
+
+    def set_path(self, path: str, value: Any) -> None:
+        """Set value by dotted path relative to this node, e.g. cfg.set_path("MODEL.BACKBONE.DEPTH", 50)"""
+        node_path, _, key = path.rpartition(".")
+        node = self._get_raw_path(node_path) if node_path else self
+        if not isinstance(node, CfgNode):
+            raise KeyError(path)
+        node[key] = value
+
+    def accessor(self, path: str) -> Callable[[], Any]:
+        """
+        Create getter for value at dotted path, to avoid repeated lookups in performance critical code
+        Getter is bound to the current leaf at the path, it will not follow reassignment of parent nodes
+        """
+        attr = self._get_raw_path(path)
+        if isinstance(attr, CfgLeaf):
+            return partial(getattr, attr, "value")
+        return lambda: attr
+
+    def _get_raw_path(self, path: str) -> CfgNode | CfgLeaf:
+        # Use index of the whole config, so it can be shared between all nested nodes
+        root = self
+        prefix_keys = []
+        while root.parent is not None:
+            prefix_keys.append(root.key)
+            root = root.parent
+        full_path = ".".join([*reversed(prefix_keys), path]) if prefix_keys else path
+        try:
+            return root._get_path_index()[full_path]  # noqa: SLF001 Same class
+        except KeyError:
+            raise KeyError(path) from None
+
+    def _get_path_index(self) -> dict[str, CfgNode | CfgLeaf]:
+        """Mapping from dotted path to every nested node and leaf, only used on root, rebuilt after changes"""
+        if self._path_index is None:
+            index = {}
+            stack = [("", self)]
+            while stack:
+                prefix, node = stack.pop()
+                # Nested nodes keep reference to the index, so they know it has to be reset on changes
+                object.__setattr__(node, "_path_index", index)
+                for key, attr in node.data.items():
+                    path = prefix + key
+                    index[path] = attr
+                    if isinstance(attr, CfgNode):
+                        stack.append((path + ".", attr))
+        return self._path_index
+
+    def _reset_path_index(self) -> None:
+        """Called on structural changes, index is rebuilt on next lookup"""
+        node = self
+        while node is not None and node._path_index is not None:  # noqa: SLF001 Same class
+            object.__setattr__(node, "_path_index", None)
+            node = node.parent
+
+    def _reset_full_key(self) -> None:
+        # Cached keys of all children depend on this one, if this one is not cached, neither are children
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            if node._full_key is None:  # noqa: SLF001 Same class
+                continue
+            object.__setattr__(node, "_full_key", None)
+            if node._cow_source is not None:  # noqa: SLF001 Same class
+                continue  # Children are not created yet
+            for attr in node.data.values():
+                if isinstance(attr, CfgNode):
+                    nodes.append(attr)
+                else:
+                    attr._reset_full_key()  # noqa: SLF001 Our class
+
     def __getitem__(self, key: str) -> Any:
+        if self._cow_source is not None:
+            attr = _cow_origin(self).data[key]
+            # Only values which can't be changed in place are read without creating children
+            if isinstance(attr, CfgLeaf) and type(attr.value) in _IMMUTABLE_TYPES:
+                return attr.value
         attr = self.get_raw(key)
         if isinstance(attr, CfgLeaf):
             return attr.value
         return attr
 
+    def __contains__(self, key: object) -> bool:
+        return key in self._view()
+
+    def __len__(self) -> int:
+        return len(self._view())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._view())
+
+    def __delitem__(self, key: str) -> None:
+        self._before_change()
+        batch = self._active_batch()
+        if batch is not None:
+            batch.undo.append(partial(self._restore_child, key, self.get_raw(key)))
+        super().__delitem__(key)
+        if self._compiled:
+            self.__dict__.pop(key, None)
+        self._reset_path_index()
+
     def __getattr__(self, key: str) -> Any:
+        if key == "data":  # Copy-on-write clone is accessed for the first time
+            return self._materialize()
         try:
             return self[key]
         except KeyError:
@@ -161,8 +374,31 @@ class CfgNode(UserDict, FullKeyParent):
         else:
             self[key] = value
 
-    def __eq__(self, other: CfgNode) -> bool:
-        return self.to_dict() == other.to_dict()
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CfgNode):
+            return NotImplemented
+        root = _cow_origin(self)
+        # Node of the other config at the same path, by id of the visited node
+        counterparts = {id(root): _cow_origin(other)}
+
+        def enter(node: CfgNode) -> bool:
+            # Different digests can still be equal, e.g. 1 == 1.0, only subtrees with different digests are compared
+            return not _same_content(node, counterparts[id(node)])
+
+        for key, parent, attr in _walk(root, "pre", enter=enter, origins=True):
+            if attr is root:
+                counterpart = counterparts[id(root)]
+            else:
+                other_attr = counterparts[id(parent)].data[key]
+                if not (isinstance(attr, CfgNode) and isinstance(other_attr, CfgNode)):
+                    if _plain_value(attr) != _plain_value(other_attr):
+                        return False
+                    continue
+                counterpart = _cow_origin(other_attr)
+                counterparts[id(attr)] = counterpart
+            if attr.data.keys() != counterpart.data.keys():
+                return False
+        return True
 
     def __hash__(self) -> int:
         if not self.frozen:
@@ -177,10 +413,47 @@ class CfgNode(UserDict, FullKeyParent):
 
         return self._hash_cache
 
+    def digest(self) -> str:
+        """
+        Content hash of keys, types and values, which is the same in every process, e.g. to use as a cache key
+        Digest of parent node is computed from digests of its children, it is cached once config is frozen
+        if values are of immutable types, as other values can still be changed in place
+        """
+        return _digest(self, stable_only=False)
+
     def __str__(self) -> str:
-        add_yaml_str_representer()
-        attrs = self.to_dict()
-        return yaml.dump(attrs)
+        import io
+
+        buffer = io.StringIO()
+        self.dump(buffer)
+        return buffer.getvalue()
+
+    def dump(self, fobj: IO[str], format: str = "yaml", *, sort_keys=True, cache=False) -> None:  # noqa: A002
+        """
+        Write values as YAML or JSON, key by key without creating a dict of the whole config first
+
+        Values of types which can't be represented in the format are written as strings.
+
+        :param format: "yaml" or "json"
+        :param cache: Keep rendered text, so it can be written again without walking the config,
+            only used for frozen configs with values of immutable types, as other values can be changed in place
+        """
+        from .dump import dump
+
+        # Digest is only available for the same configs as cached text, and it is also cached
+        if not (cache and self._frozen and _digest(self, stable_only=True) is not None):
+            dump(self, fobj, format, sort_keys=sort_keys)
+            return
+        if self._dump_cache is None:
+            object.__setattr__(self, "_dump_cache", {})
+        text = self._dump_cache.get((format, sort_keys))
+        if text is None:
+            import io
+
+            buffer = io.StringIO()
+            dump(self, buffer, format, sort_keys=sort_keys)
+            text = self._dump_cache[format, sort_keys] = buffer.getvalue()
+        fobj.write(text)
 
     def propagate_changes(self) -> None:
         self.transform()
@@ -188,11 +461,55 @@ class CfgNode(UserDict, FullKeyParent):
         self.run_hooks()
 
     @staticmethod
-    def load(cfg_path: Path | str) -> CfgNode:
-        cfg_path = Path(cfg_path)
+    def load(cfg_path: Path | str, *, cache: ResolvedConfigCache | None = None) -> CfgNode:
+        """:param cache: Reuse config from previous loads, instead of executing modules and transforms again"""
+        cfg = CfgNode._resolve(Path(cfg_path), cache)
+        cfg.run_hooks()
+        return cfg
+
+    @staticmethod
+    def load_many(
+        cfg_paths: Iterable[Path | str],
+        *,
+        workers: int | None = None,
+        preload: Iterable[str] = (),
+        cache: ResolvedConfigCache | None = None,
+    ) -> Iterator[LoadResult]:
+        """
+        Load configs in a pool of worker processes, results are produced as soon as each config is loaded
+
+        :param workers: Number of worker processes, defaults to number of CPUs, 0 loads configs in this process
+        :param preload: Names of modules, e.g. with schemas, to import in workers before loading any config
+        """
+        from .parallel import load_many, resolve_path
+
+        return load_many(partial(resolve_path, cache=cache), cfg_paths, workers=workers, preload=preload)
+
+    def load_many_data_files(
+        self,
+        data_files: Iterable[Path | str],
+        *,
+        workers: int | None = None,
+        preload: Iterable[str] = (),
+    ) -> Iterator[LoadResult]:
+        """Same as load_many(), but with load_from_data_file(), schema is sent to each worker once"""
+        from .parallel import load_many, resolve_data_file
+
+        return load_many(resolve_data_file, data_files, workers=workers, preload=preload, schema=self)
+
+    @staticmethod
+    def _resolve(cfg_path: Path, cache: ResolvedConfigCache | None) -> CfgNode:
+        """Load config without running hooks"""
+        if cache is not None:
+            cached = cache.get(cfg_path)
+            if cached is not None:
+                cached.validate()
+                return cached
         module = import_module(cfg_path)
-        cfg: CfgNode = module.cfg
-        cfg._module = merge_cfg_module(module)  # noqa: SLF001 Same class
+        # Module can be reused by next load, so keep its config unchanged
+        cfg: CfgNode = module.cfg.clone(cow=True)
+        # Merged source is only generated on save
+        cfg._module = [MergedSource(module.__name__, cfg_source_files(module))]  # noqa: SLF001 Same class
 
         if not cfg.schema_frozen:
             raise SchemaError(
@@ -201,68 +518,181 @@ class CfgNode(UserDict, FullKeyParent):
         if hasattr(cfg, "NAME"):
             cfg.NAME = cfg.NAME or _cfg_path_to_name(cfg_path, cfg._root_name)  # noqa: SLF001 Same class
 
-        cfg.propagate_changes()
+        cfg.transform()
+        cfg.validate()
+        if cache is not None:
+            cache.put(cfg_path, cfg, module)
         return cfg
 
     def load_from_data_file(self, data_file: Path | str) -> CfgNode:
-        data_file = Path(data_file)
-        suffix = data_file.suffix
-        with data_file.open() as f:
-            if suffix == ".py":
-                module = import_module(data_file)
-                updates: MutableMapping = module.cfg
-            elif suffix == ".json":
-                updates = json.load(f)
-            elif suffix == ".yaml":
-                updates = yaml.safe_load(f)
-            else:
-                raise ValueError(f"Can't load changes from filetype with suffix '{suffix}'")
+        """
+        Format is chosen by suffix: .py, .json, .yaml/.yml, .toml and .msgpack/.mpk (requires msgpack),
+        loaders for other suffixes can be added with pycs.loaders.register_loader()
+        """
+        cfg = self._resolve_data_file(Path(data_file))
+        cfg.run_hooks()
+        return cfg
+
+    def _resolve_data_file(self, data_file: Path) -> CfgNode:
+        """Load config from data file without running hooks"""
+        from .loaders import load_data_file
+
+        updates = load_data_file(data_file)
         cfg = self.init_cfg()
-        cfg._module = self._static_module  # noqa: SLF001, same class
+        cfg._module = copy(self._static_module)  # noqa: SLF001, same class
         cfg.update(updates)
 
         if hasattr(cfg, "NAME"):
             cfg.NAME = cfg.NAME or _cfg_path_to_name(data_file, cfg._root_name)  # noqa: SLF001 Same class
 
-        cfg.propagate_changes()
+        cfg.transform()
+        cfg.validate()
         return cfg
 
     @staticmethod
     def validate_required(cfg: CfgNode) -> None:
         if cfg.leaf_spec is not None and cfg.leaf_spec.required and len(cfg) == 0:
             raise MissingRequiredError(f"Missing required members for {cfg.leaf_spec} at key {cfg.full_key}")
-        for _, attr in cfg.attrs:
+        for attr in cfg.data.values():
             if isinstance(attr, CfgLeaf) and attr.required and attr.value is None:
                 raise MissingRequiredError(f"Key {attr} is required, but was not provided.")
 
-    def save(self, path: Path | str) -> None:
+    def save(self, path: Path | str, *, delta: bool | None = None) -> None:
+        """
+        :param delta: Instead of config source and all changes made after loading,
+            save one line for each value which differs from the schema, by default only for "delta" provenance
+        """
         path = Path(path)
+        if delta is None:
+            delta = self.provenance == "delta"
+        if delta:
+            lines = self._delta_lines()
+            with path.open("w") as f:
+                f.writelines(lines)
+            return
         if not self._safe_save:
             raise SaveError("Config was updated in such a way that it can no longer be saved!")
         if not self._module:
             raise SaveError("Config was not loaded.")
         with path.open("w") as f:
-            f.writelines(self._module)
-
-    def clone(self) -> CfgNode:
-        cfg = CfgNode()
-        attrs_to_ignore = {"_parent", "_key", "parent", "key", "_schema_frozen", "_frozen"}
+            f.writelines(str(line) for line in self._module)
 
-        for name in [attr for attr in self._BUILT_IN_ATTRS if attr not in attrs_to_ignore]:
-            setattr(cfg, name, copy(getattr(self, name)))
-
-        for key, value in self.attrs:
-            if isinstance(value, (CfgNode, CfgLeaf)):
-                value = value.clone()
-            setattr(cfg, key, value)
+    def clone(self, *, cow=False) -> CfgNode:
+        """
+        :param cow: Create copy-on-write clone, which shares nested nodes and values with this config,
+            private copies are only created for nodes which are changed or accessed for more than reading values
+            of immutable types, shared nodes are copied before this config is changed,
+            but values of mutable types must not be changed in place while the clone is in use
+        """
+        if cow:
+            return self._cow_clone()
+        names = [name for name in self._BUILT_IN_ATTRS if name not in self._NOT_CLONED_ATTRS]
+        clones: dict[int, CfgNode] = {}
+        nodes: list[tuple[CfgNode, CfgNode]] = []
+        for key, parent, attr in _walk(self, "pre"):
+            if isinstance(attr, CfgNode):
+                value: CfgNode | CfgLeaf = CfgNode._create()
+                for name in names:
+                    setattr(value, name, copy(getattr(attr, name)))
+                clones[id(attr)] = value
+                nodes.append((attr, value))
+            else:
+                value = attr.clone()
+            if attr is not self:
+                # Empty node is added before its children, so it is checked for circular path only once
+                setattr(clones[id(parent)], key, value)
+        # Freezing is recursive, so only freeze topmost nodes, nodes are in pre-order
+        for source, cfg in nodes:
+            if source.schema_frozen and not cfg.schema_frozen:
+                cfg.freeze_schema()
+            if source.frozen and not cfg.frozen:
+                cfg.freeze()
+        return nodes[0][1]
+
+    def _cow_clone(self) -> CfgNode:
+        cfg = CfgNode.__new__(CfgNode)
+        for name in (*self._CACHE_ATTRS, "_cow_clones", "_parent", "_key", "_batch"):
+            object.__setattr__(cfg, name, None)
+        for name in self._BUILT_IN_ATTRS:
+            if name not in self._NOT_CLONED_ATTRS:
+                object.__setattr__(cfg, name, copy(getattr(self, name)))
+        object.__setattr__(cfg, "_schema_frozen", False)
+        object.__setattr__(cfg, "_frozen", False)
+        object.__setattr__(cfg, "_cow_source", self)
+        object.__setattr__(cfg, "_cow_pending", [])
+        if self._cow_clones is None:
+            self._cow_clones = weakref.WeakValueDictionary()
+        self._cow_clones[id(cfg)] = cfg
+        _COW_PENDING[id(cfg)] = cfg
         if self.schema_frozen:
             cfg.freeze_schema()
         if self.frozen:
             cfg.freeze()
         return cfg
 
-    def inherit(self) -> CfgNode:
-        cfg = self.clone()
+    def _materialize(self) -> dict[str, CfgNode | CfgLeaf]:
+        """Create children of copy-on-write clone, nested nodes are created as copy-on-write clones themselves"""
+        source = self._cow_source
+        if source is None:
+            raise AttributeError("data")
+        data: dict[str, CfgNode | CfgLeaf] = {}
+        object.__setattr__(self, "data", data)
+        object.__setattr__(self, "_cow_source", None)
+        if source._cow_clones is not None:  # noqa: SLF001 Same class
+            source._cow_clones.pop(id(self), None)  # noqa: SLF001 Same class
+        _COW_PENDING.pop(id(self), None)
+        for key, attr in source.data.items():
+            child: CfgNode | CfgLeaf
+            if isinstance(attr, CfgLeaf):
+                child = attr.clone()
+                # New leaf doesn't have key or parent yet, so skip checks in the setters
+                child._key = key  # noqa: SLF001 Our class
+                child._parent = self  # noqa: SLF001 Our class
+            else:
+                child = attr._cow_clone()  # noqa: SLF001 Same class
+                for operation in self._cow_pending:
+                    operation(child)
+                self._set_key_for_child(child, key)
+            data[key] = child
+            if self._compiled:
+                self._mirror(key, child)
+        object.__setattr__(self, "_cow_pending", [])
+        return data
+
+    def _view(self) -> dict[str, CfgNode | CfgLeaf]:
+        """Children for reading, children of copy-on-write clone are not created"""
+        return self.data if self._cow_source is None else _cow_origin(self).data
+
+    def _before_change(self) -> None:
+        """Called before this node or its children are changed, copy-on-write clones reading through it are detached"""
+        if not _COW_PENDING:
+            return
+        path = [self]
+        while path[-1]._parent is not None:  # noqa: SLF001 Same class
+            path.append(path[-1]._parent)  # noqa: SLF001 Same class
+        # Clones of nested nodes are created while detaching clones of their parents, so start from the root
+        for node in reversed(path):
+            node._detach_clones()  # noqa: SLF001 Same class
+
+    def _detach_clones(self) -> None:
+        """Create children of copy-on-write clones of this node, so they no longer read through it"""
+        clones = self._cow_clones
+        if not clones:
+            return
+        self._cow_clones = None
+        for clone in list(clones.values()):
+            if clone._cow_source is self:  # noqa: SLF001 Same class
+                clone._materialize()  # noqa: SLF001 Same class
+
+    def _defer(self, operation: Callable[[CfgNode], None]) -> bool:
+        """Record recursive operation for children of copy-on-write clone, to be applied when they are created"""
+        if self._cow_source is None:
+            return False
+        self._cow_pending.append(operation)
+        return True
+
+    def inherit(self, *, cow=False) -> CfgNode:
+        cfg = self.clone(cow=cow)
         cfg.unfreeze_schema()
         return cfg
 
@@ -276,24 +706,22 @@ class CfgNode(UserDict, FullKeyParent):
                 "Transforming without freezing schema is discouraged, as it frequently leads to bugs",
                 stacklevel=2,
             )
-        for _, attr in self.attrs:
-            if isinstance(attr, CfgNode):
-                attr.transform()
-        for transformer in self._transforms:
-            transformer(self)
+        for _, _, node in _walk(self, "post", leaves=False, enter=_propagation_filter()):
+            for transformer in node._transforms:  # noqa: SLF001 Same class
+                transformer(node)
 
     def validate(self) -> None:
         """
         Check additional rules for config, run during loading after transform
         Will be applied recursively on all nested nodes first
         """
-        for _, attr in self.attrs:
-            if isinstance(attr, CfgNode):
-                attr.validate()
-        validators = [CfgNode.validate_required] + self._validators
         try:
-            for validator in validators:
-                validator(self)
+            for _, _, node in _walk(self, "post", leaves=False, enter=_propagation_filter()):
+                if not _materialized(node):
+                    continue
+                CfgNode.validate_required(node)
+                for validator in node._validators:  # noqa: SLF001 Same class
+                    validator(node)
         except AssertionError as exc:
             raise ValidationError from exc
 
@@ -303,62 +731,126 @@ class CfgNode(UserDict, FullKeyParent):
         Hooks should NOT modify the config
         Will be applied recursively on all nested nodes first
         """
-        for _, attr in self.attrs:
-            if isinstance(attr, CfgNode):
-                attr.run_hooks()
-        for hook in self._hooks:
-            hook(self)
+        for _, _, node in _walk(self, "post", leaves=False, enter=_propagation_filter()):
+            for hook in node._hooks:  # noqa: SLF001 Same class
+                hook(node)
 
     def add_transform(self, transform: Callable[[CfgNode], None]) -> None:
         if self._schema_frozen:
             raise SchemaFrozenError("Can't add transform after schema has been frozen")
+        self._before_change()
         self._transforms.append(transform)
 
     def add_validator(self, validator: Callable[[CfgNode], None]) -> None:
         if self._schema_frozen:
             raise SchemaFrozenError("Can't add validator after schema has been frozen")
+        self._before_change()
         self._validators.append(validator)
 
     def add_hook(self, hook: Callable[[CfgNode], None]) -> None:
         if self._schema_frozen:
             raise SchemaFrozenError("Can't add hook after schema has been frozen")
+        self._before_change()
         self._hooks.append(hook)
 
     def to_dict(self) -> dict[str, Any]:
-        attrs = {}
-        for key, attr in self.attrs:
-            if isinstance(attr, CfgNode):
-                attrs[key] = attr.to_dict()
-            else:
-                attrs[key] = attr.value
-        return attrs
+        if self._cow_source is not None:
+            return self._cow_source.to_dict()
+        result: dict[str, Any] = {}
+        # Dicts of nested nodes are added by their parent to keep order of keys and filled when nodes are visited
+        pending: dict[int, dict[str, Any]] = {id(self): result}
+        for _, _, node in _walk(self, "pre", leaves=False, enter=_materialized):
+            if node._cow_source is not None:  # noqa: SLF001 Same class
+                continue  # Filled by the parent
+            attrs = pending.pop(id(node))
+            for key, attr in node.data.items():
+                if isinstance(attr, CfgLeaf):
+                    attrs[key] = attr.value
+                elif attr._cow_source is not None:  # noqa: SLF001 Same class
+                    # Copy-on-write clone which hasn't been accessed has the same content as its source
+                    attrs[key] = attr._cow_source.to_dict()  # noqa: SLF001 Same class
+                else:
+                    attrs[key] = pending[id(attr)] = {}
+        return result
+
+    def walk(self, order: str = "pre") -> Iterator[tuple[str, CfgNode | CfgLeaf]]:
+        """
+        Iterate over this node and all nested nodes and leaves without recursion, yielding full key and attribute
+
+        :param order: "pre" yields nodes before their children, "post" after them
+        """
+        if order not in WALK_ORDERS:
+            raise ValueError(f"Unknown walk order {order!r}, must be one of {WALK_ORDERS}")
+        return ((key, attr) for key, _, attr in _walk(self, order, full_keys=True))
 
     @property
     def attrs(self) -> list[tuple[str, CfgNode | CfgLeaf]]:
-        attrs_list = []
-        for key in super().keys():  # noqa: SIM118 Doesn't work on super()
-            value = self.get_raw(key)
-            if isinstance(value, (CfgNode, CfgLeaf)):
-                attrs_list.append((key, value))
-        return attrs_list
+        return [(key, value) for key, value in self.data.items() if isinstance(value, (CfgLeaf, CfgNode))]
 
     def freeze(self) -> None:
-        for value in self.values():
-            if isinstance(value, CfgNode):
-                value.freeze()
-        self._frozen = True
+        self._before_change()
+        for _, _, node in _walk(self, "pre", leaves=False, enter=_materialized):
+            node._detach_clones()  # noqa: SLF001 Same class
+            node._defer(CfgNode.freeze)  # noqa: SLF001 Same class
+            node._frozen = True  # noqa: SLF001 Same class
+
+    def snapshot(self) -> Snapshot:
+        """Immutable copy of frozen config with plain values, for use in performance critical code"""
+        if not self.frozen:
+            raise ConfigError("Can only snapshot frozen config, please freeze first: cfg.freeze()")
+        return snapshot_node(self)
 
-    def freeze_schema(self) -> None:
-        self._schema_frozen = True
-        for _, attr in self.attrs:
-            if isinstance(attr, CfgNode):
-                attr.freeze_schema()
+    def publish_shared(self, name: str) -> SharedConfig:
+        """
+        Store frozen config in shared memory segment, so other processes can read it with CN.attach_shared(name)
+        Segment is removed with unlink() on the result, or when it is used as a context manager
+        """
+        from .shared import SharedConfig
+
+        return SharedConfig(self, name)
+
+    @staticmethod
+    def attach_shared(name: str) -> SharedSnapshot:
+        """Read-only view of the config published with publish_shared(), values are decoded on first access"""
+        from .shared import attach_shared
+
+        return attach_shared(name)
+
+    def freeze_schema(self, *, compiled=False) -> None:
+        """
+        :param compiled: Store values of children directly on nodes,
+            so attribute reads don't have to go through __getattr__, reverted by unfreeze_schema()
+        """
+        self._before_change()
+        for _, _, node in _walk(self, "pre", leaves=False, enter=_materialized):
+            node._detach_clones()  # noqa: SLF001 Same class
+            node._schema_frozen = True  # noqa: SLF001 Same class
+            compile_node = compiled and not node._compiled  # noqa: SLF001 Same class
+            node._compiled = node._compiled or compiled  # noqa: SLF001 Same class
+            if node._defer(partial(CfgNode.freeze_schema, compiled=compiled)):  # noqa: SLF001 Same class
+                continue  # Children are mirrored when they are created
+            if compile_node:
+                for key, attr in node.data.items():
+                    node._mirror(key, attr)  # noqa: SLF001 Same class
 
     def unfreeze_schema(self) -> None:
-        self._schema_frozen = False
-        for _, attr in self.attrs:
-            if isinstance(attr, CfgNode):
-                attr.unfreeze_schema()
+        self._before_change()
+        for _, _, node in _walk(self, "pre", leaves=False, enter=_materialized):
+            node._detach_clones()  # noqa: SLF001 Same class
+            node._schema_frozen = False  # noqa: SLF001 Same class
+            if node._defer(CfgNode.unfreeze_schema):  # noqa: SLF001 Same class
+                node._compiled = False  # noqa: SLF001 Same class
+                continue
+            if node._compiled:  # noqa: SLF001 Same class
+                node._compiled = False  # noqa: SLF001 Same class
+                for key in node.data:
+                    node.__dict__.pop(key, None)
+
+    def _mirror(self, key: str, attr: CfgNode | CfgLeaf) -> None:
+        """Keep value of a child in instance __dict__ of compiled node, so normal attribute lookup finds it"""
+        if key in self.RESERVED_KEYS or hasattr(type(self), key):
+            return
+        self.__dict__[key] = attr.value if isinstance(attr, CfgLeaf) else attr
 
     def describe(self, key: str = None) -> str | None:
         if key is None:
@@ -396,6 +888,12 @@ class CfgNode(UserDict, FullKeyParent):
                 value_to_set.desc = self.leaf_spec.desc
 
         super().__setitem__(key, value_to_set)
+        if self._compiled:
+            self._mirror(key, value_to_set)
+        self._reset_path_index()
+        batch = self._active_batch()
+        if batch is not None:
+            batch.undo.append(partial(self._restore_child, key, None))
 
     def _set_existing(self, key: str, value: Any) -> None:
         cur_attr = super().__getitem__(key)
@@ -406,22 +904,73 @@ class CfgNode(UserDict, FullKeyParent):
                 raise NodeReassignmentError(f"Can only swap CfgNode {self._child_full_key(key)} for another CfgNode")
             object.__setattr__(value, "_desc", cur_attr.describe())
             if self.schema_frozen:
-                value.freeze_schema()
+                value.freeze_schema(compiled=self._compiled)
+            if value.parent is None:
+                self._set_key_for_child(value, key)
+            batch = self._active_batch()
+            if batch is not None:
+                batch.undo.append(partial(self._restore_child, key, cur_attr))
             super().__setitem__(key, value)
+            if self._compiled:
+                self._mirror(key, value)
+            self._reset_path_index()
         else:
             cur_attr.value = value
 
     def _init_with_base(self, base: dict) -> None:
         for key, value in base.items():
             if isinstance(value, dict):
-                value = CfgNode(value)
+                value = CfgNode._create(value)
             self[key] = value
 
     def __reduce__(self):
+        if self._parent is None:
+            # Compact form: reference to the schema and values which differ from it
+            reference = _schema_reference(self)
+            if reference is not None:
+                return CfgNode._from_schema, reference  # noqa: SLF001 Same class
         state = {}
         for attr_name in self._BUILT_IN_ATTRS:
             state[attr_name] = getattr(self, attr_name)
-        return self.__class__, (self.to_dict(),), state
+        return self.__class__._create, (self.to_dict(),), state  # noqa: SLF001 Same class
+
+    @staticmethod
+    def _from_schema(
+        module_name: str,
+        var_name: str,
+        digest: str | None,
+        schema_digest: str,
+        changes: list[tuple[tuple[str, ...], Any]],
+        state: dict[str, Any],
+    ) -> CfgNode:
+        """Create config from the schema and changes found by _schema_reference(), used for unpickling"""
+        module = importlib.import_module(module_name)
+        schema = getattr(module, var_name)
+        # Module can be the same while schema has been changed in memory
+        if _module_digest(module) != digest or schema.digest() != schema_digest:
+            raise SchemaError(f"Schema {module_name}.{var_name} has changed since config was pickled")
+        # Config shouldn't be a view of the schema, which can still be changed
+        cfg = schema.init_cfg()
+        for path, value in changes:
+            node = cfg
+            for key in path[:-1]:
+                node = node.data[key]
+            # Value has been checked before pickling, compiled nodes also keep it in __dict__
+            node._restore_leaf(node.data[path[-1]], value)  # noqa: SLF001 Same class
+        compiled, frozen = state.pop("_compiled"), state.pop("_frozen")
+        for name, value in state.items():
+            setattr(cfg, name, value)
+        if compiled:
+            cfg.freeze_schema(compiled=True)
+        if frozen:
+            cfg.freeze()
+        return cfg
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        if self._compiled:
+            for key, attr in self.attrs:
+                self._mirror(key, attr)
 
     def _value_to_set_from_node(self, node: CfgNode, full_key: str) -> CfgNode:
         if self.leaf_spec:
@@ -474,71 +1023,264 @@ class CfgNode(UserDict, FullKeyParent):
             else:
                 self[key] = value  # type: ignore
 
+    def _leaf_updated(self, key: str, value: Any, old_value: Any) -> None:
+        """Called by child leaf after its value has changed"""
+        if self._compiled and key in self.__dict__:
+            self.__dict__[key] = value
+        batch = self._active_batch()
+        if batch is None:
+            self._update_module(key, value)
+        else:
+            batch.leaf_updated(self, self.data[key], value, old_value)
+
     def _update_module(self, key: str, value) -> None:
-        if self._parent is not None:
-            self._parent._update_module(f"{self.key}.{key}", value)  # noqa: SLF001 Same class
-        if self._module is None:  # Before config is loaded
-            return
-        key = f"{self._default_key}.{key}"
+        comments: dict[str, str | _SourceRef | None] = {}
+        for node, node_key in self._module_targets(key):
+            mode = node.provenance
+            if mode not in comments:
+                comments[mode] = _source_comment(mode)
+            node._append_module_lines(node_key, value, comments[mode])  # noqa: SLF001 Same class
+
+    def _module_targets(self, key: str) -> list[tuple[CfgNode, str]]:
+        """All nodes which track changes, in order from the root, with key of the child relative to them"""
+        key_parts = [key]
+        targets: list[tuple[CfgNode, str]] = []
+        node: CfgNode | None = self
+        while node is not None:
+            if node._module is not None:  # noqa: SLF001 Same class
+                targets.append((node, ".".join(reversed(key_parts))))
+            key_parts.append(node._key)  # noqa: SLF001 Same class
+            node = node._parent  # noqa: SLF001 Same class
+        targets.reverse()
+        return targets
+
+    def batch(self, *, propagate=True) -> _Batch:
+        """
+        Context manager to make multiple changes at once:
+        changes are recorded for saving as a single block and propagate_changes() is run once at the end,
+        all changes are reverted if there is an error inside the block or during propagation
+
+        Usage:
+            with cfg.batch():
+                cfg.FOO = 1
+                cfg.DICT.BAR = 2
+        """
+        return _Batch(self, propagate=propagate)
+
+    def apply(self, updates: Mapping[str, Any], *, propagate=True) -> None:
+        """
+        Check types of all updates first and then make all changes in a single batch, see batch()
 
-        reference_comment = "# <Source not found>"
-        for info in inspect.stack()[1:]:
-            # Kind of a hack, need to keep track of all our files
-            if "/".join(info.filename.rsplit("/")[-2:]) in ["cfg/node.py", "cfg/leaf.py"]:
+        :param updates: Nested mapping of changes, keys can also be dotted paths, e.g. {"DICT.FOO": 1}
+        """
+        changes: list[tuple[CfgNode, str, CfgNode | CfgLeaf | None, Any]] = []
+        self._collect_changes(updates, changes)
+        self._apply_changes(changes, propagate=propagate)
+
+    def diff(self, other: CfgNode) -> ConfigDiff:
+        """
+        Find changed, added and removed leaves in other config compared to this one,
+        unchanged subtrees are skipped without traversal if they are shared between copy-on-write clones
+        or if both configs are frozen, in which case digests of subtrees are compared
+        """
+        from .diff import diff_nodes
+
+        return diff_nodes(self, other)
+
+    def patch(self, diff: ConfigDiff, *, propagate=True) -> None:
+        """Apply result of diff() to this config, all changes are made in a single batch, see batch()"""
+        from .diff import patch_node
+
+        patch_node(self, diff, propagate=propagate)
+
+    def _apply_changes(
+        self,
+        changes: list[tuple[CfgNode, str, CfgNode | CfgLeaf | None, Any]],
+        *,
+        propagate: bool,
+    ) -> None:
+        """Make changes which have already been checked by _collect_changes()"""
+        with self.batch(propagate=propagate) as batch:
+            for node, key, attr, value in changes:
+                if isinstance(attr, CfgLeaf):
+                    batch.set_leaf(node, attr, value)
+                else:
+                    node[key] = value
+
+    def _collect_changes(
+        self,
+        updates: Mapping[str, Any],
+        changes: list[tuple[CfgNode, str, CfgNode | CfgLeaf | None, Any]],
+    ) -> None:
+        """Check all updates without making any changes"""
+        for path, value in updates.items():
+            node, key = self, path
+            if "." in path:
+                *node_keys, key = path.split(".")
+                for node_key in node_keys:
+                    node = node.data.get(node_key)
+                    if not isinstance(node, CfgNode):
+                        raise KeyError(f"{path!r} is not a path to a config node or leaf")
+            attr = node.data.get(key)
+            # Check for leaf first, as isinstance() with CfgNode is slower
+            if not isinstance(attr, CfgLeaf) and attr is not None and isinstance(value, Mapping):
+                attr._collect_changes(value, changes)  # noqa: SLF001 Same class
                 continue
-            reference_comment = f"# {info.filename}:{info.lineno} {info.code_context[0]}"  # type: ignore
-            break
-
-        lines = [reference_comment]
-        valid_types = [bool, int, float, str]
-        if isinstance(value, type):
-            module = cast(ModuleType, inspect.getmodule(value))
-            lines.append(f"from {module.__name__} import {value.__name__}\n")
-            lines.append(f"{key} = {value.__name__}\n")
-        elif type(value) in valid_types:
-            lines.append(f"{key} = {value!r}\n")
-        elif type(value) == PosixPath:
-            lines.append("from pathlib import PosixPath\n")
-            lines.append(f"{key} = {value!r}\n")
-        elif isinstance(value, CfgSavable):
-            import_str, cls_name, args, kwargs = value.save_strs()
-            lines.append(f"{import_str}\n")
-            lines.append(f"{key} = {value.create_eval_str(cls_name, args, kwargs)}\n")
-        elif isinstance(value, list) and all(type(v) in valid_types for v in value):
-            lines.append(f"{key} = {value!r}\n")
+            if node._frozen:  # noqa: SLF001 Same class
+                raise FrozenError(f"Trying to change value of {key} in frozen config")
+            if isinstance(attr, CfgLeaf):
+                attr.check_value(value)
+            elif attr is None:
+                if node.schema_frozen and not node.new_allowed:
+                    raise SchemaFrozenError(f"Trying to add leaf '{key}' to node '{node.full_key}' with frozen schema.")
+                if node.leaf_spec is not None and not isinstance(value, (CfgNode, CfgLeaf, type)):
+                    node.leaf_spec.check_value(value)
+            changes.append((node, key, attr, value))
+
+    def _active_batch(self) -> _Batch | None:
+        node: CfgNode | None = self
+        while node is not None:
+            if node._batch is not None:  # noqa: SLF001 Same class
+                return node._batch  # noqa: SLF001 Same class
+            node = node._parent  # noqa: SLF001 Same class
+        return None
+
+    def _restore_child(self, key: str, attr: CfgNode | CfgLeaf | None) -> None:
+        """Put back child which was removed or replaced, or remove child which was added, used for rollback"""
+        self._before_change()
+        if attr is None:
+            del self.data[key]
+            if self._compiled:
+                self.__dict__.pop(key, None)
+        else:
+            self.data[key] = attr
+            if self._compiled:
+                self._mirror(key, attr)
+        self._reset_path_index()
+
+    def _restore_leaf(self, leaf: CfgLeaf, value: Any) -> None:
+        self._before_change()
+        leaf._value = value  # noqa: SLF001 Our class
+        if self._compiled and leaf.key in self.__dict__:
+            self.__dict__[leaf.key] = value
+
+    def _append_module_lines(self, key: str, value: Any, comment: str | _SourceRef | None) -> None:
+        if self.provenance == "delta":  # Changes are found from values on save
+            return
+        lines = [] if comment is None else [comment]
+        assignment = _assignment_lines(f"{self._default_key}.{key}", value)
+        if assignment is not None:
+            lines.extend(assignment)
         else:
             message = f"Config was modified with unsavable value: {value!r}"
-            LOGGER.warning(message)
-            lines.append(f"# {message}")
+            import logging
+
+            logging.getLogger(__name__).warning(message)
+            lines.append(f"# {message}\n")
             self._safe_save = False
         self._module.extend(lines)
 
+    def _delta_lines(self) -> list[str]:
+        """Source which creates config from its schema, with a line for every value which differs from it"""
+        if not self._static_module:
+            raise SaveError("Can only save delta of config created from schema defined at the top level of a module")
+        _, module_name, _, var_name = self._static_module[0].split()
+        schema = getattr(importlib.import_module(module_name), var_name)
+        diff = schema.init_cfg(cow=True).diff(self)
+        imports: dict[str, None] = {}  # Ordered set
+        changes: list[str] = []
+        for path in diff.removed:
+            node_path, _, key = path.rpartition(".")
+            changes.append(f"del {'.'.join(filter(None, [self._default_key, node_path]))}[{key!r}]\n")
+        added = list(diff.added.items())
+        while added:
+            path, value = added.pop(0)
+            if isinstance(value, CfgNode):
+                if value.leaf_spec is not None or value.new_allowed:
+                    raise SaveError(f"Can't save delta with added node {path} which has leaf spec or allows new keys")
+                imports["from pycs import CN\n"] = None
+                changes.append(f"{self._default_key}.{path} = CN()\n")
+                added[:0] = [(f"{path}.{key}", _added_value(attr)) for key, attr in value.attrs]
+                continue
+            changes.extend(self._delta_assignment(path, value, imports))
+        first, *rest = self._static_module
+        if changes:  # Structure is different from the schema, so it has to be changed before freezing
+            rest[-1] = rest[-1].replace(".init_cfg()", ".inherit()")
+            changes.append(f"{self._default_key}.freeze_schema()\n")
+        for path, (_, value) in diff.changed.items():
+            changes.extend(self._delta_assignment(path, value, imports))
+        return [first, *imports, *rest, *changes]
+
+    def _delta_assignment(self, path: str, value: Any, imports: dict[str, None]) -> list[str]:
+        lines = _assignment_lines(f"{self._default_key}.{path}", value)
+        if lines is None:
+            raise SaveError(f"Config contains unsavable value at {path}: {value!r}")
+        *import_lines, assignment = lines
+        imports.update(dict.fromkeys(import_lines))
+        return [assignment]
+
+    @property
+    def provenance(self) -> str:
+        return self._provenance or _PROVENANCE_MODE
+
+    def set_provenance(self, mode: str | None) -> None:
+        """Set provenance mode for this config, None to use global default, see pycs.node.set_provenance()"""
+        self._provenance = None if mode is None else _check_provenance_mode(mode)
+
     def set_root_name(self, name: str) -> None:
         self._root_name = name
 
     def _set_key_for_child(self, child: CfgNode | CfgLeaf, key: str) -> None:
         child.key = key
         child.parent = self
+        if isinstance(child, CfgNode):
+            object.__setattr__(child, "_path_index", None)  # Index of the parent will be used from now on
 
-    def init_cfg(self) -> CfgNode:
-        """Initialise config from schema"""
-        cfg = self.clone()
+    def init_cfg(self, *, cow=False) -> CfgNode:
+        """Initialise config from schema, see clone() for cow"""
+        cfg = self.clone(cow=cow)
         cfg.freeze_schema()
         return cfg
 
     def static_init(self) -> CfgNode:
         """Default initialisation when config is used as is, instead of using load()"""
         cfg = self.init_cfg()
-        cfg._module = self._static_module  # noqa: SLF001, same class
+        cfg._module = copy(self._static_module)  # noqa: SLF001, same class
         cfg.propagate_changes()
         return cfg
 
+    def sweep(
+        self,
+        grid: Mapping[str, Sequence[Any]] | Sequence[Mapping[str, Any]],
+        *,
+        mode: str = "product",
+        n: int | None = None,
+        seed: int | None = None,
+        output_dir: Path | str | None = None,
+        output: str = "config",
+    ) -> Iterator[CfgNode]:
+        """
+        Generate configs with changes from the grid, all values are checked before the first config is created
+
+        :param grid: Values for each dotted path or list of overrides for each config
+        :param mode: How values from the grid are combined: "product", "zip" or "random",
+            list of overrides is used as is
+        :param n: Maximum number of configs, required for "random" mode
+        :param output_dir: Save each config or its changes to this directory, depending on output ("config" or "delta")
+        """
+        from .sweep import sweep
+
+        return sweep(self, grid, mode=mode, n=n, seed=seed, output_dir=output_dir, output=output)
+
     def load_or_static(self, path: Path | str | None = None) -> CfgNode:
         if not path:
             return self.static_init()
         path = Path(path)
 
-        if path.suffix in {".yaml", ".json"}:
+        from .loaders import has_loader
+
+        # Python files can also be full configs, so they are only loaded as data files if they aren't
+        if path.suffix != ".py" and has_loader(path.suffix):
             return self.load_from_data_file(path)
 
         try:
@@ -546,30 +1288,399 @@ class CfgNode(UserDict, FullKeyParent):
         except ConfigError:
             return self.load_from_data_file(path)
 
-    def _get_module_and_var(self) -> list[str] | None:
-        definition = inspect.stack()[2]
-        if definition.function != "<module>":  # Only care about configs defined at top level
+
+class _Batch:
+    """Journal of changes made inside of CfgNode.batch(), used for saving and rollback"""
+
+    def __init__(self, node: CfgNode, *, propagate: bool):
+        self._node = node
+        self._propagate = propagate
+        self._outer: _Batch | None = None
+        # Changes are saved in a single block, marked with the line which started the batch
+        frame = _find_source_frame()
+        self._source = None if frame is None else _SourceRef(frame.f_code.co_filename, frame.f_lineno)
+        # Latest and original values of changed leaves, leaves are restored after structural changes are undone
+        self._changes: dict[int, tuple[CfgNode, CfgLeaf, Any, Any]] = {}
+        self.undo: list[Callable[[], None]] = []
+
+    def leaf_updated(self, node: CfgNode, leaf: CfgLeaf, value: Any, old_value: Any) -> None:
+        change = self._changes.get(id(leaf))
+        if change is not None:
+            old_value = change[3]
+        self._changes[id(leaf)] = (node, leaf, value, old_value)
+
+    def set_leaf(self, node: CfgNode, leaf: CfgLeaf, value: Any) -> None:
+        """Set value which has already been checked, without looking for the active batch"""
+        node._before_change()  # noqa: SLF001 Our class
+        old_value = leaf._value  # noqa: SLF001 Our class
+        leaf._value = value  # noqa: SLF001 Our class
+        if node._compiled and leaf._key in node.__dict__:  # noqa: SLF001 Our class
+            node.__dict__[leaf._key] = value  # noqa: SLF001 Our class
+        change = self._changes.get(id(leaf))
+        self._changes[id(leaf)] = (node, leaf, value, old_value if change is None else change[3])
+
+    def __enter__(self) -> _Batch:
+        self._outer = self._node._active_batch()  # noqa: SLF001 Our class
+        if self._outer is None:
+            object.__setattr__(self._node, "_batch", self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self._outer is not None:  # Nested batch, everything is handled by the outer one
             return
-        context = definition.code_context
-        if not (context and re.match(r"^[^. =\[]* *=.*", context[0])):
+        try:
+            if exc_type is None and self._propagate:
+                self._node.propagate_changes()
+        except BaseException:
+            self._rollback()
+            raise
+        finally:
+            object.__setattr__(self._node, "_batch", None)
+        if exc_type is not None:
+            self._rollback()
             return
-        context = context[0]
-        var_name = context.split("=")[0].strip()
+        self._save_changes()
+
+    def _rollback(self) -> None:
+        for undo in reversed(self.undo):
+            undo()
+        for node, leaf, _, old_value in self._changes.values():
+            node._restore_leaf(leaf, old_value)  # noqa: SLF001 Our class
+        self.undo.clear()
+        self._changes.clear()
+
+    def _save_changes(self) -> None:
+        commented: set[int] = set()
+        node_targets: dict[int, list[tuple[CfgNode, str]]] = {}
+        for node, leaf, value, _ in self._changes.values():
+            targets = node_targets.get(id(node))
+            if targets is None:
+                # Keys relative to targets, ending with "." for nested nodes
+                targets = node_targets[id(node)] = node._module_targets("")  # noqa: SLF001 Our class
+            for target, prefix in targets:
+                comment = None
+                if id(target) not in commented:
+                    commented.add(id(target))
+                    comment = _source_comment(target.provenance, self._source)
+                target._append_module_lines(prefix + leaf.key, value, comment)  # noqa: SLF001 Our class
+
+
+def _get_module_and_var(frame: FrameType) -> list[str] | None:
+    """Check if node is assigned to a variable at the top level of a module, using only the caller's frame"""
+    if frame.f_code.co_name != "<module>":  # Only care about configs defined at top level
+        return None
+    line = linecache.getline(frame.f_code.co_filename, frame.f_lineno, frame.f_globals)
+    if not re.match(r"^[^. =\[]* *=.*", line):
+        return None
+    var_name = line.split("=")[0].strip()
+
+    module_path = convert_path_to_dotted(frame.f_code.co_filename)
+
+    lines = [f"from {module_path} import {var_name}", "", "", f"cfg = {var_name}.init_cfg()"]
+    return [line + "\n" for line in lines]
+
+
+def _cow_origin(node: CfgNode) -> CfgNode:
+    """Node which holds the content of copy-on-write clone, which hasn't been accessed yet"""
+    while node._cow_source is not None:  # noqa: SLF001 Our class
+        node = node._cow_source  # noqa: SLF001 Our class
+    return node
+
+
+def _schema_reference(cfg: CfgNode) -> tuple[str, str, str | None, str, list, dict[str, Any]] | None:
+    """Arguments for CfgNode._from_schema(), None if config can't be created from its schema"""
+    if not cfg._static_module or not cfg._schema_frozen:  # noqa: SLF001 Our class
+        return None
+    _, module_name, _, var_name = cfg._static_module[0].split()  # noqa: SLF001 Our class
+    # Only reference modules which have been imported, pickling shouldn't execute any code
+    module = sys.modules.get(module_name)
+    schema = getattr(module, var_name, None)
+    if not isinstance(schema, CfgNode) or schema is cfg or getattr(module, "__file__", None) is None:
+        return None
+    try:
+        schema_digest = schema.digest()
+    except TypeError:  # Changes to the schema can't be detected
+        return None
+    changes: list[tuple[tuple[str, ...], Any]] = []
+    flags = (cfg._frozen, cfg._compiled)  # noqa: SLF001 Our class
+    if not _collect_schema_changes(cfg, schema, (), flags, changes):
+        return None
+    state = {name: getattr(cfg, name) for name in ("_module", "_safe_save", "_provenance", "_root_name")}
+    state.update(_frozen=cfg._frozen, _compiled=cfg._compiled)  # noqa: SLF001 Our class
+    return module_name, var_name, _module_digest(module), schema_digest, changes, state
+
+
+def _collect_schema_changes(
+    node: CfgNode,
+    schema: CfgNode,
+    path: tuple[str, ...],
+    flags: tuple[bool, bool],
+    changes: list[tuple[tuple[str, ...], Any]],
+) -> bool:
+    """Find leaf values which differ from the schema, False if structure or state of nodes is different"""
+    if (node._frozen, node._compiled) != flags or not node._schema_frozen:  # noqa: SLF001 Our class
+        return False
+    # Only root keeps source of the changes
+    if path and (node._module is not None or node._provenance is not None):  # noqa: SLF001 Our class
+        return False
+    if _cow_origin(node) is _cow_origin(schema):  # Clone which hasn't been accessed, so it can't have changes
+        return True
+    # Only reading, so children of copy-on-write clones are not created
+    data, schema_data = node._view(), schema._view()  # noqa: SLF001 Our class
+    if data.keys() != schema_data.keys():
+        return False
+    for key, attr in data.items():
+        schema_attr = schema_data[key]
+        if isinstance(attr, CfgLeaf):
+            if not isinstance(schema_attr, CfgLeaf):
+                return False
+            if not _same_value(attr.value, schema_attr.value):
+                changes.append(((*path, key), attr.value))
+        elif not isinstance(schema_attr, CfgNode) or not _collect_schema_changes(
+            attr,
+            schema_attr,
+            (*path, key),
+            flags,
+            changes,
+        ):
+            return False
+    return True
+
+
+def _same_value(value: Any, other: Any) -> bool:
+    if value is other:
+        return True
+    if type(value) is not type(other):
+        return False
+    try:
+        return bool(value == other)
+    except Exception:  # noqa: BLE001 Values which can't be compared are pickled
+        return False
+
+
+_MODULE_DIGESTS: dict[str, str | None] = {}
+
+
+def _module_digest(module: ModuleType) -> str | None:
+    """Digest of module source, computed once per process"""
+    if module.__name__ not in _MODULE_DIGESTS:
+        _MODULE_DIGESTS[module.__name__] = file_digest(module.__file__)
+    return _MODULE_DIGESTS[module.__name__]
+
 
-        module_path = convert_path_to_dotted(definition.filename)
+def _added_value(attr: CfgNode | CfgLeaf) -> Any:
+    return attr if isinstance(attr, CfgNode) else attr.value
 
-        lines = [f"from {module_path} import {var_name}", "", "", f"cfg = {var_name}.init_cfg()"]
-        return [line + "\n" for line in lines]
+
+def _plain_value(attr: CfgNode | CfgLeaf) -> Any:
+    return attr.to_dict() if isinstance(attr, CfgNode) else attr.value
+
+
+def _assignment_lines(key: str, value: Any) -> list[str] | None:
+    """Imports and assignment of value to key, None if value can't be saved"""
+    valid_types = [bool, int, float, str]
+    if isinstance(value, type):
+        import inspect
+
+        module = cast(ModuleType, inspect.getmodule(value))
+        return [f"from {module.__name__} import {value.__name__}\n", f"{key} = {value.__name__}\n"]
+    if type(value) in valid_types:
+        return [f"{key} = {value!r}\n"]
+    if type(value) == PosixPath:
+        return ["from pathlib import PosixPath\n", f"{key} = {value!r}\n"]
+    if isinstance(value, CfgSavable):
+        import_str, cls_name, args, kwargs = value.save_strs()
+        return [f"{import_str}\n", f"{key} = {value.create_eval_str(cls_name, args, kwargs)}\n"]
+    if isinstance(value, list) and all(type(v) in valid_types for v in value):
+        return [f"{key} = {value!r}\n"]
+    return None
+
+
+def _source_comment(mode: str, source: _SourceRef | None = None) -> str | _SourceRef | None:
+    """:param source: Line which made the change, found from the stack if not provided"""
+    if mode in {"off", "delta"}:
+        return None
+    if source is None:
+        frame = _find_source_frame()
+        if frame is None:
+            return "# <Source not found>\n"
+        source = _SourceRef(frame.f_code.co_filename, frame.f_lineno)
+    if mode == "lazy":
+        return source
+    return str(source)
 
 
 def _check_circular_path(new_node: CfgNode, key: str, parent_ids: list[int] = None):
-    parent_ids = parent_ids or []
-    new_id = id(new_node)
-    if any(new_id == parent_id for parent_id in parent_ids):
-        raise ValueError(f"Tried to set circular cfg for {key}")
-    for key, value in new_node.items():
-        if isinstance(value, CfgNode):
-            _check_circular_path(value, key, [new_id, *parent_ids])
+    # Ids of nodes on the path from the root to the current node, nodes are removed after their children
+    path = set(parent_ids or [])
+
+    def enter(node: CfgNode) -> bool:
+        if id(node) in path:
+            raise ValueError(f"Tried to set circular cfg for {node.key or key}")
+        path.add(id(node))
+        # Children of copy-on-write clone are new nodes, so they can't be on the path
+        return _materialized(node)
+
+    for _, _, node in _walk(new_node, "post", leaves=False, enter=enter):  # noqa: FURB142 Changed by enter()
+        path.discard(id(node))
+
+
+def _same_content(node: CfgNode, other: CfgNode) -> bool:
+    """Check without traversal whether nodes are the same, False means that they still can be the same"""
+    if _cow_origin(node) is _cow_origin(other):
+        return True
+    if not (node._frozen and other._frozen):  # noqa: SLF001 Our class
+        return False
+    digest = _digest(node, stable_only=True)
+    return digest is not None and digest == _digest(other, stable_only=True)
+
+
+def _digest(root: CfgNode, *, stable_only: bool) -> str | None:
+    """
+    Digest of node computed from digests of its children
+
+    Digests are cached for frozen nodes which only contain values of immutable types, equal digests of such nodes
+    mean that they are equal. With stable_only, None is returned for other nodes instead of computing the digest.
+    """
+    from pycs.digest import new_hash, update_with_value
+
+    def enter(node: CfgNode) -> bool:
+        cached = node._digest_cache  # noqa: SLF001 Our class
+        return cached is None or (cached is False and not stable_only)
+
+    # Digest of each visited node, None if it hasn't been computed, and whether it can be cached, by id of node
+    results: dict[int, tuple[str | None, bool]] = {}
+    for _, _, node in _walk(_cow_origin(root), "post", leaves=False, enter=enter, origins=True):
+        cached = node._digest_cache  # noqa: SLF001 Our class
+        if isinstance(cached, str) or (cached is False and stable_only):
+            results[id(node)] = cached or None, cached is not False
+            continue
+        attrs = sorted(node.data.items())
+        children = {key: results.pop(id(_cow_origin(attr))) for key, attr in attrs if isinstance(attr, CfgNode)}
+        stable = all(child_stable for _, child_stable in children.values()) and all(
+            _stable_value(attr.value) for _, attr in attrs if isinstance(attr, CfgLeaf)
+        )
+        digest = None
+        if stable or not stable_only:
+            hash_ = new_hash()
+            try:
+                for key, attr in attrs:
+                    update_with_value(hash_, key)
+                    if key in children:
+                        hash_.update(b"N" + bytes.fromhex(children[key][0]))
+                    else:
+                        hash_.update(b"L")
+                        update_with_value(hash_, attr.type)
+                        update_with_value(hash_, attr.value)
+            except TypeError:
+                if not stable_only:
+                    raise
+                stable = False
+            else:
+                digest = hash_.hexdigest()
+        if node._frozen:  # noqa: SLF001 Our class
+            object.__setattr__(node, "_digest_cache", digest if stable else False)
+        results[id(node)] = digest, stable
+    return results[id(_cow_origin(root))][0]
+
+
+def _stable_value(value: Any) -> bool:
+    """Whether value can't be changed in place and values with the same digest are equal to it"""
+    if type(value) in (tuple, frozenset):
+        return all(_stable_value(item) for item in value)
+    return type(value) in _IMMUTABLE_TYPES and value == value  # noqa: PLR0124 NaN is not equal to itself
+
+
+def _materialized(node: CfgNode) -> bool:
+    """Whether children of node have been created, used to not create them for operations which can be deferred"""
+    return node._cow_source is None  # noqa: SLF001 Our class
+
+
+def _propagation_filter() -> Callable[[CfgNode], bool]:
+    """
+    enter() for walks of transform(), validate() and run_hooks(), which skips copy-on-write clones
+    if nothing in their origins has to be run, so their children are not created
+    """
+    # Whether anything has to be run in the subtree, by id of origin
+    active: dict[int, bool] = {}
+
+    def enter(node: CfgNode) -> bool:
+        if _materialized(node):
+            return True
+        origin = _cow_origin(node)
+        if id(origin) not in active:
+            for _, _, nested in _walk(origin, "post", leaves=False, enter=lambda n: id(n) not in active, origins=True):
+                if id(nested) in active:
+                    continue
+                active[id(nested)] = _has_callbacks(nested) or any(
+                    active[id(_cow_origin(attr))] for attr in nested.data.values() if isinstance(attr, CfgNode)
+                )
+        return active[id(origin)]
+
+    return enter
+
+
+def _has_callbacks(node: CfgNode) -> bool:
+    """Whether propagation has to run anything for the node itself, see _propagation_filter()"""
+    if node._transforms or node._validators or node._hooks:  # noqa: SLF001 Our class
+        return True
+    if node.leaf_spec is not None and node.leaf_spec.required:
+        return True
+    return any(isinstance(attr, CfgLeaf) and attr.required and attr.value is None for attr in node.data.values())
+
+
+def _walk(
+    root: CfgNode,
+    order: str,
+    *,
+    leaves: bool = True,
+    full_keys: bool = False,
+    enter: Callable[[CfgNode], bool] | None = None,
+    origins: bool = False,
+) -> Iterator[tuple[str | None, CfgNode | None, CfgNode | CfgLeaf]]:
+    """
+    Visit root and all nested nodes and leaves with explicit stack, yielding key, parent node and attribute
+
+    Children are iterated directly from node data, so changes made by the caller to the node
+    which is being visited must not add or remove its children.
+
+    :param leaves: Whether to yield leaves, otherwise only nodes are yielded
+    :param full_keys: Yield full keys instead of keys in the parent
+    :param enter: Called for each node before its children are visited, children are skipped if it returns False;
+        in pre-order it is called after the node has been yielded
+    :param origins: Only read, so copy-on-write clones are not materialized and nested nodes are yielded
+        as their origins, see _cow_origin()
+    """
+    pre = order == "pre"
+    root_key = root.full_key if full_keys else root.key
+    if pre:
+        yield root_key, root.parent, root
+    if enter is not None and not enter(root):
+        if not pre:
+            yield root_key, root.parent, root
+        return
+    stack = [(root_key, root, iter(root.data.items()))]
+    while stack:
+        prefix, node, items = stack[-1]
+        for key, attr in items:
+            if full_keys:
+                key = f"{prefix}.{key}"  # noqa: PLW2901
+            if isinstance(attr, CfgNode):
+                if origins:
+                    attr = _cow_origin(attr)  # noqa: PLW2901
+                if pre:
+                    yield key, node, attr
+                if enter is None or enter(attr):
+                    stack.append((key, attr, iter(attr.data.items())))
+                    break
+                if not pre:
+                    yield key, node, attr
+            elif leaves:
+                yield key, node, attr
+        else:
+            stack.pop()
+            if not pre:
+                yield prefix, stack[-1][1] if stack else root.parent, node
 
 
 CN = CfgNode
@@ -0,0 +1,87 @@
+"""Load many configs in a pool of worker processes"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, NamedTuple
+
+from .node import CfgNode
+
+if TYPE_CHECKING:
+    from .cache import ResolvedConfigCache
+
+# Schema used by resolve_data_file() in worker process
+_WORKER_SCHEMA: CfgNode | None = None
+
+
+class LoadResult(NamedTuple):
+    """Config loaded from path, or error raised while loading it"""
+
+    path: Path
+    cfg: CfgNode | None
+    error: Exception | None
+
+
+def load_many(
+    resolve: Callable[[Path], CfgNode],
+    paths: Iterable[Path | str],
+    *,
+    workers: int | None = None,
+    preload: Iterable[str] = (),
+    schema: CfgNode | None = None,
+) -> Iterator[LoadResult]:
+    """
+    Resolve configs in worker processes and run their hooks in this process, in order of completion
+
+    :param resolve: Picklable function which loads config without running hooks
+    """
+    paths = [Path(path) for path in paths]
+    if workers == 0:
+        _init_worker([], preload, schema)
+        for path in paths:
+            yield _run_hooks(path, partial(resolve, path))
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(list(sys.path), tuple(preload), schema),
+    )
+    try:
+        futures = {executor.submit(resolve, path): path for path in paths}
+        for future in as_completed(futures):
+            yield _run_hooks(futures[future], future.result)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def resolve_path(path: Path, *, cache: ResolvedConfigCache | None = None) -> CfgNode:
+    return CfgNode._resolve(path, cache)  # noqa: SLF001 Our class
+
+
+def resolve_data_file(path: Path) -> CfgNode:
+    return _WORKER_SCHEMA._resolve_data_file(path)  # noqa: SLF001 Our class
+
+
+def _init_worker(sys_path: list[str], preload: Iterable[str], schema: CfgNode | None) -> None:
+    global _WORKER_SCHEMA  # noqa: PLW0603 State of worker process
+    # Workers started with spawn don't share path changes made at runtime, e.g. by pytest
+    for path in reversed(sys_path):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    for name in preload:
+        importlib.import_module(name)
+    _WORKER_SCHEMA = schema
+
+
+def _run_hooks(path: Path, resolved: Callable[[], CfgNode]) -> LoadResult:
+    try:
+        cfg = resolved()
+        cfg.run_hooks()
+    except Exception as exc:  # noqa: BLE001 Errors are reported for each path
+        return LoadResult(path, None, exc)
+    return LoadResult(path, cfg, None)
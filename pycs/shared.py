@@ -0,0 +1,213 @@
+"""Publish frozen configs in shared memory, so many local processes can read them without unpickling a copy each"""
+
+from __future__ import annotations
+
+import pickle  # noqa: S403 Segments are only created by publish_shared()
+import struct
+import sys
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any, Iterator
+
+from pycs.errors import ConfigError, FrozenError
+
+from .leaf import CfgLeaf
+from .snapshot import _freeze_value, _thaw_value
+
+if TYPE_CHECKING:
+    from .node import CfgNode
+
+_MAGIC = b"PYCS"
+_VERSION = 1
+# Magic, format version, offset and length of the root node
+_HEADER = struct.Struct("<4sBQQ")
+# Leaves with larger pickles are stored separately and only decoded when accessed
+_INLINE_SIZE = 256
+_VALUE, _BLOB, _NODE = range(3)
+
+
+class SharedConfig:
+    """
+    Handle of the process which published the config, segment exists until unlink() is called,
+    which is done automatically when handle is used as a context manager
+    """
+
+    def __init__(self, cfg: CfgNode, name: str):
+        data = _encode(cfg)
+        self.name = name
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        self._shm.buf[: len(data)] = data
+        self.size = len(data)
+
+    def close(self) -> None:
+        """Close segment in this process, other processes can still attach to it"""
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Remove segment, processes which have already attached can still use it until they close it"""
+        self._shm.unlink()
+
+    def __enter__(self) -> SharedConfig:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+        self.unlink()
+
+
+class SharedSnapshot:
+    """
+    Read-only view of a config published in shared memory, nested nodes and values are decoded on first access
+
+    Values are frozen in the same way as in Snapshot,
+    keys which clash with methods are only available through item access.
+    Root view should be closed when it is no longer needed, which also closes all nested views.
+    """
+
+    __slots__ = ("_cache", "_entries", "_length", "_offset", "_shm")
+
+    def __init__(self, shm: shared_memory.SharedMemory, offset: int, length: int):
+        object.__setattr__(self, "_shm", shm)
+        object.__setattr__(self, "_offset", offset)
+        object.__setattr__(self, "_length", length)
+        object.__setattr__(self, "_entries", None)
+        object.__setattr__(self, "_cache", {})
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise FrozenError(f"Trying to change value of {key} in shared config")
+
+    def __delattr__(self, key: str) -> None:
+        raise FrozenError(f"Trying to delete {key} from shared config")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._cache:
+            return self._cache[key]
+        kind, payload = self._get_entries()[key]
+        if kind == _VALUE:
+            value = payload
+        elif kind == _BLOB:
+            value = _freeze_value(_load(self._shm, *payload))
+        else:
+            value = SharedSnapshot(self._shm, *payload)
+        self._cache[key] = value
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._get_entries()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_entries())
+
+    def __len__(self) -> int:
+        return len(self._get_entries())
+
+    def keys(self) -> list[str]:
+        return list(self._get_entries())
+
+    def values(self) -> list[Any]:
+        return [self[key] for key in self._get_entries()]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(key, self[key]) for key in self._get_entries()]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            key: value.to_dict() if isinstance(value, SharedSnapshot) else _thaw_value(value)
+            for key, value in self.items()
+        }
+
+    def close(self) -> None:
+        self._shm.close()
+
+    def __enter__(self) -> SharedSnapshot:
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, SharedSnapshot):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"SharedSnapshot({', '.join(self._get_entries())})"
+
+    def _get_entries(self) -> dict[str, tuple[int, Any]]:
+        if self._entries is None:
+            entries = {key: (kind, payload) for key, kind, payload in _load(self._shm, self._offset, self._length)}
+            for key, (kind, payload) in entries.items():
+                if kind == _VALUE:
+                    entries[key] = (kind, _freeze_value(payload))
+            object.__setattr__(self, "_entries", entries)
+        return self._entries
+
+
+def attach_shared(name: str) -> SharedSnapshot:
+    shm = _attach(name)
+    magic, version, offset, length = _HEADER.unpack_from(shm.buf)
+    if magic != _MAGIC or version != _VERSION:
+        shm.close()
+        raise ConfigError(
+            f"Shared memory segment {name!r} doesn't contain a config published with this version of pycs",
+        )
+    return SharedSnapshot(shm, offset, length)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # Otherwise resource tracker would remove segment when reader exits, it is owned by the publisher
+    from multiprocessing import resource_tracker
+
+    resource_tracker.unregister(shm._name, "shared_memory")  # noqa: SLF001 No public API before 3.13
+    return shm
+
+
+def _load(shm: shared_memory.SharedMemory, offset: int, length: int) -> Any:
+    if shm.buf is None:
+        raise ConfigError("Shared config has been closed")
+    view = shm.buf[offset : offset + length]
+    try:
+        return pickle.loads(view)  # noqa: S301 See import
+    finally:
+        view.release()
+
+
+def _encode(cfg: CfgNode) -> bytes:
+    """Nodes are stored after their children, so offsets of children are known when node is written"""
+    if not cfg.frozen:
+        raise ConfigError("Can only share frozen config, please freeze first: cfg.freeze()")
+    chunks = [b""]
+    size = _HEADER.size
+
+    def add(data: bytes) -> tuple[int, int]:
+        nonlocal size
+        chunks.append(data)
+        size += len(data)
+        return size - len(data), len(data)
+
+    def encode_node(node: CfgNode) -> tuple[int, int]:
+        entries = []
+        for key, attr in node.attrs:
+            if isinstance(attr, CfgLeaf):
+                data = pickle.dumps(attr.value, protocol=pickle.HIGHEST_PROTOCOL)
+                if len(data) <= _INLINE_SIZE:
+                    entries.append((key, _VALUE, attr.value))
+                else:
+                    entries.append((key, _BLOB, add(data)))
+            else:
+                entries.append((key, _NODE, encode_node(attr)))
+        return add(pickle.dumps(entries, protocol=pickle.HIGHEST_PROTOCOL))
+
+    offset, length = encode_node(cfg)
+    chunks[0] = _HEADER.pack(_MAGIC, _VERSION, offset, length)
+    return b"".join(chunks)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Iterator
+
+from pycs.errors import FrozenError
+
+from .leaf import CfgLeaf
+
+if TYPE_CHECKING:
+    from .node import CfgNode
+
+_SNAPSHOT_CLASSES: dict[tuple[str, ...], type[Snapshot]] = {}
+
+
+class FrozenDict(dict):
+    """Read-only dict used for mapping values inside of snapshots"""
+
+    def _immutable(self, *_, **__):
+        raise FrozenError("Snapshot values can't be modified")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable  # type: ignore
+    __ior__ = _immutable  # type: ignore
+
+    def __hash__(self) -> int:  # type: ignore
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class Snapshot:
+    """
+    Immutable copy of a config with plain values, subclasses with slots for each key are generated on demand
+
+    >>> snapshot = make_snapshot(("A", "B"), (1, make_snapshot(("C",), ([2, 3],))))
+    >>> snapshot.B.C
+    (2, 3)
+    >>> snapshot.to_dict()
+    {'A': 1, 'B': {'C': (2, 3)}}
+    """
+
+    __slots__ = ("_extra", "_hash")
+    _fields: tuple[str, ...] = ()
+    _slot_fields: frozenset[str] = frozenset()
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise FrozenError(f"Trying to change value of {key} in snapshot")
+
+    def __delattr__(self, key: str) -> None:
+        raise FrozenError(f"Trying to delete {key} from snapshot")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._slot_fields:
+            return object.__getattribute__(self, key)
+        return self._extra[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._fields
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def keys(self) -> tuple[str, ...]:
+        return self._fields
+
+    def values(self) -> list[Any]:
+        return [self[key] for key in self._fields]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(key, self[key]) for key in self._fields]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {key: _thaw_value(value) for key, value in self.items()}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Snapshot):
+            return NotImplemented
+        return self._fields == other._fields and self.values() == other.values()
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self._fields, *self.values())))
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"Snapshot({', '.join(f'{key}={value!r}' for key, value in self.items())})"
+
+    def __reduce__(self):
+        return make_snapshot, (self._fields, tuple(self.values()))
+
+
+def _snapshot_class(fields: tuple[str, ...]) -> type[Snapshot]:
+    cls = _SNAPSHOT_CLASSES.get(fields)
+    if cls is None:
+        # Keys which are not identifiers or clash with methods are only available through item access
+        slot_fields = tuple(key for key in fields if key.isidentifier() and not hasattr(Snapshot, key))
+        cls = type("Snapshot", (Snapshot,), {"__slots__": slot_fields, "_fields": fields})
+        cls._slot_fields = frozenset(slot_fields)  # noqa: SLF001 Class is being created here
+        _SNAPSHOT_CLASSES[fields] = cls
+    return cls
+
+
+def make_snapshot(fields: tuple[str, ...], values: tuple[Any, ...]) -> Snapshot:
+    cls = _snapshot_class(fields)
+    snapshot = object.__new__(cls)
+    extra = {}
+    for key, value in zip(fields, values):
+        frozen_value = _freeze_value(value)
+        if key in cls._slot_fields:  # noqa: SLF001 Our class
+            object.__setattr__(snapshot, key, frozen_value)
+        else:
+            extra[key] = frozen_value
+    object.__setattr__(snapshot, "_extra", extra)
+    object.__setattr__(snapshot, "_hash", None)
+    return snapshot
+
+
+def snapshot_node(node: CfgNode) -> Snapshot:
+    fields = []
+    values = []
+    for key, attr in node.attrs:
+        fields.append(key)
+        values.append(attr.value if isinstance(attr, CfgLeaf) else snapshot_node(attr))
+    return make_snapshot(tuple(fields), tuple(values))
+
+
+def _freeze_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, dict) and not isinstance(value, FrozenDict):
+        return FrozenDict((key, _freeze_value(item)) for key, item in value.items())
+    return value
+
+
+def _thaw_value(value: Any) -> Any:
+    if isinstance(value, Snapshot):
+        return value.to_dict()
+    if isinstance(value, FrozenDict):
+        return {key: _thaw_value(item) for key, item in value.items()}
+    return value
+
+
+__all__ = ["FrozenDict", "Snapshot", "make_snapshot"]
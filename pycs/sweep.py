@@ -0,0 +1,129 @@
+"""Generate variants of a schema from a grid of values or a list of overrides"""
+
+from __future__ import annotations
+
+import itertools
+import random
+from copy import copy, deepcopy
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, Sequence, Union
+
+from .leaf import _IMMUTABLE_TYPES, CfgLeaf
+
+if TYPE_CHECKING:
+    from .node import CfgNode
+
+SWEEP_MODES = ("product", "zip", "random")
+SWEEP_OUTPUTS = ("config", "delta")
+
+Grid = Union[Mapping[str, Sequence[Any]], Sequence[Mapping[str, Any]]]
+# Path of node relative to the root, key in the node, whether attribute is a leaf and new value
+_PlannedChange = tuple[tuple[str, ...], str, bool, Any]
+_Plan = list[_PlannedChange]
+
+
+def sweep(
+    schema: CfgNode,
+    grid: Grid,
+    *,
+    mode: str = "product",
+    n: int | None = None,
+    seed: int | None = None,
+    output_dir: Path | str | None = None,
+    output: str = "config",
+) -> Iterator[CfgNode]:
+    """
+    Check all values against the schema first and then create configs one by one, see CfgNode.sweep()
+    """
+    if mode not in SWEEP_MODES:
+        raise ValueError(f"Unknown sweep mode {mode!r}, expected one of {SWEEP_MODES}")
+    if output not in SWEEP_OUTPUTS:
+        raise ValueError(f"Unknown sweep output {output!r}, expected one of {SWEEP_OUTPUTS}")
+    if mode == "random" and n is None:
+        raise ValueError("Number of configs is required for random sweep")
+    base = schema.init_cfg()
+    base._module = copy(schema._static_module)  # noqa: SLF001 Our class
+    variants = _variants(_plan(base, grid), mode, seed)
+    if n is not None:
+        variants = itertools.islice(variants, n)
+    # Plan is checked before the first config is requested
+    return _generate(base, variants, None if output_dir is None else Path(output_dir), output)
+
+
+def _plan(base: CfgNode, grid: Grid) -> list[list[tuple[dict[str, Any], _Plan]]]:
+    """Overrides and planned changes for each option of each dimension, every option is checked once"""
+    if isinstance(grid, Mapping):
+        return [[_plan_overrides(base, {path: value}) for value in values] for path, values in grid.items()]
+    # List of overrides is a single dimension with an option for each variant
+    return [[_plan_overrides(base, overrides) for overrides in grid]]
+
+
+def _plan_overrides(base: CfgNode, overrides: Mapping[str, Any]) -> tuple[dict[str, Any], _Plan]:
+    changes: list[tuple[CfgNode, str, CfgNode | CfgLeaf | None, Any]] = []
+    base._collect_changes(overrides, changes)  # noqa: SLF001 Our class
+    plan = []
+    for node, key, attr, value in changes:
+        node_path = []
+        while node._parent is not None:  # noqa: SLF001 Our class
+            node_path.append(node._key)  # noqa: SLF001 Our class
+            node = node._parent  # noqa: SLF001 Our class
+        plan.append((tuple(reversed(node_path)), key, isinstance(attr, CfgLeaf), value))
+    return dict(overrides), plan
+
+
+def _variants(
+    dimensions: list[list[tuple[dict[str, Any], _Plan]]],
+    mode: str,
+    seed: int | None,
+) -> Iterator[list[tuple[dict[str, Any], _Plan]]]:
+    if mode == "product":
+        return (list(options) for options in itertools.product(*dimensions))
+    if mode == "zip":
+        if len({len(options) for options in dimensions}) > 1:
+            raise ValueError("All values in zip sweep should have the same length")
+        return (list(options) for options in zip(*dimensions))
+    rng = random.Random(seed)  # noqa: S311 Not used for security
+    return ([rng.choice(options) for options in dimensions] for _ in itertools.count())
+
+
+def _generate(
+    base: CfgNode,
+    variants: Iterator[list[tuple[dict[str, Any], _Plan]]],
+    output_dir: Path | None,
+    output: str,
+) -> Iterator[CfgNode]:
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    for idx, options in enumerate(variants):
+        cfg = base.clone(cow=True)
+        changes = []
+        for _, plan in options:
+            for node_path, key, is_leaf, value in plan:
+                node = cfg
+                for node_key in node_path:  # Only materialize nodes on the path
+                    node = node.data[node_key]
+                if type(value) not in _IMMUTABLE_TYPES:  # Options are shared between variants
+                    value = deepcopy(value)  # noqa: PLW2901
+                changes.append((node, key, node.data[key] if is_leaf else None, value))
+        cfg._apply_changes(changes, propagate=True)  # noqa: SLF001 Our class
+        if output_dir is not None:
+            if output == "config":
+                cfg.save(output_dir / f"{idx:05d}.py")
+            else:
+                _save_delta(output_dir / f"{idx:05d}.json", options)
+        yield cfg
+
+
+def _save_delta(path: Path, options: list[tuple[dict[str, Any], _Plan]]) -> None:
+    import json
+
+    delta: dict[str, Any] = {}
+    for overrides, _ in options:
+        for key_path, value in overrides.items():
+            # Data files don't support dotted paths
+            *node_keys, key = key_path.split(".")
+            nested = delta
+            for node_key in node_keys:
+                nested = nested.setdefault(node_key, {})
+            nested[key] = value
+    path.write_text(json.dumps(delta, indent=2))
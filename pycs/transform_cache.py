@@ -0,0 +1,151 @@
+"""Share updates of remote-source transforms between processes on the same host, see CachedTransform"""
+
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import threading
+import time
+import warnings
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+from .cache import _check_private, _secure_directory, _write_atomic
+from .digest import new_hash, update_with_value
+from .transforms import TransformBase
+
+if TYPE_CHECKING:
+    from .node import CN
+
+try:
+    import fcntl
+except ModuleNotFoundError:  # Windows
+    fcntl = None
+
+
+@dataclass
+class CachedTransform(TransformBase):
+    """
+    Store updates of another transform on disk for ttl seconds, so concurrent processes make a single request
+
+    Entry is identified by the type of transform and its updates_key() for the config.
+    Only one process fetches an expired entry, others wait for its lock and read the result.
+    For stale seconds after expiry, previous updates are returned while a background thread fetches new ones.
+    Updates are stored as JSON, so they must be serializable to be cached. As they can contain secrets,
+    directory is made accessible only by its owner, and entries which can be accessed by other users are ignored.
+    Without fcntl (Windows), processes don't wait for each other and permissions are not checked.
+    """
+
+    transform: TransformBase
+    directory: Path | str
+    ttl: float
+    stale: float = 0
+    # Entries which are being fetched by a background thread of this process
+    _refreshing: set[Path] = field(default_factory=set, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.directory = Path(self.directory).expanduser()
+        self.cacheable = self.transform.cacheable
+
+    def get_updates(self, cfg: CN) -> dict[str, Any] | None:
+        _secure_directory(self.directory)
+        path = self._entry_path(cfg)
+        entry = _read_entry(path)
+        if entry is not None:
+            age = time.time() - entry["time"]
+            if age < self.ttl:
+                return entry["updates"]
+            if age < self.ttl + self.stale:
+                self._refresh_in_background(cfg.clone(), path)
+                return entry["updates"]
+        with _file_lock(path):
+            # Another process could have fetched updates while we were waiting
+            entry = _read_entry(path)
+            if entry is not None and time.time() - entry["time"] < self.ttl:
+                return entry["updates"]
+            return self._fetch(cfg, path)
+
+    def cache_files(self) -> list[Path]:
+        return self.transform.cache_files()
+
+    def cache_env_prefixes(self) -> list[str]:
+        return self.transform.cache_env_prefixes()
+
+    def invalidate(self, cfg: CN | None = None) -> None:
+        """Remove entry for cfg, or every entry in the directory, so updates are fetched on the next load"""
+        if cfg is not None:
+            self._entry_path(cfg).unlink(missing_ok=True)
+        elif self.directory.exists():
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def _entry_path(self, cfg: CN) -> Path:
+        hash_ = new_hash()
+        update_with_value(hash_, [type(self.transform), self.transform.updates_key(cfg)])
+        return self.directory / f"{hash_.hexdigest()}.json"
+
+    def _fetch(self, cfg: CN, path: Path) -> dict[str, Any] | None:
+        updates = self.transform.get_updates(cfg)
+        try:
+            data = json.dumps({"time": time.time(), "updates": updates}).encode()
+        except (TypeError, ValueError) as exc:
+            warnings.warn(f"Can't cache updates of {self.transform!r}: {exc}", stacklevel=3)
+            return updates
+        # Temporary file is created with 0600 permissions
+        _write_atomic(path, data)
+        return updates
+
+    def _refresh_in_background(self, cfg: CN, path: Path) -> None:
+        if path in self._refreshing:
+            return
+        self._refreshing.add(path)
+        threading.Thread(target=self._refresh, args=(cfg, path), daemon=True).start()
+
+    def _refresh(self, cfg: CN, path: Path) -> None:
+        try:
+            with _file_lock(path, blocking=False) as locked:
+                # Stale entry is still used if another process is fetching or request fails
+                if not locked:
+                    return
+                entry = _read_entry(path)
+                if entry is None or time.time() - entry["time"] >= self.ttl:
+                    self._fetch(cfg, path)
+        finally:
+            self._refreshing.discard(path)
+
+
+def _read_entry(path: Path) -> dict[str, Any] | None:
+    try:
+        with path.open("rb") as f:
+            _check_private(f, path)
+            entry = json.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):  # Corrupted or unsafe entry is the same as a missing one
+        path.unlink(missing_ok=True)
+        return None
+    if not isinstance(entry, dict) or not isinstance(entry.get("time"), (int, float)) or "updates" not in entry:
+        path.unlink(missing_ok=True)
+        return None
+    return entry
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path, *, blocking: bool = True) -> Iterator[bool]:
+    """Exclusive lock shared by processes, yields whether it was acquired"""
+    if fcntl is None:
+        yield True
+        return
+    fd = os.open(path.with_suffix(".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+    finally:
+        # Lock is released with the file descriptor
+        os.close(fd)
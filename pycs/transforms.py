@@ -3,20 +3,40 @@ from __future__ import annotations
 import json
 import os
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from copy import deepcopy
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, TypeVar
 
 import yaml
 
+from .errors import SchemaFrozenError
+from .leaf import _IMMUTABLE_TYPES, CfgLeaf
+
 if TYPE_CHECKING:
     import boto3
 
+    from .appconfig import AppConfigPoller
     from .node import CN
 
+TransformT = TypeVar("TransformT", bound=Callable)
+
+
+def non_cacheable(transform: TransformT) -> TransformT:
+    """
+    Mark transform which depends on something other than its config, files and env vars it reports,
+    so configs using it are not stored in ResolvedConfigCache
+    Can be used as decorator for functions or classes
+    """
+    transform.cacheable = False
+    return transform
+
 
 @dataclass
 class TransformBase(ABC):
+    # Whether result only depends on config, cache_files() and cache_env_prefixes(), see pycs.cache
+    cacheable: ClassVar[bool] = True
+
     @abstractmethod
     def get_updates(self, cfg: CN) -> dict[str, Any] | None:
         """
@@ -28,6 +48,23 @@ class TransformBase(ABC):
         if updates is not None:
             cfg.update(updates)
 
+    def cache_files(self) -> list[Path]:
+        """Files read by transform, config is loaded again from cache only if their content hasn't changed"""
+        return []
+
+    def cache_env_prefixes(self) -> list[str]:
+        """Prefixes of environment variables read by transform, for the same purpose as cache_files()"""
+        return []
+
+    def updates_key(self, cfg: CN) -> Any:
+        """
+        Value which determines result of get_updates() for cfg, used to identify entries of CachedTransform
+        Fields of basic types and digest of the whole config by default, fields which aren't passed to the
+        constructor or compared, e.g. caches, are skipped
+        """
+        values = (getattr(self, f.name) for f in fields(self) if f.init and f.compare)
+        return [value for value in values if type(value) in _IMMUTABLE_TYPES or isinstance(value, Path)], cfg.digest()
+
 
 @dataclass
 class LoadFromFile(TransformBase):
@@ -37,10 +74,16 @@ class LoadFromFile(TransformBase):
     def __post_init__(self) -> None:
         self.filepath = self.filepath if isinstance(self.filepath, Path) else Path(self.filepath).expanduser()
 
+    def cache_files(self) -> list[Path]:
+        return [self.filepath]  # type: ignore not aware of __post_init__
+
     def get_updates(self, _) -> dict[str, Any] | None:
+        from .loaders import get_loader, load_yaml
+
+        # Files with unknown suffixes are parsed as YAML, which also covers JSON
+        loader = get_loader(self.filepath.suffix, load_yaml)  # type: ignore not aware of __post_init__
         try:
-            with self.filepath.open() as fobj:  # type: ignore not aware of __post_init__
-                return yaml.safe_load(fobj)
+            return loader(self.filepath)  # type: ignore not aware of __post_init__
         except FileNotFoundError:
             if self.require:
                 raise
@@ -73,9 +116,70 @@ class LoadFromKeyValue(TransformBase):
         return self._structured_data
 
 
+def _parse_yaml(value: str) -> Any:
+    from .loaders import yaml_loader
+
+    return yaml.load(value, Loader=yaml_loader())  # noqa: S506 Loader is always safe
+
+
+def _parse_int(value: str) -> Any:
+    try:
+        return int(value)
+    except ValueError:  # Other notations, e.g. 0x10 or 1_000
+        return _parse_yaml(value)
+
+
+def _parse_float(value: str) -> Any:
+    try:
+        return float(value)
+    except ValueError:
+        return _parse_yaml(value)
+
+
+_BOOLS = {"true": True, "yes": True, "on": True, "false": False, "no": False, "off": False}
+
+
+def _parse_bool(value: str) -> Any:
+    parsed = _BOOLS.get(value.lower())
+    return _parse_yaml(value) if parsed is None else parsed
+
+
+_NULLS = {"null", "Null", "NULL", "~"}
+
+
+def _parse_str(value: str) -> Any:
+    # Other YAML syntax is kept as text, so values like 123 or yes stay strings
+    if value in _NULLS or value[:1] in ("'", '"'):
+        try:
+            return _parse_yaml(value)
+        except yaml.YAMLError:
+            return value
+    return value
+
+
+# Parsers for leaves of exactly these types, values of other leaves and new keys are parsed as YAML
+_PARSERS: dict[type, Callable[[str], Any]] = {str: _parse_str, int: _parse_int, float: _parse_float, bool: _parse_bool}
+
+
 @dataclass
 class LoadFromEnvVars(TransformBase):
+    """
+    Load values from environment variables, e.g. PREFIX_DICT__FOO for prefix "PREFIX_" sets cfg.DICT.FOO
+
+    Values of str, int, float and bool leaves are parsed by type, other values as YAML.
+    Values of str leaves are kept as text, except for null, ~ and quoted values, which are parsed as YAML.
+    All variables which don't match the config are reported at once.
+    """
+
     prefix: str
+    # Matching variables with their paths and parsers, and parsed values from the last run,
+    # variables are read and matched against the config on every run, as transform can be shared by schemas
+    _last: tuple[tuple[Any, ...], dict[str, Any]] | None = field(
+        default=None,
+        init=False,
+        repr=False,
+        compare=False,
+    )
 
     def _normalize_key(self, key: str) -> str | None:
         if not key.startswith(self.prefix):
@@ -84,23 +188,82 @@ class LoadFromEnvVars(TransformBase):
         # dots are not quite valid identifiers (in shell syntax).
         return key.replace("__", ".")
 
-    def get_updates(self, _) -> dict[str, Any] | None:
-        flat = {self._normalize_key(key): val for key, val in os.environ.items()}
-        flat_loaded = {key: yaml.safe_load(value) if value else "" for key, value in flat.items() if key is not None}
-        return _flat_to_structured(flat_loaded)
+    def cache_env_prefixes(self) -> list[str]:
+        return [self.prefix]
+
+    def get_updates(self, cfg: CN) -> dict[str, Any] | None:
+        prefix = self.prefix
+        environ = tuple((key, value) for key, value in os.environ.items() if key.startswith(prefix))
+        # Parsers depend on types of leaves, so parsed values are only reused if they are the same
+        entries = tuple(self._resolve(cfg, key) for key, _ in environ)
+        if self._last is not None and self._last[0] == (environ, entries):
+            flat = self._last[1]
+        else:
+            flat = self._parse(cfg, environ, entries)
+            self._last = ((environ, entries), flat)
+        # Parsed values are shared between runs, so configs shouldn't get the same mutable values
+        return _flat_to_structured(
+            {key: value if type(value) in _IMMUTABLE_TYPES else deepcopy(value) for key, value in flat.items()},
+        )
+
+    def _parse(
+        self,
+        cfg: CN,
+        environ: tuple[tuple[str, str], ...],
+        entries: tuple[tuple[str, Callable[[str], Any]] | None, ...],
+    ) -> dict[str, Any]:
+        unknown = [key for (key, _), entry in zip(environ, entries) if entry is None]
+        if unknown:
+            raise SchemaFrozenError(f"Environment variables don't match any keys in {cfg.full_key}: {unknown}")
+        flat = {}
+        for (_, value), (path, parse) in zip(environ, entries):
+            flat[path] = parse(value) if value else ""
+        return flat
+
+    def _resolve(self, cfg: CN, key: str) -> tuple[str, Callable[[str], Any]] | None:
+        """Path and parser for variable, None if it doesn't match the config"""
+        path = self._normalize_key(key)
+        keys = path.split(".")
+        node = cfg
+        for idx, node_key in enumerate(keys):
+            if node_key not in node.data:
+                return (path, _parse_yaml) if node.new_allowed or not node.schema_frozen else None
+            attr = node.data[node_key]
+            if isinstance(attr, CfgLeaf):
+                return (path, _parser(attr)) if idx == len(keys) - 1 else None
+            node = attr
+        return path, _parse_yaml
+
+
+def _parser(attr: CN | CfgLeaf) -> Callable[[str], Any]:
+    if isinstance(attr, CfgLeaf) and not attr.subclass:
+        return _PARSERS.get(attr.type, _parse_yaml)
+    return _parse_yaml
 
 
 @dataclass
 class LoadFromAWSAppConfig(TransformBase):
+    """
+    Load values from AWS AppConfig profile specified by APP, ENV and PROFILE in cfg[key]
+
+    Poller of each profile is kept by the transform, so repeated loads reuse its client and session,
+    and don't poll more often than AppConfig allows.
+    """
+
     key: str
     required = False
+    cacheable = False
     session: boto3.Session | None = None
+    # appconfigdata client, or an object with the same methods, created from session by default
+    client: Any = None
+    _pollers: dict[tuple[str, str, str], AppConfigPoller] = field(
+        default_factory=dict,
+        init=False,
+        repr=False,
+        compare=False,
+    )
 
     def get_updates(self, cfg: CN) -> dict[str, Any] | None:
-        try:
-            import boto3
-        except ModuleNotFoundError as e:
-            raise ImportError("Please install with aws extra: pip install pycs[aws]") from e
         if self.key not in cfg:
             raise ValueError(f"Can't find AppConfig key '{self.key}' in cfg")
         ac_cfg = cfg[self.key]
@@ -114,30 +277,27 @@ class LoadFromAWSAppConfig(TransformBase):
             if self.required:
                 raise ValueError("Got empty APP for AppConfig")
             return None
+        return self.poller(ac_cfg.APP, ac_cfg.ENV, ac_cfg.PROFILE).get()
 
-        client = (self.session or boto3).client("appconfigdata")
-        # Maybe actually create a proper client for this
-        config_token = client.start_configuration_session(
-            ApplicationIdentifier=ac_cfg.APP,
-            ConfigurationProfileIdentifier=ac_cfg.PROFILE,
-            EnvironmentIdentifier=ac_cfg.ENV,
-            RequiredMinimumPollIntervalInSeconds=15,
-        )["InitialConfigurationToken"]
-        response = client.get_latest_configuration(ConfigurationToken=config_token)
-
-        content_type = response["ContentType"]
-        content: bytes = response["Configuration"].read()
-        if content_type == "application/x-yaml":
-            return yaml.safe_load(content)
-        if content_type == "application/json":
-            return json.loads(content.decode("utf-8"))
-        raise ValueError(f"Got config in invalid type: {content_type}")
+    def updates_key(self, cfg: CN) -> Any:
+        return self.key, cfg[self.key].to_dict() if self.key in cfg else None
+
+    def poller(self, app: str, env: str, profile: str) -> AppConfigPoller:
+        """Poller used for the profile, can be started to refresh configuration in background"""
+        from .appconfig import AppConfigPoller
+
+        poller = self._pollers.get((app, env, profile))
+        if poller is None:
+            poller = AppConfigPoller(app, env, profile, client=self.client, session=self.session)
+            self._pollers[app, env, profile] = poller
+        return poller
 
 
 @dataclass
 class LoadFromAWSSecretsManager(TransformBase):
     key: str
     required = False
+    cacheable = False
     session: boto3.Session | None = None
 
     def get_updates(self, cfg: CN) -> dict[str, Any] | None:
@@ -159,3 +319,6 @@ class LoadFromAWSSecretsManager(TransformBase):
 
         secrets_manager = (self.session or boto3).client("secretsmanager")
         return json.loads(secrets_manager.get_secret_value(SecretId=sm_cfg.NAME)["SecretString"])
+
+    def updates_key(self, cfg: CN) -> Any:
+        return self.key, cfg[self.key].to_dict() if self.key in cfg else None
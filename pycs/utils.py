@@ -5,33 +5,136 @@ import os
 import sys
 import warnings
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
+from weakref import WeakKeyDictionary
 
-import isort
-import yaml
+from .errors import SaveError
 
 if TYPE_CHECKING:
-    from typing import ModuleType
+    from types import ModuleType
+
+FileStat = tuple[int, int]
+
+
+class _CachedModule(NamedTuple):
+    module: ModuleType
+    stat: FileStat | None
+    # Other modules from the same package, which might have been imported by this one
+    dependencies: tuple[tuple[str, ModuleType, FileStat | None], ...]
+
+
+_MODULE_CACHE: dict[str, _CachedModule] = {}
+_MERGED_LINES: WeakKeyDictionary[ModuleType, list[str]] = WeakKeyDictionary()
+_SOURCE_FILES: WeakKeyDictionary[ModuleType, tuple[tuple[str, str], ...]] = WeakKeyDictionary()
 
 
 def import_module(module_path: Path) -> ModuleType:
-    package = _load_package(module_path.parent)
+    """
+    Import module from file, executed modules are reused until they or other modules from the same package change
+    Use invalidate_module_cache() to force reloading, e.g. if module from another package has changed
+    """
+    package, root = _load_package(module_path.parent)
     module_name = module_path.stem
     if package:
         module_name = f"{package}.{module_name}"
 
-    return _load_module(module_name, module_path)
+    return _load_module(module_name, module_path, root)
+
+
+def invalidate_module_cache(path: Path | str | None = None) -> None:
+    """
+    Execute modules again on next load
+
+    :param path: Only invalidate module at this path, it is also removed from sys.modules,
+        so other configs importing it will get new version as well
+    """
+    if path is None:
+        _MODULE_CACHE.clear()
+        _MERGED_LINES.clear()
+        _SOURCE_FILES.clear()
+        return
+    path = str(Path(path).absolute())
+    _MODULE_CACHE.pop(path, None)
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if module_file and str(Path(module_file).absolute()) == path:
+            del sys.modules[name]
 
 
 def _check_clone_present(lines: list[str]) -> None:
     if not any(("cfg = cfg.clone()" in line) for line in lines):
         warnings.warn(
             "Extending config file without clone() is discouraged, as it frequently leads to bugs",
-            stacklevel=4,
+            stacklevel=5,
         )
 
 
+class MergedSource(NamedTuple):
+    """Merged source of config module and all configs it extends, generated only when it is saved"""
+
+    module_name: str
+    # Paths and digests of content of all merged files, starting with the module itself
+    files: tuple[tuple[str, str], ...]
+
+    def __str__(self) -> str:
+        changed = [path for path, digest in self.files if file_digest(path) != digest]
+        if changed:
+            raise SaveError(f"Config files have changed since config was loaded: {changed}")
+        path = self.files[0][0]
+        module = sys.modules.get(self.module_name)
+        if module is None or str(Path(module.__file__)) != path:
+            module = import_module(Path(path))
+        return "".join(merge_cfg_module(module))
+
+
+def cfg_source_files(module: ModuleType) -> tuple[tuple[str, str], ...]:
+    """Paths and digests of config module and all configs it extends, in the same order as merge_cfg_module()"""
+    cached = _SOURCE_FILES.get(module)
+    if cached is not None:
+        return cached
+    module_path = Path(module.__file__)
+    content = module_path.read_bytes()
+    files = [(str(module_path), _content_digest(content))]
+    lines = content.decode().splitlines(keepends=True)
+    for line in lines:
+        if line.startswith("from "):
+            _, import_path, __, *imports = line.strip().split(" ")
+            if "cfg" in imports or "cfg," in imports:
+                _check_clone_present(lines)
+                imported_module = importlib.import_module(import_path, package=module.__package__)
+                files.extend(cfg_source_files(imported_module))
+    result = tuple(files)
+    _SOURCE_FILES[module] = result
+    return result
+
+
+def file_digest(path: str | Path) -> str | None:
+    """Digest of file content, None if file doesn't exist"""
+    try:
+        return _content_digest(Path(path).read_bytes())
+    except OSError:
+        return None
+
+
+def _content_digest(content: bytes) -> str:
+    import hashlib
+
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def loaded_module_files(module: ModuleType) -> list[str]:
+    """Files of module loaded with import_module() and of other modules from its package, see _find_dependencies()"""
+    files = [str(Path(module.__file__).absolute())]
+    cached = _MODULE_CACHE.get(files[0])
+    if cached is not None:
+        files.extend(str(Path(dependency.__file__).absolute()) for _, dependency, _ in cached.dependencies)
+    return files
+
+
 def merge_cfg_module(module: ModuleType) -> list[str]:
+    cached = _MERGED_LINES.get(module)
+    if cached is not None:
+        return list(cached)
     lines = []
 
     module_path = Path(module.__file__)
@@ -42,10 +145,10 @@ def merge_cfg_module(module: ModuleType) -> list[str]:
     for line in module_file:
         if line.startswith("from "):
             _, import_path, __, *imports = line.strip().split(" ")
-            imported_module = importlib.import_module(import_path, package=module.__package__)
             valid_cfg_names = {"cfg", "cfg,"}
             for pattern in valid_cfg_names:
                 if pattern in imports:
+                    imported_module = importlib.import_module(import_path, package=module.__package__)
                     lines.extend(merge_cfg_module(imported_module))
                     if "as" in imports:
                         as_idxs = [idx for idx, elem in enumerate(imports) if elem == "as"]
@@ -53,7 +156,6 @@ def merge_cfg_module(module: ModuleType) -> list[str]:
                             if imports[as_index + 1] in pattern:
                                 imports = imports[: as_index - 1] + imports[as_index + 2 :]
                     imports.remove(pattern)
-                    _check_clone_present(module_file)
 
                     line = f"from {import_path} import " + ", ".join(imports) if imports else None
                     if line:
@@ -63,17 +165,26 @@ def merge_cfg_module(module: ModuleType) -> list[str]:
 
     lines.append(f"# END --- {module_path} ---\n")
 
-    return isort.code("".join(lines)).splitlines(keepends=True)
-
+    import isort
 
-def add_yaml_str_representer():
-    def obj_representer(dumper, data):
-        return dumper.represent_scalar("tag:yaml.org,2002:str", str(data))
+    merged = isort.code("".join(lines)).splitlines(keepends=True)
+    _MERGED_LINES[module] = merged
+    return list(merged)
 
-    yaml.add_multi_representer(object, obj_representer)
 
+def _load_module(module_name: str, module_path: Path, root: Path | None = None) -> ModuleType:
+    """:param root: Directory of the top-level package, modules from it are tracked as dependencies"""
+    key = str(module_path.absolute())
+    stat = _file_stat(key)
+    cached = _MODULE_CACHE.get(key)
+    if (
+        cached is not None
+        and cached.stat == stat
+        and sys.modules.get(module_name) is cached.module
+        and _dependencies_unchanged(cached)
+    ):
+        return cached.module
 
-def _load_module(module_name: str, module_path: Path) -> ModuleType:
     spec = importlib.util.spec_from_file_location(module_name, module_path)
     if spec is None:
         raise ImportError(f"Could not find an importable module at {module_name=!r}, {module_path=!r}")
@@ -81,20 +192,55 @@ def _load_module(module_name: str, module_path: Path) -> ModuleType:
     sys.modules[spec.name] = module
     spec.loader.exec_module(module)
 
+    dependencies = () if root is None else _find_dependencies(module_name, root)
+    _MODULE_CACHE[key] = _CachedModule(module, stat, dependencies)
     return module
 
 
-def _load_package(package_path: Path) -> str:
+def _load_package(package_path: Path) -> tuple[str, Path]:
+    """:return: Name of the package and directory of the top-level package"""
     init_path = package_path / "__init__.py"
     if not init_path.exists():
-        return ""
+        return "", package_path
     package_name = package_path.stem
-    parent_package_name = _load_package(package_path.parent)
+    parent_package_name, root = _load_package(package_path.parent)
     if parent_package_name:
         package_name = f"{parent_package_name}.{package_name}"
+    else:
+        root = package_path
     _load_module(package_name, init_path)
 
-    return package_name
+    return package_name, root
+
+
+def _file_stat(path: str) -> FileStat | None:
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _find_dependencies(module_name: str, root: Path) -> tuple[tuple[str, ModuleType, FileStat | None], ...]:
+    prefix = str(root.absolute()) + os.sep
+    dependencies = []
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None)
+        if name != module_name and module_file and str(Path(module_file).absolute()).startswith(prefix):
+            dependencies.append((name, module, _file_stat(module_file)))
+    return tuple(dependencies)
+
+
+def _dependencies_unchanged(cached: _CachedModule) -> bool:
+    unchanged = True
+    for name, module, stat in cached.dependencies:
+        if sys.modules.get(name) is not module:
+            unchanged = False
+        elif _file_stat(module.__file__) != stat:
+            # Make sure changed module is executed again when it is imported
+            del sys.modules[name]
+            unchanged = False
+    return unchanged
 
 
 def full_type_name(_type) -> str:
@@ -1,5 +1,39 @@
 from __future__ import annotations
 
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from pycs.utils import invalidate_module_cache
+from tests.utils import Clock
+
 
 def pytest_ignore_collect(path):
     return "tests/data/" in str(path)
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def make_package(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Callable[[dict[str, str]], Path]:
+    """
+    Create importable package from names of modules and their content, with counter module in addition,
+    so modules can record that they were executed, see tests.utils.executed()
+    """
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def make(modules: dict[str, str]) -> Path:
+        package = tmp_path / f"pkg_{tmp_path.name}"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        (package / "counter.py").write_text("EXECUTED = []\n")
+        for name, content in modules.items():
+            (package / name).write_text(content)
+        return package
+
+    yield make
+    invalidate_module_cache()
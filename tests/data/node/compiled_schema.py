@@ -0,0 +1,7 @@
+from pycs import CN
+
+schema = CN()
+schema.INT = 1
+schema.NESTED = CN()
+schema.NESTED.STR = "foo"
+schema.freeze_schema(compiled=True)
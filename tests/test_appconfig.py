@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from pycs import CN
+from pycs.appconfig import AppConfigPoller
+from pycs.transforms import LoadFromAWSAppConfig
+from tests.utils import Clock, wait_for
+
+
+class FakeAppConfigData:
+    """Local stand-in for appconfigdata client, returns configuration only if it has changed since the last poll"""
+
+    def __init__(self, content: dict, interval: float = 15):
+        self.deployed = json.dumps(content).encode()
+        self.interval = interval
+        self.sessions = 0
+        self.polls = 0
+        self.error: Exception | None = None
+        self._sent: dict[str, bytes] = {}
+
+    def start_configuration_session(self, **kwargs) -> dict:
+        assert kwargs["ApplicationIdentifier"] == "app"
+        self.sessions += 1
+        token = f"token-{self.sessions}-0"
+        self._sent[token] = b""
+        return {"InitialConfigurationToken": token}
+
+    def get_latest_configuration(self, ConfigurationToken: str) -> dict:  # noqa: N803 Same as in boto3
+        if self.error is not None:
+            raise self.error
+        sent = self._sent.pop(ConfigurationToken)  # Tokens can only be used once
+        self.polls += 1
+        token = f"{ConfigurationToken}-{self.polls}"
+        self._sent[token] = self.deployed
+        return {
+            "NextPollConfigurationToken": token,
+            "NextPollIntervalInSeconds": self.interval,
+            "ContentType": "application/json",
+            "Configuration": io.BytesIO(b"" if sent == self.deployed else self.deployed),
+        }
+
+
+def test_poller(clock: Clock):
+    client = FakeAppConfigData({"STR": "first"})
+    poller = AppConfigPoller("app", "env", "profile", client=client, clock=clock)
+    assert poller.get() == {"STR": "first"}
+    assert poller.get() == {"STR": "first"}
+    assert client.polls == 1
+
+    clock.now += 15
+    assert not poller.poll()  # Empty response, configuration hasn't changed
+    assert poller.get() == {"STR": "first"}
+
+    client.deployed = json.dumps({"STR": "second"}).encode()
+    assert poller.get() == {"STR": "first"}  # Not due yet
+    clock.now += 15
+    assert poller.get() == {"STR": "second"}
+    assert client.sessions == 1
+    assert client.polls == 3
+
+    # Token expires if it is not used
+    clock.now += 24 * 60 * 60
+    assert poller.get() == {"STR": "second"}
+    assert client.sessions == 2
+
+
+def test_poller_restarts_session_after_error(clock: Clock):
+    client = FakeAppConfigData({"STR": "first"})
+    poller = AppConfigPoller("app", "env", "profile", client=client, clock=clock)
+    poller.get()
+
+    client.error = RuntimeError("BadRequestException: token has expired")
+    clock.now += 15
+    with pytest.raises(RuntimeError, match="expired"):
+        poller.poll()
+    client.error = None
+    client.deployed = json.dumps({"STR": "second"}).encode()
+    assert poller.poll()
+    assert poller.get() == {"STR": "second"}
+    assert client.sessions == 2
+
+
+def test_poller_copies_values():
+    poller = AppConfigPoller("app", "env", "profile", client=FakeAppConfigData({"LIST": [1]}))
+    poller.get()["LIST"].append(2)
+    assert poller.get() == {"LIST": [1]}
+
+
+def test_background_refresh():
+    client = FakeAppConfigData({"STR": "first"}, interval=0.01)
+    with AppConfigPoller("app", "env", "profile", client=client) as poller:
+        polls = client.polls
+        assert poller.get() == {"STR": "first"}
+        assert client.polls == polls  # get() doesn't poll when thread is running
+
+        client.error = RuntimeError("Throttled")
+        wait_for(lambda: poller.error is not None)
+        assert poller.get() == {"STR": "first"}
+
+        client.error = None
+        client.deployed = json.dumps({"STR": "second"}).encode()
+        wait_for(lambda: poller.get() == {"STR": "second"})
+        assert poller.error is None
+    assert client.sessions == 2  # New session is started after an error
+
+
+def test_transform():
+    client = FakeAppConfigData({"STR": "from appconfig"})
+    schema = CN()
+    schema.STR = ""
+    schema.APP_CONFIG = CN()
+    schema.APP_CONFIG.APP = "app"
+    schema.APP_CONFIG.ENV = "env"
+    schema.APP_CONFIG.PROFILE = "profile"
+    transform = LoadFromAWSAppConfig("APP_CONFIG", client=client)
+    schema.add_transform(transform)
+    schema.freeze_schema()
+
+    for _ in range(3):
+        cfg = schema.init_cfg()
+        cfg.transform()
+        assert cfg.STR == "from appconfig"
+    assert client.sessions == 1
+    assert client.polls == 1
+    assert transform.poller("app", "env", "profile").get() == {"STR": "from appconfig"}
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pycs import CL, CN
+from pycs.errors import SchemaFrozenError, TypeMismatchError, ValidationError
+from tests.data.node.schema import schema
+from tests.utils import line_number
+
+THIS_FILE = Path(__file__)
+
+
+@pytest.fixture
+def counted_schema() -> CN:
+    counted = schema.inherit()
+    counted.COUNT = 0
+    counted.OPTIONS = CN(int)
+
+    def transform(cfg: CN) -> None:
+        cfg.COUNT += 1
+
+    def validate(cfg: CN) -> None:
+        assert cfg.INT >= 0
+
+    counted.add_transform(transform)
+    counted.add_validator(validate)
+    return counted
+
+
+def test_apply(counted_schema: CN):
+    cfg = counted_schema.init_cfg()
+    cfg.apply({"INT": 1, "NESTED": {"FOO": "baz"}, "OPTIONS.A": 1, "STR": "a"})
+    assert cfg.INT == 1
+    assert cfg.NESTED.FOO == "baz"
+    assert cfg.OPTIONS.A == 1
+    assert cfg.COUNT == 1
+
+
+def test_apply_checks_first(counted_schema: CN):
+    cfg = counted_schema.init_cfg()
+    with pytest.raises(TypeMismatchError):
+        cfg.apply({"INT": 1, "STR": 1})
+    with pytest.raises(SchemaFrozenError):
+        cfg.apply({"INT": 1, "NEW": 1})
+    with pytest.raises(TypeMismatchError):
+        cfg.apply({"INT": 1, "OPTIONS": {"A": "a"}})
+    with pytest.raises(KeyError):
+        cfg.apply({"INT": 1, "MISSING.A": 1})
+    assert cfg.INT == 0
+    assert cfg.COUNT == 0
+
+
+def test_rollback(counted_schema: CN):
+    cfg = counted_schema.init_cfg()
+    cfg.OPTIONS.A = 1
+    with pytest.raises(ValidationError):
+        cfg.apply({"INT": -1, "STR": "a", "OPTIONS": {"A": 2, "B": 2}})
+    assert cfg.to_dict() == {**counted_schema.to_dict(), "OPTIONS": {"A": 1}}
+    assert "B" not in cfg.OPTIONS
+
+
+def test_rollback_on_error_in_block():
+    cfg = CN()
+    cfg.INT = 0
+    cfg.EMPTY = CN()
+    cfg.REMOVED = 1
+    cfg.freeze_schema(compiled=True)
+    empty = cfg.EMPTY
+
+    def change() -> None:
+        with cfg.batch():
+            cfg.INT = 1
+            cfg.INT = 2
+            cfg.EMPTY = CN({"FOO": 1})
+            del cfg.REMOVED
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        change()
+    assert cfg.INT == 0
+    assert cfg.EMPTY is empty
+    assert cfg.REMOVED == 1
+    assert cfg.__dict__["INT"] == 0
+
+
+def test_nested_batch(counted_schema: CN):
+    cfg = counted_schema.init_cfg()
+    with cfg.batch():
+        cfg.INT = 1
+        with cfg.NESTED.batch():
+            cfg.NESTED.FOO = "baz"
+        assert cfg.COUNT == 0
+    assert cfg.COUNT == 1
+
+
+def test_batch_provenance():
+    cfg = schema.static_init()
+    cfg.set_provenance("full")
+    length = len(cfg._module)  # noqa: SLF001
+    with cfg.batch():  # Single comment
+        cfg.INT = 1
+        cfg.NESTED.FOO = "baz"
+        cfg.INT = 2
+    source = "    with cfg.batch():  # Single comment"
+    assert cfg._module[length:] == [  # noqa: SLF001
+        f"# {THIS_FILE}:{line_number(THIS_FILE, source)} {source}\n",
+        "cfg.INT = 2\n",
+        "cfg.NESTED.FOO = 'baz'\n",
+    ]
+
+    cfg = schema.static_init()
+    length = len(cfg._module)  # noqa: SLF001
+    with pytest.raises(TypeMismatchError):
+        cfg.apply({"INT": 1, "STR": 1})
+
+    def change() -> None:
+        with cfg.batch():
+            cfg.INT = 1
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        change()
+    assert len(cfg._module) == length  # noqa: SLF001
+
+
+def test_apply_leaf_spec_node():
+    cfg = CN()
+    cfg.TYPES = CN(CL(None, int, required=True))
+    cfg.freeze_schema()
+    cfg.apply({"TYPES": {"A": 1}})
+    assert cfg.TYPES.A == 1
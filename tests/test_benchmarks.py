@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.schemas import SHAPES, build, leaf_paths, overrides
+from benchmarks.suite import compare
+
+
+@pytest.mark.parametrize("shape_name", SHAPES)
+def test_shapes(shape_name: str):
+    schema = build(shape_name, 50)
+    assert len(leaf_paths(schema)) == 50
+
+    cfg = schema.init_cfg()
+    cfg.update(overrides(cfg, fraction=0.5))
+    assert cfg != schema
+
+
+def test_compare():
+    baseline = {"results": {"wide/10/clone": 1.0, "wide/10/to_dict": 1.0, "wide/10/str": 1.0}}
+    current = {"results": {"wide/10/clone": 1.1, "wide/10/to_dict": 2.0, "wide/10/new": 1.0}}
+
+    lines, regressed = compare(baseline, current, threshold=1.2)
+    assert regressed
+    assert len(lines) == 3
+    assert "REGRESSED" in lines[2]
+
+    _, regressed = compare(baseline, current, threshold=2.5)
+    assert not regressed
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import pickle  # noqa: S403
+import stat
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from pycs import CN
+from pycs.cache import ResolvedConfigCache
+from pycs.utils import invalidate_module_cache
+from tests.utils import executed, write_lines
+
+SCHEMA = """from pathlib import Path
+
+from pycs import CN
+from pycs.transforms import LoadFromEnvVars, LoadFromFile, non_cacheable
+
+from .counter import EXECUTED
+
+schema = CN()
+schema.VALUE = 0
+schema.FILE_VALUE = 0
+schema.ENV_VALUE = 0
+schema.TRANSFORMED = 0
+
+
+def transform(cfg: CN) -> None:
+    EXECUTED.append("transform")
+    cfg.TRANSFORMED += 1
+
+
+@non_cacheable
+def uncached(cfg: CN) -> None:
+    pass
+
+
+schema.add_transform(transform)
+schema.add_transform(LoadFromFile(Path(__file__).parent / "data.yaml"))
+schema.add_transform(LoadFromEnvVars("{prefix}"))
+"""
+
+
+@pytest.fixture
+def package(make_package: Callable[[dict[str, str]], Path]) -> Path:
+    package = make_package({"data.yaml": "FILE_VALUE: 1\n"})
+    (package / "schema.py").write_text(SCHEMA.replace("{prefix}", _env_prefix(package)))
+    _write_cfg(package, 1)
+    return package
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ResolvedConfigCache:
+    return ResolvedConfigCache(tmp_path / "cache")
+
+
+def _env_prefix(package: Path) -> str:
+    return f"{package.name.upper()}__"
+
+
+def _write_cfg(package: Path, value: int) -> None:
+    lines = [
+        "from .counter import EXECUTED",
+        "from .schema import schema",
+        "",
+        "EXECUTED.append('module')",
+        "cfg = schema.init_cfg()",
+        f"cfg.VALUE = {value}",
+    ]
+    write_lines(package / "cfg.py", lines)
+    invalidate_module_cache()
+
+
+def test_hit(package: Path, cache: ResolvedConfigCache, tmp_path: Path):
+    cfg = CN.load(package / "cfg.py", cache=cache)
+    invalidate_module_cache()
+    cached = CN.load(package / "cfg.py", cache=cache)
+    assert executed(package) == ["module", "transform"]
+    assert cached == cfg
+    assert cached.TRANSFORMED == 1
+    assert cached.FILE_VALUE == 1
+    cached.save(tmp_path / "saved.py")
+    assert "cfg.VALUE = 1\n" in (tmp_path / "saved.py").read_text()
+
+
+def test_changed_config(package: Path, cache: ResolvedConfigCache):
+    CN.load(package / "cfg.py", cache=cache)
+    _write_cfg(package, 2)
+    assert CN.load(package / "cfg.py", cache=cache).VALUE == 2
+    assert executed(package).count("module") == 2
+
+
+def test_changed_data_file(package: Path, cache: ResolvedConfigCache):
+    CN.load(package / "cfg.py", cache=cache)
+    (package / "data.yaml").write_text("FILE_VALUE: 2\n")
+    assert CN.load(package / "cfg.py", cache=cache).FILE_VALUE == 2
+
+
+def test_changed_env(package: Path, cache: ResolvedConfigCache, monkeypatch: pytest.MonkeyPatch):
+    CN.load(package / "cfg.py", cache=cache)
+    monkeypatch.setenv(f"{_env_prefix(package)}ENV_VALUE", "3")
+    assert CN.load(package / "cfg.py", cache=cache).ENV_VALUE == 3
+    assert CN.load(package / "cfg.py", cache=cache).ENV_VALUE == 3
+    assert executed(package).count("transform") == 2
+
+
+def test_non_cacheable(package: Path, cache: ResolvedConfigCache):
+    (package / "schema.py").write_text((package / "schema.py").read_text() + "schema.add_transform(uncached)\n")
+    CN.load(package / "cfg.py", cache=cache)
+    CN.load(package / "cfg.py", cache=cache)
+    assert executed(package).count("transform") == 2
+    assert not list((cache.directory / "entries").glob("*"))
+
+
+def test_corrupt_entry(package: Path, cache: ResolvedConfigCache):
+    CN.load(package / "cfg.py", cache=cache)
+    (entry,) = (cache.directory / "entries").glob("*.pkl")
+    entry.write_bytes(b"corrupt")
+    assert cache.get(package / "cfg.py") is None
+    assert not entry.exists()
+    assert CN.load(package / "cfg.py", cache=cache).VALUE == 1
+
+
+def test_permissions(package: Path, cache: ResolvedConfigCache, monkeypatch: pytest.MonkeyPatch):
+    cache.directory.mkdir(mode=0o777)
+    cache.directory.chmod(0o777)
+    CN.load(package / "cfg.py", cache=cache)
+    for directory in (cache.directory, cache.directory / "entries", cache.directory / "manifests"):
+        assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+    (entry,) = (cache.directory / "entries").glob("*.pkl")
+    assert stat.S_IMODE(entry.stat().st_mode) == 0o600
+
+    # Entry which could have been written by another user is not unpickled
+    entry.chmod(0o666)
+    monkeypatch.setattr(pickle, "load", lambda _: pytest.fail("Should not be unpickled"))
+    assert cache.get(package / "cfg.py") is None
+    assert not entry.exists()
+
+    monkeypatch.setattr("os.getuid", lambda: cache.directory.stat().st_uid + 1)
+    with pytest.raises(PermissionError, match="another user"):
+        cache.get(package / "cfg.py")
+
+
+def test_eviction(package: Path, tmp_path: Path):
+    size = len(pickle.dumps(CN.load(package / "cfg.py"), protocol=pickle.HIGHEST_PROTOCOL))
+    cache = ResolvedConfigCache(tmp_path / "cache", max_size=int(size * 1.5))
+    for value in range(3):
+        _write_cfg(package, value)
+        CN.load(package / "cfg.py", cache=cache)
+    assert len(list((cache.directory / "entries").glob("*.pkl"))) == 1
+    assert cache.get(package / "cfg.py").VALUE == 2
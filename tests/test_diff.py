@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import pytest
+
+from pycs import CN
+from pycs.errors import ValidationError
+from tests.data.node.schema import schema
+
+
+@pytest.fixture
+def cfg() -> CN:
+    cfg = schema.inherit()
+    cfg.OPTIONS = CN(int)
+    cfg.OPTIONS.A = 1
+
+    def validate(cfg: CN) -> None:
+        assert cfg.INT >= 0
+
+    cfg.add_validator(validate)
+    return cfg.init_cfg()
+
+
+def test_diff(cfg: CN):
+    other = cfg.clone()
+    other.INT = 1
+    other.NESTED.FOO = "baz"
+    other.OPTIONS.B = 2
+    del other.OPTIONS["A"]
+    diff = cfg.diff(other)
+    assert diff.changed == {"INT": (0, 1), "NESTED.FOO": ("bar", "baz")}
+    assert diff.added == {"OPTIONS.B": 2}
+    assert diff.removed == {"OPTIONS.A": 1}
+    assert not cfg.diff(cfg.clone())
+
+    cfg.patch(diff)
+    assert cfg == other
+    assert not cfg.diff(other)
+
+
+def test_diff_node(cfg: CN):
+    cfg.unfreeze_schema()
+    other = cfg.clone()
+    other.NEW = CN()
+    other.NEW.FOO = 1
+    del other["NESTED"]
+    diff = cfg.diff(other)
+    assert diff.added["NEW"].to_dict() == {"FOO": 1}
+    assert diff.removed == {"NESTED": {"FOO": "bar"}}
+    cfg.patch(diff, propagate=False)
+    assert cfg == other
+
+
+def test_skip_shared_subtrees(cfg: CN, monkeypatch: pytest.MonkeyPatch):
+    other = cfg.clone()
+    other.INT = 1
+    other.freeze()
+    cfg.freeze()
+    assert cfg.diff(other).changed == {"INT": (0, 1)}  # Digests are computed once and cached
+    nested, other_nested, cow = cfg.NESTED, other.NESTED, cfg.clone(cow=True)
+    fail = property(lambda _: pytest.fail("Unchanged nodes shouldn't be traversed"))
+    monkeypatch.setattr(CN, "data", fail, raising=False)
+    assert not nested.diff(other_nested)
+    assert not cfg.diff(cow)
+
+
+def test_patch_rollback(cfg: CN):
+    other = cfg.clone()
+    other.INT = -1
+    other.STR = "a"
+    with pytest.raises(ValidationError):
+        cfg.patch(cfg.diff(other))
+    assert cfg.INT == 0
+    assert cfg.STR == ""
+
+
+def test_diff_mutated_value():
+    cfg = CN()
+    cfg.LIST = [1, 2]
+    cfg.FUNC = lambda: 1
+    other = cfg.clone()
+    other.FUNC = lambda: 2
+    for node in (cfg, other):
+        node.freeze()
+    assert other.diff(cfg).changed.keys() == {"FUNC"}
+
+    other.LIST.append(3)  # Values are not frozen, so digest of the node can't be reused
+    assert other.diff(cfg).changed.keys() == {"FUNC", "LIST"}
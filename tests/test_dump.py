@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+import yaml
+
+from pycs import CN
+from pycs.dump import ConfigDumper
+
+
+class Quux:
+    def __str__(self):
+        return "quux"
+
+
+@pytest.fixture()
+def cfg() -> CN:
+    cfg = CN()
+    cfg.INT = 32
+    cfg.NESTED = CN()
+    cfg.NESTED.STR = "baz"
+    cfg.NESTED.LIST = [1, {"a": [2, 3]}]
+    cfg.NESTED.EMPTY = CN()
+    cfg.FLOAT = 1.5
+    cfg.NONE = None
+    cfg.QUUX = Quux()
+    return cfg
+
+
+def _dump(cfg: CN, **kwargs) -> str:
+    buffer = io.StringIO()
+    cfg.dump(buffer, **kwargs)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("sort_keys", [True, False])
+def test_yaml(cfg: CN, sort_keys):
+    expected = yaml.dump(cfg.to_dict(), Dumper=ConfigDumper, sort_keys=sort_keys)
+    assert _dump(cfg, sort_keys=sort_keys) == expected
+    assert yaml.safe_load(expected)["QUUX"] == "quux"
+
+
+@pytest.mark.parametrize("sort_keys", [True, False])
+def test_json(cfg: CN, sort_keys):
+    expected = json.dumps(cfg.to_dict(), indent=2, default=str, sort_keys=sort_keys) + "\n"
+    assert _dump(cfg, format="json", sort_keys=sort_keys) == expected
+    assert _dump(CN(), format="json") == "{}\n"
+
+
+def test_global_representers_unchanged(cfg: CN):
+    str(cfg)
+    with pytest.raises(yaml.representer.RepresenterError):
+        yaml.safe_dump(Quux())
+    assert "quux" not in yaml.dump(Quux())
+
+
+def test_cache(monkeypatch: pytest.MonkeyPatch):
+    cfg = CN()
+    cfg.INT = 32
+    cfg.NESTED = CN()
+    cfg.NESTED.TUPLE = (1, "a")
+    expected = _dump(cfg, format="json")
+    cfg.freeze()
+    assert _dump(cfg, format="json", cache=True) == expected
+    # Cached text is written without walking the config
+    monkeypatch.setattr("pycs.dump.dump", None)
+    assert _dump(cfg, format="json", cache=True) == expected
+    with pytest.raises(TypeError):
+        _dump(cfg, format="json")
+
+
+def test_cow(cfg: CN):
+    clone = cfg.clone(cow=True)
+    assert _dump(clone) == _dump(cfg)
+    assert clone._cow_source is cfg  # noqa: SLF001 Children are not created
+
+
+def test_unknown_format(cfg: CN):
+    with pytest.raises(ValueError, match="format"):
+        _dump(cfg, format="xml")
+
+
+def test_cache_mutable_value(cfg: CN):
+    cfg.freeze()
+    cfg.NESTED.dump(io.StringIO(), cache=True)
+    cfg.NESTED.LIST.append(4)  # Values are not frozen
+    assert "- 4" in _dump(cfg.NESTED, cache=True)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import subprocess  # noqa: S404
+import sys
+
+# Only needed for saving, data files or __str__, should be imported when used
+LAZY_MODULES = ("isort", "yaml", "json", "inspect", "logging", "argparse")
+# Cumulative time of `import pycs` in microseconds, generous to avoid flaky failures on slow machines
+IMPORT_TIME_BUDGET = 100_000
+
+
+def _import_times() -> dict[str, int]:
+    """Cumulative import time in microseconds for every module imported by `import pycs`"""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", "import pycs"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_lazy_imports():
+    imported = _import_times()
+    assert "pycs" in imported
+    assert not [name for name in LAZY_MODULES if name in imported]
+
+
+def test_import_time_budget():
+    best = min(_import_times()["pycs"] for _ in range(3))
+    assert best < IMPORT_TIME_BUDGET
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+import yaml
+
+from pycs import loaders
+from pycs.transforms import LoadFromFile
+from tests.data.node.schema import schema
+
+DATA_DIR = Path(__file__).parent / "data" / "node"
+
+
+@pytest.fixture()
+def _ini_loader():
+    loaders.register_loader(".ini", lambda path: dict(line.split("=") for line in path.read_text().splitlines()))
+    yield
+    del loaders._LOADERS[".ini"]  # noqa: SLF001 Restore registry
+
+
+@pytest.mark.usefixtures("_ini_loader")
+def test_register_loader(tmp_path: Path):
+    data_file = tmp_path / "data.ini"
+    data_file.write_text("NAME=ini\nSTR=ini")
+    cfg = schema.load_from_data_file(data_file)
+    assert cfg.NAME == "ini"
+    assert cfg.STR == "ini"
+
+    with pytest.raises(ValueError, match="already registered"):
+        loaders.register_loader(".ini", loaders.load_yaml)
+
+
+def test_unknown_suffix(tmp_path: Path):
+    data_file = tmp_path / "data.txt"
+    data_file.write_text("STR: txt")
+    with pytest.raises(ValueError, match="suffix '.txt'"):
+        schema.load_from_data_file(data_file)
+
+
+@pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML is built without libyaml")
+def test_yaml_loader():
+    assert loaders.yaml_loader() is yaml.CSafeLoader
+
+
+def test_unsafe_yaml(tmp_path: Path):
+    data_file = tmp_path / "data.yaml"
+    data_file.write_text("STR: !!python/object/apply:os.getcwd []")
+    with pytest.raises(yaml.constructor.ConstructorError):
+        schema.load_from_data_file(data_file)
+
+
+def test_msgpack(tmp_path: Path):
+    msgpack = pytest.importorskip("msgpack")
+    data_file = tmp_path / "data.msgpack"
+    data_file.write_bytes(msgpack.packb(json.loads((DATA_DIR / "json_data.json").read_text())))
+    cfg = schema.load_from_data_file(data_file)
+    assert cfg.STR == "json"
+    assert cfg.NESTED.FOO == "zoo"
+
+
+def test_load_from_file_transform():
+    cfg = schema.init_cfg()
+    LoadFromFile(DATA_DIR / "toml_data.toml")(cfg)
+    assert cfg.STR == "toml"
+    assert cfg.NESTED.FOO == "zoo"
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Callable
+
+import isort
+import pytest
+
+from pycs import CN
+from pycs.errors import SaveError
+from pycs.utils import invalidate_module_cache
+from tests.utils import executed, write_lines
+
+
+@pytest.fixture
+def package(make_package: Callable[[dict[str, str]], Path]) -> Path:
+    package = make_package(
+        {
+            "schema.py": "from pycs import CN\n\nschema = CN()\nschema.VALUE = 0\nschema.BASE = 0\n",
+            "base.py": "from .schema import schema\n\ncfg = schema.init_cfg()\ncfg.BASE = 1\n",
+        },
+    )
+    _write_cfg(package, 1)
+    return package
+
+
+def _write_cfg(package: Path, value: int) -> None:
+    lines = [
+        "from .base import cfg",
+        "from .counter import EXECUTED",
+        "",
+        "EXECUTED.append(1)",
+        "cfg = cfg.clone()",
+        f"cfg.VALUE = {value}",
+    ]
+    write_lines(package / "cfg.py", lines)
+
+
+def _touch(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reuse_module(package: Path):
+    cfg = CN.load(package / "cfg.py")
+    assert cfg.VALUE == 1
+    assert cfg.BASE == 1
+    cfg.VALUE = 2
+
+    other = CN.load(package / "cfg.py")
+    assert len(executed(package)) == 1
+    assert other.VALUE == 1
+    assert other is not cfg
+    assert other._module == cfg._module[: len(other._module)]  # noqa: SLF001
+
+
+def test_changed_module(package: Path):
+    CN.load(package / "cfg.py")
+    _write_cfg(package, 10)
+    _touch(package / "cfg.py")
+    cfg = CN.load(package / "cfg.py")
+    assert len(executed(package)) == 2
+    assert cfg.VALUE == 10
+    assert "cfg.VALUE = 10\n" in str(cfg._module[0])  # noqa: SLF001
+
+
+def test_changed_dependency(package: Path):
+    CN.load(package / "cfg.py")
+    base = package / "base.py"
+    base.write_text(base.read_text().replace("cfg.BASE = 1", "cfg.BASE = 2"))
+    _touch(base)
+    cfg = CN.load(package / "cfg.py")
+    assert cfg.BASE == 2
+
+
+def test_invalidate(package: Path):
+    CN.load(package / "cfg.py")
+    invalidate_module_cache()
+    CN.load(package / "cfg.py")
+    assert len(executed(package)) == 2
+
+    invalidate_module_cache(package / "cfg.py")
+    CN.load(package / "cfg.py")
+    assert len(executed(package)) == 3
+
+
+def test_lazy_merge(package: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(isort, "code", lambda _: pytest.fail("Merged source should only be generated on save"))
+        cfg = CN.load(package / "cfg.py")
+    calls = []
+    code = isort.code
+    monkeypatch.setattr(isort, "code", lambda text: calls.append(text) or code(text))
+    cfg.save(tmp_path / "saved1.py")
+    CN.load(package / "cfg.py").save(tmp_path / "saved2.py")
+    assert len(calls) == 2  # Once for each module in the chain
+    saved = (tmp_path / "saved1.py").read_text()
+    assert saved == (tmp_path / "saved2.py").read_text()
+    assert "cfg.BASE = 1\n" in saved
+    assert "cfg.VALUE = 1\n" in saved
+
+
+def test_save_changed_source(package: Path, tmp_path: Path):
+    cfg = CN.load(package / "cfg.py")
+    _write_cfg(package, 10)
+    with pytest.raises(SaveError, match="changed"):
+        cfg.save(tmp_path / "saved.py")
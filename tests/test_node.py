@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import subprocess  # noqa: S404
+import sys
 from pathlib import Path
 
 import pytest
@@ -317,7 +319,10 @@ class TestCfgNodeUpdate:
         assert cfg.new == "bar"
 
 
-@pytest.mark.parametrize("filename", ["json_data.json", "yaml_data.yaml", "python_data.py"])
+@pytest.mark.parametrize(
+    "filename",
+    ["json_data.json", "yaml_data.yaml", "yml_data.yml", "toml_data.toml", "python_data.py"],
+)
 def test_load_from_data_file(basic_cfg, filename):
     cfg_path = DATA_DIR / filename
     cfg = basic_cfg.load_from_data_file(cfg_path)
@@ -396,7 +401,376 @@ def test_cache(basic_cfg: CN):
     assert hash(cfg1) != hash(cfg3)
 
 
-@pytest.mark.parametrize("filename", ["json_data.json", "yaml_data.yaml", "python_data.py", "cfg.py", None])
+@pytest.mark.parametrize(
+    "filename",
+    ["json_data.json", "yaml_data.yaml", "yml_data.yml", "toml_data.toml", "python_data.py", "cfg.py", None],
+)
 def test_load_or_static(basic_cfg, filename):
     cfg = basic_cfg.load_or_static(DATA_DIR / filename if filename else filename)
     assert isinstance(cfg, CN)
+    if filename in ("yml_data.yml", "toml_data.toml"):
+        assert Path(filename).suffix == f".{cfg.STR}"
+
+
+def test_static_module():
+    assert test_schema._static_module == [  # noqa: SLF001
+        "from tests.data.node.schema import schema\n",
+        "\n",
+        "\n",
+        "cfg = schema.init_cfg()\n",
+    ]
+    assert CN()._static_module is None  # noqa: SLF001 Not defined at module level
+
+
+def test_internal_construction_skips_module_detection(monkeypatch):
+    def fail(_):
+        raise AssertionError("Module detection should not run")
+
+    monkeypatch.setattr("pycs.node._get_module_and_var", fail)
+    cfg = test_schema.init_cfg()
+    assert cfg._static_module == test_schema._static_module  # noqa: SLF001
+    assert CN._create({"FOO": {"BAR": 1}}).FOO.BAR == 1  # noqa: SLF001
+
+
+def test_compiled(basic_cfg: CN):
+    basic_cfg.LIST = CN(new_allowed=True)
+    basic_cfg.keys = "keys"  # Shadowed by method, so should not be stored on instance
+    cfg = basic_cfg.init_cfg()
+    cfg.freeze_schema(compiled=True)
+    assert cfg.compiled
+    assert cfg.NESTED.compiled
+    assert "FOO" in vars(cfg)
+    assert "keys" not in vars(cfg)
+
+    cfg.FOO = 42
+    cfg.NESTED.FOO = "baz"
+    cfg.LIST.NEW = 1
+    assert cfg.FOO == cfg["FOO"] == 42
+    assert cfg.NESTED.FOO == "baz"
+    assert cfg.LIST.NEW == 1
+    assert cfg.get_raw("keys").value == "keys"
+
+    del cfg.LIST["NEW"]
+    with pytest.raises(AttributeError):
+        cfg.LIST.NEW  # noqa: B018 Not useless, since it raises the error
+
+    clone = cfg.clone()
+    assert clone.compiled
+    assert clone.FOO == 42
+
+    cfg.unfreeze_schema()
+    assert not cfg.compiled
+    assert "FOO" not in vars(cfg)
+    assert cfg.FOO == 42
+
+
+def test_full_key_cache():
+    part_cfg = CN()
+    part_cfg.FOO = CN()
+    part_cfg.FOO.BAR = "bar"
+    assert part_cfg.FOO.get_raw("BAR").full_key == "cfg.FOO.BAR"
+
+    cfg = CN()
+    cfg.TEST = part_cfg
+    assert cfg.TEST.FOO.get_raw("BAR").full_key == "cfg.TEST.FOO.BAR"
+
+
+def test_path(basic_cfg: CN):
+    assert basic_cfg.get_path("NESTED.FOO") == "bar"
+    assert basic_cfg.NESTED.get_path("FOO") == "bar"
+    assert basic_cfg.get_path("NESTED") is basic_cfg.NESTED
+
+    basic_cfg.set_path("NESTED.FOO", "baz")
+    assert basic_cfg.NESTED.FOO == "baz"
+    with pytest.raises(TypeMismatchError):
+        basic_cfg.set_path("NESTED.FOO", 1)
+
+    # Index is updated when structure changes
+    basic_cfg.NESTED.NEW = CN()
+    basic_cfg.set_path("NESTED.NEW.DEEP", 1)
+    assert basic_cfg.get_path("NESTED.NEW.DEEP") == 1
+    del basic_cfg.NESTED["NEW"]
+    with pytest.raises(KeyError):
+        basic_cfg.get_path("NESTED.NEW.DEEP")
+    with pytest.raises(KeyError):
+        basic_cfg.set_path("FOO.BAR", 1)
+
+
+def test_accessor(basic_cfg: CN):
+    get_foo = basic_cfg.accessor("NESTED.FOO")
+    assert get_foo() == "bar"
+    basic_cfg.NESTED.FOO = "baz"
+    assert get_foo() == "baz"
+    assert basic_cfg.accessor("NESTED")() is basic_cfg.NESTED
+
+
+def test_path_nested_index(basic_cfg: CN):
+    assert basic_cfg.get_path("NESTED.FOO") == "bar"
+    assert basic_cfg.NESTED.get_path("FOO") == "bar"
+    basic_cfg.NESTED.NEW = 1
+    assert basic_cfg.NESTED.get_path("NEW") == 1
+    assert basic_cfg.get_path("NESTED.NEW") == 1
+
+
+def test_digest():
+    cfg = test_schema.static_init()
+    # Same in every process, unlike hash()
+    code = "from tests.data.node.schema import schema; print(schema.static_init().digest())"
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=Path(__file__).parents[1])  # noqa: S603
+    assert output.decode().strip() == cfg.digest()
+
+    other = test_schema.static_init()
+    assert other.digest() == cfg.digest()
+    other.NESTED.FOO = "baz"
+    assert other.digest() != cfg.digest()
+
+    reordered = CN()
+    reordered.B = CN()
+    reordered.B.C = 1.0
+    reordered.A = 1
+    ordered = CN()
+    ordered.A = 1
+    ordered.B = CN()
+    ordered.B.C = 1.0
+    assert reordered.digest() == ordered.digest()
+    ordered.B.C = 2.0
+    assert reordered.digest() != ordered.digest()
+
+
+def test_digest_cache():
+    cfg = test_schema.static_init()
+    digest = cfg.digest()
+    cfg.INT = 1
+    assert cfg.digest() != digest
+
+    cfg.freeze()
+    digest = cfg.digest()
+    assert cfg._digest_cache is False  # noqa: SLF001 CUSTOM can be changed in place
+    assert cfg.NESTED._digest_cache == cfg.NESTED.digest()  # noqa: SLF001
+    assert cfg.clone()._digest_cache is None  # noqa: SLF001
+    assert cfg.clone().digest() == digest
+
+
+def test_digest_unsupported_value():
+    cfg = CN()
+    cfg.FOO = slice(1, 2)
+    with pytest.raises(TypeError, match="stable digest"):
+        cfg.digest()
+
+
+class MyStr(str):
+    pass
+
+
+def test_digest_values():
+    def digest(value) -> str:
+        cfg = CN()
+        cfg.VALUE = value
+        return cfg.digest()
+
+    assert digest(MyStr("a")) != digest(MyStr("b"))
+    assert digest(MyStr("a")) != digest("a")
+    with pytest.raises(TypeError, match="stable digest"):
+        digest(lambda: 1)
+
+
+def test_eq_values():
+    def frozen(value) -> CN:
+        cfg = CN()
+        cfg.VALUE = value
+        cfg.freeze()
+        return cfg
+
+    assert frozen(lambda: 1) != frozen(lambda: 2)
+    assert frozen(MyStr("a")) != frozen(MyStr("b"))
+    assert frozen(float("nan")) != frozen(float("nan"))
+
+    cfg1, cfg2 = frozen([1, 2]), frozen([1, 2])
+    assert cfg1 == cfg2
+    cfg1.VALUE.append(3)  # Values are not frozen
+    assert cfg1 != cfg2
+    assert cfg1.digest() != cfg2.digest()
+
+
+def test_eq_deep():
+    cfg1, cfg2 = CN(), CN()
+    for cfg in (cfg1, cfg2):
+        node = cfg
+        for _ in range(3000):
+            node.NEXT = CN()
+            node = node.NEXT
+        node.LEAF = 1
+    assert cfg1 == cfg2
+    assert cfg1.digest() == cfg2.digest()
+    node.LEAF = 2
+    assert cfg1 != cfg2
+    assert cfg1.digest() != cfg2.digest()
+
+
+def test_eq_with_digest(monkeypatch):
+    cfg1 = test_schema.static_init()
+    cfg2 = test_schema.static_init()
+    cfg3 = test_schema.static_init()
+    cfg3.NESTED.FOO = "baz"
+    for cfg in (cfg1, cfg2, cfg3):
+        cfg.freeze()
+
+    # Frozen configs are compared by digests of their subtrees
+    monkeypatch.setattr(CN, "to_dict", lambda _: pytest.fail("Should not be called"))
+    assert cfg1 == cfg2
+    assert cfg1 != cfg3
+    assert cfg1 != 1
+
+
+def test_eq_without_digest():
+    cfg1 = CN()
+    cfg1.FOO = slice(1, 2)
+    cfg1.NESTED = CN()
+    cfg1.NESTED.BAR = 1
+    cfg2 = cfg1.clone()
+    cfg3 = cfg1.clone()
+    cfg3.NESTED.BAR = 2
+    for cfg in (cfg1, cfg2, cfg3):
+        cfg.freeze()
+    assert cfg1 == cfg2
+    assert cfg1 != cfg3
+
+
+def _materialized(node: CN) -> bool:
+    return "data" in node.__dict__
+
+
+def test_clone_cow(basic_cfg: CN):
+    basic_cfg.LIST = [1]
+    basic_cfg.OTHER = CN()
+    basic_cfg.OTHER.BAR = 1
+    schema = basic_cfg.clone()
+
+    cfg = schema.init_cfg(cow=True)
+    assert not _materialized(cfg)
+    assert cfg.to_dict() == schema.to_dict()
+    assert cfg.digest() == schema.digest()
+    assert cfg == schema
+    assert not _materialized(cfg)
+
+    cfg.NESTED.FOO = "baz"
+    assert _materialized(cfg)
+    assert _materialized(cfg.NESTED)
+    assert not _materialized(cfg.get_raw("OTHER"))
+    assert cfg.NESTED.full_key == "cfg.NESTED"
+    assert cfg.NESTED.FOO == "baz"
+    assert schema.NESTED.FOO == "bar"
+    assert cfg != schema
+
+    # Mutable values are not shared
+    cfg.LIST.append(2)
+    assert schema.LIST == [1]
+
+    # Schema of nested nodes is frozen as well
+    with pytest.raises(SchemaFrozenError):
+        cfg.OTHER.NEW = 1
+    cfg.freeze()
+    with pytest.raises(FrozenError):
+        cfg.OTHER.BAR = 2
+    assert cfg.OTHER.frozen
+    assert not schema.OTHER.frozen
+
+    # Clone of clone
+    cfg2 = cfg.clone(cow=True)
+    assert cfg2.frozen
+    assert cfg2.NESTED.FOO == "baz"
+    assert cfg2 == cfg
+
+
+def test_clone_cow_reads(basic_cfg: CN):
+    basic_cfg.LIST = [1]
+    cfg = basic_cfg.clone(cow=True)
+    assert cfg.FOO == 32
+    assert "NESTED" in cfg
+    assert len(cfg) == len(basic_cfg)
+    assert not _materialized(cfg)
+
+    # Nested node is a clone as well, so it can be returned without creating its children
+    assert cfg.NESTED.FOO == "bar"
+    assert list(cfg.NESTED) == ["FOO"]
+    assert _materialized(cfg)
+    assert not _materialized(cfg.get_raw("NESTED"))
+
+    # Mutable values could be changed in place, so they are copied
+    other = basic_cfg.clone(cow=True)
+    other.LIST.append(2)
+    assert _materialized(other)
+    assert basic_cfg.LIST == [1]
+
+
+def test_clone_cow_source_changed(basic_cfg: CN):
+    cfg = basic_cfg.clone(cow=True)
+    clone_of_clone = cfg.clone(cow=True)
+    basic_cfg.NESTED.FOO = "changed"
+    basic_cfg.NEW = 1
+    assert cfg.NESTED.FOO == clone_of_clone.NESTED.FOO == "bar"
+    assert "NEW" not in cfg
+    assert "NEW" not in clone_of_clone
+
+    cfg = basic_cfg.clone(cow=True)
+    basic_cfg.apply({"INT": 1}, propagate=False)
+    assert cfg.INT == 0
+
+    # Clone is copied before the source is frozen, so it keeps its own flags
+    nested = basic_cfg.NESTED.clone(cow=True)
+    basic_cfg.freeze()
+    nested.FOO = "baz"
+    assert nested.FOO == "baz"
+    assert basic_cfg.NESTED.FOO == "changed"
+
+
+def test_inherit_cow(basic_cfg: CN):
+    schema = basic_cfg.inherit(cow=True)
+    schema.NESTED.NEW = 1
+    cfg = schema.init_cfg(cow=True)
+    cfg.freeze_schema(compiled=True)
+    assert cfg.NESTED.NEW == 1
+    # Values are read from the schema until children are created
+    assert "NEW" not in cfg.NESTED.__dict__
+    cfg.NESTED.get_raw("NEW")
+    assert "NEW" in cfg.NESTED.__dict__
+    assert "NEW" not in basic_cfg.NESTED
+
+
+def test_walk():
+    cfg = CN()
+    cfg.A = 1
+    cfg.NESTED = CN()
+    cfg.NESTED.B = 2
+    cfg.C = 3
+    assert [key for key, _ in cfg.walk()] == ["cfg", "cfg.A", "cfg.NESTED", "cfg.NESTED.B", "cfg.C"]
+    assert [key for key, _ in cfg.walk("post")] == ["cfg.A", "cfg.NESTED.B", "cfg.NESTED", "cfg.C", "cfg"]
+    assert [key for key, _ in cfg.NESTED.walk()] == ["cfg.NESTED", "cfg.NESTED.B"]
+    attrs = dict(cfg.walk())
+    assert attrs["cfg"] is cfg
+    assert attrs["cfg.NESTED.B"].value == 2
+    with pytest.raises(ValueError, match="order"):
+        cfg.walk("in")
+
+
+def test_deep_config():
+    depth = sys.getrecursionlimit() * 2
+    schema = CN()
+    node = schema
+    for idx in range(depth):
+        node.NEXT = CN()
+        node = node.NEXT
+        node.LEAF = idx
+
+    cfg = schema.init_cfg()
+    cfg.transform()
+    cfg.validate()
+    cfg.run_hooks()
+    cfg.freeze()
+    assert sum(1 for _ in cfg.walk("post")) == depth * 2 + 1
+    as_dict = cfg.to_dict()
+    for _ in range(depth - 1):
+        as_dict = as_dict["NEXT"]
+    assert as_dict["NEXT"] == {"LEAF": depth - 1}
+    with pytest.raises(ValueError, match="circular"):
+        node.LOOP = schema
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pycs import CN
+from pycs.errors import TypeMismatchError
+from tests.data.node.schema import schema
+
+DATA_DIR = Path(__file__).parent / "data"
+GOOD = [DATA_DIR / "good" / name for name in ("good.py", "list.py", "inheritance_changes.py")]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_load_many(workers: int):
+    results = {
+        result.path: result for result in CN.load_many([*GOOD, DATA_DIR / "bad" / "bad_type.py"], workers=workers)
+    }
+    assert len(results) == len(GOOD) + 1
+    for path in GOOD:
+        assert results[path].error is None
+        assert results[path].cfg == CN.load(path)
+    error = results[DATA_DIR / "bad" / "bad_type.py"].error
+    assert isinstance(error, TypeMismatchError)
+
+
+def test_load_many_data_files(tmp_path: Path):
+    saved = tmp_path / "saved.py"
+    data_files = [DATA_DIR / "node" / "json_data.json", DATA_DIR / "node" / "yaml_data.yaml"]
+    results = list(schema.load_many_data_files(data_files, workers=2, preload=["tests.data.node.schema"]))
+    assert {result.path for result in results} == set(data_files)
+    for result in results:
+        assert result.cfg == schema.load_from_data_file(result.path)
+        result.cfg.save(saved)
+        assert "cfg.NESTED.FOO = 'zoo'\n" in saved.read_text()
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
 import pickle
+from pathlib import Path
 
+import pytest
+
+import pycs.node
 from pycs import CL, CN
+from pycs.errors import SchemaError
+from tests.data.node.schema import schema
 
 # ruff: noqa
 
@@ -26,3 +32,114 @@ def test_node_pickle():
     for attr_name in node._BUILT_IN_ATTRS:  # noqa: SLF001
         assert getattr(node, attr_name) == getattr(unpickled, attr_name)
     assert unpickled.get_raw("STR").full_key == node.get_raw("STR").full_key
+
+
+def test_node_unpickle_skips_module_detection(monkeypatch):
+    node = CN()
+    node.NESTED = CN()
+    node.NESTED.INT = CL(42)
+
+    def fail(_):
+        raise AssertionError("Module detection should not run")
+
+    monkeypatch.setattr("pycs.node._get_module_and_var", fail)
+    assert pickle.loads(pickle.dumps(node)) == node
+
+
+def test_compiled_node_pickle():
+    node = CN()
+    node.INT = CL(42)
+    node.freeze_schema(compiled=True)
+
+    unpickled = pickle.loads(pickle.dumps(node))
+    assert unpickled.compiled
+    assert vars(unpickled)["INT"] == 42
+
+
+def test_compact_pickle():
+    cfg = schema.init_cfg()
+    cfg.INT = 1
+    cfg.NESTED.FOO = "baz"
+    cfg.freeze()
+    reduced = cfg.__reduce__()
+    assert reduced[0] == CN._from_schema
+    assert reduced[1][4] == [(("INT",), 1), (("NESTED", "FOO"), "baz")]
+
+    unpickled = pickle.loads(pickle.dumps(cfg))
+    assert unpickled == cfg
+    assert unpickled.frozen
+    assert unpickled.NESTED.frozen
+    assert len(pickle.dumps(cfg)) < len(pickle.dumps(cfg.to_dict())) * 2
+
+
+def test_compact_pickle_loaded(tmp_path):
+    cfg = CN.load(Path(__file__).parent / "data" / "node" / "cfg.py")
+    unpickled = pickle.loads(pickle.dumps(cfg))
+    assert unpickled == cfg
+    cfg.save(tmp_path / "cfg.py")
+    unpickled.save(tmp_path / "unpickled.py")
+    assert (tmp_path / "cfg.py").read_text() == (tmp_path / "unpickled.py").read_text()
+
+
+def test_compact_pickle_fallback():
+    cfg = schema.inherit()
+    cfg.NEW = 1
+    cfg.freeze_schema()
+    assert cfg.__reduce__()[0] != CN._from_schema
+    assert pickle.loads(pickle.dumps(cfg)) == cfg
+
+
+def test_compact_pickle_changed_schema(monkeypatch):
+    data = pickle.dumps(schema.init_cfg())
+    monkeypatch.setitem(pycs.node._MODULE_DIGESTS, "tests.data.node.schema", "changed")
+    with pytest.raises(SchemaError, match="changed"):
+        pickle.loads(data)
+
+
+def test_compact_pickle_changed_schema_value(monkeypatch):
+    monkeypatch.setattr(schema, "INT", 99)
+    cfg = schema.init_cfg()
+    cfg.freeze()
+    # Value is the same as in the schema, so it isn't stored
+    assert cfg.__reduce__()[1][4] == []
+    data = pickle.dumps(cfg)
+    assert pickle.loads(data).INT == 99
+
+    monkeypatch.setattr(schema, "INT", 0)
+    with pytest.raises(SchemaError, match="changed"):
+        pickle.loads(data)
+
+
+def test_compact_pickle_not_digestible(monkeypatch):
+    def digest(_):
+        raise TypeError("Can't compute digest")
+
+    monkeypatch.setattr(CN, "digest", digest)
+    cfg = schema.init_cfg()
+    cfg.INT = 1
+    assert cfg.__reduce__()[0] != CN._from_schema
+    assert pickle.loads(pickle.dumps(cfg)) == cfg
+
+
+def test_compact_pickle_detached(monkeypatch):
+    cfg = schema.init_cfg()
+    cfg.freeze()
+    unpickled = pickle.loads(pickle.dumps(cfg))
+    monkeypatch.setattr(schema.NESTED, "FOO", "changed")
+    assert unpickled.NESTED.FOO == "bar"
+    assert unpickled.to_dict()["NESTED"]["FOO"] == "bar"
+
+
+def test_compact_pickle_compiled():
+    from tests.data.node.compiled_schema import schema as compiled_schema
+
+    cfg = compiled_schema.init_cfg()
+    cfg.INT = 5
+    cfg.NESTED.STR = "bar"
+    assert cfg.__reduce__()[0] == CN._from_schema
+
+    unpickled = pickle.loads(pickle.dumps(cfg))
+    assert unpickled.compiled
+    assert unpickled.INT == unpickled["INT"] == 5
+    assert unpickled.NESTED.STR == unpickled.NESTED["STR"] == "bar"
+    assert compiled_schema.INT == 1
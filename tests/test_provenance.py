@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pycs import CN
+from pycs.errors import SaveError
+from pycs.node import _SourceRef, set_provenance
+from tests.data.node.schema import schema
+from tests.utils import line_number
+
+THIS_FILE = Path(__file__)
+
+
+@pytest.fixture
+def cfg() -> CN:
+    return schema.static_init()
+
+
+def test_full(cfg: CN):
+    cfg.set_provenance("full")
+    cfg.INT = 2
+
+    comment, line = cfg._module[-2:]  # noqa: SLF001
+    assert comment == f"# {THIS_FILE}:{line_number(THIS_FILE, '    cfg.INT = 2')}     cfg.INT = 2\n"
+    assert line == "cfg.INT = 2\n"
+
+
+def test_lazy(cfg: CN, tmp_path: Path):
+    cfg.set_provenance("lazy")
+    cfg.NESTED.FOO = "baz"
+
+    comment, line = cfg._module[-2:]  # noqa: SLF001
+    lineno = line_number(THIS_FILE, '    cfg.NESTED.FOO = "baz"')
+    assert comment == _SourceRef(str(THIS_FILE), lineno)
+    assert line == "cfg.NESTED.FOO = 'baz'\n"
+
+    save_path = tmp_path / "saved.py"
+    cfg.save(save_path)
+    assert f'# {THIS_FILE}:{lineno}     cfg.NESTED.FOO = "baz"\n' in save_path.read_text()
+    assert CN.load(save_path).NESTED.FOO == "baz"
+
+
+def test_off(cfg: CN):
+    cfg.set_provenance("off")
+    module_len = len(cfg._module)  # noqa: SLF001
+    cfg.INT = 2
+
+    assert cfg._module[module_len:] == ["cfg.INT = 2\n"]  # noqa: SLF001
+
+
+def test_global(cfg: CN):
+    set_provenance("off")
+    try:
+        assert cfg.provenance == "off"
+        cfg.set_provenance("lazy")
+        assert cfg.provenance == "lazy"
+        cfg.set_provenance(None)
+        assert cfg.provenance == "off"
+    finally:
+        set_provenance("full")
+
+
+def test_bad_mode(cfg: CN):
+    with pytest.raises(ValueError, match="Unknown provenance mode"):
+        cfg.set_provenance("partial")
+    with pytest.raises(ValueError, match="Unknown provenance mode"):
+        set_provenance("partial")
+
+
+def test_delta(cfg: CN, tmp_path: Path):
+    cfg.set_provenance("delta")
+    module_len = len(cfg._module)  # noqa: SLF001
+    for value in range(10):
+        cfg.INT = value
+    cfg.NESTED.FOO = "baz"
+    cfg.STR = schema.STR
+    assert len(cfg._module) == module_len  # noqa: SLF001
+
+    save_path = tmp_path / "saved.py"
+    cfg.save(save_path)
+    assert save_path.read_text() == (
+        "from tests.data.node.schema import schema\n\n\ncfg = schema.init_cfg()\ncfg.INT = 9\ncfg.NESTED.FOO = 'baz'\n"
+    )
+    assert CN.load(save_path).to_dict() == {**cfg.to_dict(), "NAME": "saved"}
+
+
+def test_delta_structure(tmp_path: Path):
+    cfg = schema.inherit()
+    cfg.NEW = CN()
+    cfg.NEW.DEEP = CN()
+    cfg.NEW.DEEP.PATH = Path("a")
+    del cfg["DEFAULT"]
+    cfg.freeze_schema()
+    cfg.INT = 1
+
+    save_path = tmp_path / "saved.py"
+    cfg.save(save_path, delta=True)
+    assert save_path.read_text() == (
+        "from tests.data.node.schema import schema\n"
+        "from pycs import CN\n"
+        "from pathlib import PosixPath\n"
+        "\n\ncfg = schema.inherit()\n"
+        "del cfg['DEFAULT']\n"
+        "cfg.NEW = CN()\n"
+        "cfg.NEW.DEEP = CN()\n"
+        "cfg.NEW.DEEP.PATH = PosixPath('a')\n"
+        "cfg.freeze_schema()\n"
+        "cfg.INT = 1\n"
+    )
+    assert CN.load(save_path).to_dict() == {**cfg.to_dict(), "NAME": "saved"}
+
+    cfg = schema.inherit()
+    cfg.PATHS = CN(Path)
+    cfg.freeze_schema()
+    with pytest.raises(SaveError, match="leaf spec"):
+        cfg.save(save_path, delta=True)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+
+import pytest
+
+from pycs import CN
+from pycs.errors import ConfigError, FrozenError
+from pycs.shared import SharedSnapshot
+
+
+@pytest.fixture
+def cfg() -> CN:
+    cfg = CN()
+    cfg.NAME = "name"
+    cfg.BIG = list(range(1000))
+    cfg.DICT = {"A": [1]}
+    cfg.NESTED = CN()
+    cfg.NESTED.FOO = "bar"
+    cfg.NESTED.DEEP = CN()
+    cfg.NESTED.DEEP.INT = 1
+    cfg = cfg.static_init()
+    cfg.freeze()
+    return cfg
+
+
+@pytest.fixture
+def name() -> str:
+    return f"pycs_test_{os.getpid()}"
+
+
+def _read(name: str, queue: multiprocessing.Queue) -> None:
+    with CN.attach_shared(name) as shared:
+        queue.put((shared.NESTED.DEEP.INT, sum(shared.BIG)))
+
+
+def test_publish_attach(cfg: CN, name: str):
+    with cfg.publish_shared(name):
+        with CN.attach_shared(name) as shared:
+            assert not shared._cache  # noqa: SLF001
+            assert shared.NAME == "name"
+            assert isinstance(shared.NESTED, SharedSnapshot)
+            assert "BIG" not in shared._cache  # noqa: SLF001
+            assert shared.NESTED.DEEP.INT == 1
+            assert shared["NESTED"]["DEEP"]["INT"] == 1
+            assert shared.BIG == tuple(range(1000))  # noqa: SIM300 False positive
+            assert list(shared) == list(cfg.keys())
+            assert shared.to_dict() == {**cfg.to_dict(), "BIG": tuple(range(1000)), "DICT": {"A": (1,)}}
+            with pytest.raises(FrozenError):
+                shared.NAME = "other"
+            with pytest.raises(AttributeError):
+                _ = shared.MISSING
+        shared = CN.attach_shared(name)
+        shared.close()
+        with pytest.raises(ConfigError, match="closed"):
+            _ = shared.NAME
+
+
+def test_other_process(cfg: CN, name: str):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    with cfg.publish_shared(name):
+        process = context.Process(target=_read, args=(name, queue))
+        process.start()
+        process.join()
+        assert queue.get(timeout=10) == (1, sum(range(1000)))
+        # Reader exiting doesn't remove the segment
+        with CN.attach_shared(name) as shared:
+            assert shared.NAME == "name"
+    with pytest.raises(FileNotFoundError):
+        CN.attach_shared(name)
+
+
+def test_requires_frozen(name: str):
+    cfg = CN()
+    cfg.INT = 1
+    with pytest.raises(ConfigError, match="frozen"):
+        cfg.publish_shared(name)
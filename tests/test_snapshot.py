@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pickle
+
+import pytest
+
+from pycs import CN
+from pycs.errors import ConfigError, FrozenError
+from pycs.leaf import CfgLeaf
+from pycs.snapshot import Snapshot
+
+# ruff: noqa: S301, S403
+
+
+def _make_cfg(name: str) -> CN:
+    cfg = CN()
+    cfg.NAME = name
+    cfg.LIST = [1, [2, 3]]
+    cfg.DICT = {"A": [1]}
+    cfg.NESTED = CN()
+    cfg.NESTED.FOO = "bar"
+    cfg.NESTED.keys = 1  # Clashes with method, only available through item access
+    cfg = cfg.static_init()
+    cfg.freeze()
+    return cfg
+
+
+@pytest.fixture
+def cfg() -> CN:
+    return _make_cfg("name")
+
+
+def test_snapshot(cfg: CN):
+    snapshot = cfg.snapshot()
+    assert snapshot.NAME == "name"
+    assert snapshot.LIST == (1, (2, 3))
+    assert snapshot.NESTED.FOO == snapshot["NESTED"]["FOO"] == "bar"
+    assert snapshot.NESTED["keys"] == 1
+    assert list(snapshot) == list(cfg.keys())
+    assert snapshot.to_dict() == {
+        "NAME": "name",
+        "LIST": (1, (2, 3)),
+        "DICT": {"A": (1,)},
+        "NESTED": {"FOO": "bar", "keys": 1},
+    }
+
+
+def test_immutable(cfg: CN):
+    snapshot = cfg.snapshot()
+    with pytest.raises(FrozenError):
+        snapshot.NAME = "other"
+    with pytest.raises(FrozenError):
+        snapshot.NESTED.NEW = "other"
+    with pytest.raises(FrozenError):
+        snapshot.DICT["B"] = 2
+    with pytest.raises(AttributeError):
+        snapshot.__dict__  # noqa: B018 Not useless, since it raises the error
+
+
+def test_hash_and_pickle(cfg: CN):
+    snapshot = cfg.snapshot()
+    unpickled = pickle.loads(pickle.dumps(snapshot))
+    assert unpickled == snapshot
+    assert hash(unpickled) == hash(snapshot)
+    assert isinstance(unpickled.NESTED, Snapshot)
+
+    assert _make_cfg("name").snapshot() == snapshot
+    assert _make_cfg("other").snapshot() != snapshot
+
+    plain = pickle.loads(pickle.dumps(snapshot))
+    assert not any(isinstance(value, (CN, CfgLeaf)) for value in plain.values())
+
+
+def test_unfrozen():
+    with pytest.raises(ConfigError, match="freeze first"):
+        CN().snapshot()
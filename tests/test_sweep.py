@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from pycs import CL, CN
+from pycs.errors import MissingRequiredError, TypeMismatchError
+from tests.data.node.schema import schema
+
+GRID = {"INT": [1, 2, 3], "NESTED.FOO": ["a", "b", "c"]}
+
+
+def test_product():
+    configs = list(schema.sweep(GRID))
+    assert len(configs) == 9
+    assert [(cfg.INT, cfg.NESTED.FOO) for cfg in configs[:4]] == [(1, "a"), (1, "b"), (1, "c"), (2, "a")]
+    assert configs[0].STR == schema.STR
+
+
+def test_zip_and_limit():
+    assert [(cfg.INT, cfg.NESTED.FOO) for cfg in schema.sweep(GRID, mode="zip", n=2)] == [(1, "a"), (2, "b")]
+    with pytest.raises(ValueError, match="same length"):
+        schema.sweep({"INT": [1, 2], "STR": ["a"]}, mode="zip")
+
+
+def test_random():
+    values = [(cfg.INT, cfg.NESTED.FOO) for cfg in schema.sweep(GRID, mode="random", n=20, seed=0)]
+    assert len(values) == 20
+    assert values == [(cfg.INT, cfg.NESTED.FOO) for cfg in schema.sweep(GRID, mode="random", n=20, seed=0)]
+    assert set(values) <= {(value, foo) for value in GRID["INT"] for foo in GRID["NESTED.FOO"]}
+    with pytest.raises(ValueError, match="required"):
+        schema.sweep(GRID, mode="random")
+
+
+def test_overrides_list():
+    configs = list(schema.sweep([{"INT": 1}, {"NESTED": {"FOO": "baz"}, "STR": "a"}]))
+    assert configs[0].INT == 1
+    assert configs[1].NESTED.FOO == "baz"
+    assert configs[1].INT == schema.INT
+
+
+def test_checked_at_plan_time():
+    with pytest.raises(TypeMismatchError):
+        schema.sweep({"INT": [1, 2, "a"]})
+
+
+def test_output(tmp_path: Path):
+    for idx, cfg in enumerate(schema.sweep(GRID, mode="zip", output_dir=tmp_path / "configs")):
+        loaded = CN.load(tmp_path / "configs" / f"{idx:05d}.py")
+        assert (loaded.INT, loaded.NESTED.FOO) == (cfg.INT, cfg.NESTED.FOO)
+    for idx, cfg in enumerate(schema.sweep(GRID, mode="zip", output_dir=tmp_path / "deltas", output="delta")):
+        loaded = schema.load_from_data_file(tmp_path / "deltas" / f"{idx:05d}.json")
+        assert (loaded.INT, loaded.NESTED.FOO) == (cfg.INT, cfg.NESTED.FOO)
+
+
+def _upper_foo(cfg: CN) -> None:
+    cfg.FOO = cfg.FOO.upper()
+
+
+def test_shared_subtrees():
+    configs = list(schema.sweep({"INT": [1, 2]}))
+    # Nested node isn't changed, so its children are not created
+    for cfg in configs:
+        assert cfg.get_raw("NESTED")._cow_source is not None  # noqa: SLF001 Reads through to the base config
+    assert [cfg.NESTED.FOO for cfg in configs] == ["bar", "bar"]
+
+    transformed = CN()
+    transformed.INT = 0
+    transformed.NESTED = CN()
+    transformed.NESTED.FOO = "bar"
+    transformed.NESTED.add_transform(_upper_foo)
+    transformed.OTHER = CN()
+    transformed.OTHER.REQUIRED = CL(None, str, required=True)
+    # Untouched subtrees are still transformed and validated
+    with pytest.raises(MissingRequiredError):
+        next(transformed.sweep({"INT": [1]}))
+    cfg = next(transformed.sweep({"OTHER.REQUIRED": ["set"]}))
+    assert cfg.NESTED.FOO == "BAR"
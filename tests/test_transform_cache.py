@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import stat
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from pycs import CN
+from pycs.transform_cache import CachedTransform
+from pycs.transforms import LoadFromAWSSecretsManager, LoadFromEnvVars, TransformBase
+from tests.utils import Clock, wait_for
+
+
+@dataclass
+class CountingTransform(TransformBase):
+    """Stand-in for a remote source, counts requests"""
+
+    key: str
+    value: str = "fetched"
+    delay: float = 0
+    calls: int = 0
+
+    def get_updates(self, cfg: CN) -> dict[str, Any] | None:
+        self.calls += 1
+        time.sleep(self.delay)
+        return {"STR": f"{self.value} {cfg[self.key].NAME}"}
+
+    def updates_key(self, cfg: CN) -> Any:
+        return cfg[self.key].NAME
+
+
+@pytest.fixture()
+def wall_clock(clock: Clock, monkeypatch: pytest.MonkeyPatch) -> Clock:
+    monkeypatch.setattr("pycs.transform_cache.time.time", clock)
+    return clock
+
+
+def _schema(name: str = "secret") -> CN:
+    schema = CN()
+    schema.STR = ""
+    schema.SOURCE = CN()
+    schema.SOURCE.NAME = name
+    return schema
+
+
+def test_ttl(tmp_path: Path, wall_clock: Clock):
+    source = CountingTransform("SOURCE")
+    transform = CachedTransform(source, tmp_path, ttl=60)
+    cfg = _schema()
+    assert transform.get_updates(cfg) == {"STR": "fetched secret"}
+
+    # Another process reads the same entry
+    other = CachedTransform(CountingTransform("SOURCE"), tmp_path, ttl=60)
+    assert other.get_updates(cfg) == {"STR": "fetched secret"}
+    assert other.transform.calls == 0
+
+    source.value = "updated"
+    wall_clock.now += 59
+    assert transform.get_updates(cfg) == {"STR": "fetched secret"}
+    wall_clock.now += 1
+    assert transform.get_updates(cfg) == {"STR": "updated secret"}
+    assert transform.get_updates(_schema("other")) == {"STR": "updated other"}
+    assert source.calls == 3
+
+
+def test_entry_permissions(tmp_path: Path):
+    directory = tmp_path / "cache"
+    CachedTransform(CountingTransform("SOURCE"), directory, ttl=60).get_updates(_schema())
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+    entries = list(directory.glob("*.json"))
+    assert len(entries) == 1
+    assert stat.S_IMODE(entries[0].stat().st_mode) == 0o600
+
+
+def test_existing_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    directory = tmp_path / "cache"
+    directory.mkdir(mode=0o777)
+    directory.chmod(0o777)
+    source = CountingTransform("SOURCE")
+    transform = CachedTransform(source, directory, ttl=60)
+    transform.get_updates(_schema())
+    assert stat.S_IMODE(directory.stat().st_mode) == 0o700
+
+    # Entries which could have been written by other users are not used
+    for path in directory.glob("*.json"):
+        path.chmod(0o666)
+    transform.get_updates(_schema())
+    assert source.calls == 2
+
+    monkeypatch.setattr("os.getuid", lambda: directory.stat().st_uid + 1)
+    with pytest.raises(PermissionError, match="another user"):
+        transform.get_updates(_schema())
+
+
+@dataclass
+class ObjectTransform(TransformBase):
+    def get_updates(self, _) -> dict[str, Any] | None:
+        return {"VALUE": object()}
+
+    def updates_key(self, _) -> Any:
+        return None
+
+
+def test_not_serializable(tmp_path: Path):
+    with pytest.warns(UserWarning, match="Can't cache"):
+        assert "VALUE" in CachedTransform(ObjectTransform(), tmp_path, ttl=60).get_updates(_schema())
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_invalidate(tmp_path: Path):
+    source = CountingTransform("SOURCE")
+    transform = CachedTransform(source, tmp_path, ttl=60)
+    cfg, other = _schema(), _schema("other")
+    transform.get_updates(cfg)
+    transform.get_updates(other)
+
+    transform.invalidate(cfg)
+    transform.get_updates(cfg)
+    transform.get_updates(other)
+    assert source.calls == 3
+
+    transform.invalidate()
+    transform.get_updates(cfg)
+    transform.get_updates(other)
+    assert source.calls == 5
+
+
+def test_stale_while_revalidate(tmp_path: Path, wall_clock: Clock):
+    source = CountingTransform("SOURCE")
+    transform = CachedTransform(source, tmp_path, ttl=60, stale=30)
+    cfg = _schema()
+    transform.get_updates(cfg)
+
+    source.value = "updated"
+    wall_clock.now += 70
+    assert transform.get_updates(cfg) == {"STR": "fetched secret"}
+    wait_for(lambda: source.calls == 2 and not transform._refreshing)  # noqa: SLF001 Background thread
+    assert transform.get_updates(cfg) == {"STR": "updated secret"}
+
+    # Too old to be used while refreshing
+    source.value = "latest"
+    wall_clock.now += 100
+    assert transform.get_updates(cfg) == {"STR": "latest secret"}
+    assert source.calls == 3
+
+
+def test_single_fetch(tmp_path: Path):
+    # Each thread opens its own lock file, so they wait for each other in the same way as processes
+    transforms = [CachedTransform(CountingTransform("SOURCE", delay=0.05), tmp_path, ttl=60) for _ in range(8)]
+    results = []
+    threads = [threading.Thread(target=lambda t=t: results.append(t.get_updates(_schema()))) for t in transforms]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{"STR": "fetched secret"}] * len(transforms)
+    assert sum(t.transform.calls for t in transforms) == 1
+
+
+def test_corrupted_entry(tmp_path: Path):
+    transform = CachedTransform(CountingTransform("SOURCE"), tmp_path, ttl=60)
+    transform.get_updates(_schema())
+    for path in tmp_path.glob("*.json"):
+        path.write_bytes(b"corrupted")
+    assert transform.get_updates(_schema()) == {"STR": "fetched secret"}
+    assert transform.transform.calls == 2
+
+
+def test_transform(tmp_path: Path):
+    schema = _schema()
+    schema.add_transform(CachedTransform(CountingTransform("SOURCE"), tmp_path, ttl=60))
+    schema.freeze_schema()
+    cfg = schema.init_cfg()
+    cfg.transform()
+    assert cfg.STR == "fetched secret"
+
+
+def test_secrets_manager_key():
+    transform = LoadFromAWSSecretsManager("SECRETS_MANAGER")
+    cfg = CN()
+    cfg.STR = "changed by other transforms"
+    cfg.SECRETS_MANAGER = CN()
+    cfg.SECRETS_MANAGER.NAME = "pycs-test"
+    key = transform.updates_key(cfg)
+    cfg.STR = "other"
+    assert transform.updates_key(cfg) == key
+    cfg.SECRETS_MANAGER.NAME = "other"
+    assert transform.updates_key(cfg) != key
+    assert not CachedTransform(transform, "~/cache", ttl=60).cacheable
+
+
+def test_default_key():
+    @dataclass
+    class Source(TransformBase):
+        url: str
+
+        def get_updates(self, _) -> dict[str, Any] | None:
+            return None
+
+    cfg = _schema()
+    key = Source("https://example.com").updates_key(cfg)
+    assert Source("https://example.com").updates_key(cfg) == key
+    assert Source("https://example.org").updates_key(cfg) != key
+    cfg.STR = "changed"
+    assert Source("https://example.com").updates_key(cfg) != key
+
+
+def test_default_key_ignores_caches(monkeypatch: pytest.MonkeyPatch):
+    transform = LoadFromEnvVars("PYCS_KEY_TESTS__")
+    cfg = _schema()
+    key = transform.updates_key(cfg)
+    monkeypatch.setenv("PYCS_KEY_TESTS__STR", "env")
+    assert transform.get_updates(cfg) == {"STR": "env"}
+    assert transform.updates_key(cfg) == key
@@ -6,6 +6,7 @@ from pathlib import Path
 import pytest
 
 from pycs import CN
+from pycs.errors import SchemaFrozenError
 from pycs.transforms import (
     LoadFromAWSAppConfig,
     LoadFromAWSSecretsManager,
@@ -62,6 +63,88 @@ def test_load_from_env_vars(monkeypatch):
     assert cfg.DICT.X == ""
 
 
+def test_load_from_env_vars_typed(monkeypatch):
+    from .data.base_cfg import schema as cfg_base
+
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__STR", "123")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__BOOL", "on")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__DICT__INT", "0x10")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__LIST", "[5, 6]")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__NEW__FOO", "1.5")
+    transform = LoadFromEnvVars("PYCS_ENV_TESTS__")
+    schema = cfg_base.inherit()
+    schema.add_transform(transform)
+    schema.freeze_schema()
+
+    cfg = schema.init_cfg()
+    cfg.transform()
+    assert cfg.STR == "123"
+    assert cfg.BOOL is True
+    assert cfg.DICT.INT == 16
+    assert cfg.LIST == [5, 6]
+    assert cfg.NEW.FOO == 1.5
+
+    # Values are reused while environment doesn't change, but not shared between configs
+    cfg.LIST.append(7)
+    other = schema.init_cfg()
+    other.transform()
+    assert other.LIST == [5, 6]
+
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__DICT__INT", "3")
+    other.transform()
+    assert other.DICT.INT == 3
+
+
+def test_load_from_env_vars_str(monkeypatch):
+    from .data.base_cfg import schema as cfg_base
+
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__NAME", "~")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__STR", "'quoted: value'")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__DICT__FOO", "'unterminated")
+    cfg = cfg_base.inherit()
+    cfg.NAME = "set"
+    cfg.add_transform(LoadFromEnvVars("PYCS_ENV_TESTS__"))
+    cfg.freeze_schema()
+    cfg.transform()
+    assert cfg.NAME is None
+    assert cfg.STR == "quoted: value"
+    assert cfg.DICT.FOO == "'unterminated"
+
+
+def test_load_from_env_vars_shared(monkeypatch):
+    from .data.base_cfg import schema as cfg_base
+
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__NEW__VALUE", "123")
+    transform = LoadFromEnvVars("PYCS_ENV_TESTS__")
+    schemas = [cfg_base.inherit(), cfg_base.inherit()]
+    schemas[0].NEW.VALUE = 0
+    schemas[1].NEW.VALUE = ""
+    for schema in schemas:
+        schema.add_transform(transform)
+        schema.freeze_schema()
+
+    # Same transform is used for schemas with different types of leaves
+    values = []
+    for schema in schemas * 2:
+        cfg = schema.init_cfg()
+        cfg.transform()
+        values.append(cfg.NEW.VALUE)
+    assert values == [123, "123", 123, "123"]
+
+
+def test_load_from_env_vars_unknown(monkeypatch):
+    from .data.base_cfg import schema as cfg_base
+
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__DICT__MISSING", "1")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__STR__NESTED", "1")
+    monkeypatch.setitem(os.environ, "PYCS_ENV_TESTS__STR", "known")
+    cfg = cfg_base.inherit()
+    cfg.add_transform(LoadFromEnvVars("PYCS_ENV_TESTS__"))
+    cfg.freeze_schema()
+    with pytest.raises(SchemaFrozenError, match="PYCS_ENV_TESTS__DICT__MISSING.*PYCS_ENV_TESTS__STR__NESTED"):
+        cfg.transform()
+
+
 @pytest.mark.parametrize("type_", ["yaml", "json"])
 def test_load_from_aws_appconfig(type_: str):
     from .data.base_cfg import schema as cfg_base
@@ -0,0 +1,43 @@
+"""Helpers shared by tests, fixtures are defined in conftest.py"""
+
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+
+class Clock:
+    """Time source which only changes when test sets it"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    """Wait for condition changed by a background thread"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("Condition was not met in time")
+        time.sleep(0.005)
+
+
+def write_lines(path: Path, lines: list[str]) -> None:
+    path.write_text("\n".join(lines) + "\n")
+
+
+def executed(package: Path) -> list:
+    """Values recorded by modules of package created by make_package fixture"""
+    return sys.modules[f"{package.name}.counter"].EXECUTED
+
+
+def line_number(path: Path, source: str) -> int:
+    """Number of the first line of file which is exactly source, to check references to test code"""
+    return path.read_text().splitlines().index(source) + 1